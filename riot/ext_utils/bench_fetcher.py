@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+# Allow `from src...` imports when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api_client import RiotClient
+from src.async_client import AsyncRiotClient
+from src.data_fetcher import DataFetcher
+from src.database import RiotDatabase
+from src.rate_limiter import RateLimiter
+from mock_riot_server import start_server, generate_fixtures, parse_limits
+
+# End-to-end fetcher benchmark against the mock Riot API (no key, no network).
+# Each mode runs process_team from an empty DB with the HTTP cache off, so every
+# account, mastery, matchlist and match request goes through the limiter and the wire.
+# Usage: python riot/ext_utils/bench_fetcher.py [--players 10] [--count 40] [--latency 0.05]
+#        python riot/ext_utils/bench_fetcher.py --fixtures riot/db/fixtures   # recorded data
+
+
+def run_mode(name, base_url, team, count, app_limits, workers, use_async, tmp):
+    db = RiotDatabase(str(Path(tmp) / f"bench_{name}.db"))
+    client = RiotClient(api_key="RGAPI-mock", base_url=base_url, use_cache=False,
+                        rate_limiter=RateLimiter(app_limits or None))
+    async_client = AsyncRiotClient(client, max_in_flight=workers) if use_async else None
+    fetcher = DataFetcher(client, db, workers=workers, async_client=async_client)
+
+    start = time.perf_counter()
+    fetcher.process_team(team, count=count)
+    elapsed = time.perf_counter() - start
+
+    with db.get_conn() as conn:
+        matches = conn.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+    client.close()
+    db.close()
+    return elapsed, matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DataFetcher against the mock Riot API")
+    parser.add_argument('--fixtures', help="Recorded fixture dir (default: generate synthetic ones)")
+    parser.add_argument('--team', help="Riot IDs to fetch, comma separated (default: every fixture account)")
+    parser.add_argument('--players', type=int, default=10, help="Synthetic players to generate")
+    parser.add_argument('--count', type=int, default=40, help="Matches per player")
+    parser.add_argument('--latency', type=float, default=0.05, help="Mock latency per request (s)")
+    parser.add_argument('--app-limit', default="500:1", help="Mock application limits, e.g. 20:1,100:120")
+    parser.add_argument('--workers', type=int, default=8, help="Threads / in-flight requests for concurrent modes")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = args.fixtures
+        if not fixtures:
+            fixtures = str(Path(tmp) / "fixtures")
+            generate_fixtures(fixtures, players=args.players, matches_per_player=args.count)
+
+        if args.team:
+            riot_ids = [r.strip() for r in args.team.split(',')]
+        else:
+            riot_ids = [p.stem for p in sorted((Path(fixtures) / 'accounts').glob('*.json'))]
+        team = [{'name': r.split('#')[0], 'tag': r.split('#')[1]} for r in riot_ids]
+
+        app_limits = parse_limits(args.app_limit)
+        server = start_server(fixtures, port=0, latency=args.latency, jitter=args.latency / 4,
+                              app_limits=app_limits)
+
+        print(f"{len(team)} players x {args.count} matches, latency {args.latency * 1000:.0f}ms, limits {args.app_limit}")
+        print(f"{'Mode':<10} {'Time (s)':>9} {'Matches':>8} {'Matches/s':>10} {'429s':>5}")
+        modes = [
+            ("serial", 1, False),
+            ("threads", args.workers, False),
+            ("async", args.workers, True),
+        ]
+        for name, workers, use_async in modes:
+            # Fresh server windows per mode: each mode starts with a fresh client limiter,
+            # which can't know about requests the previous mode left in the server's windows
+            server.state.app_windows.clear()
+            server.state.method_windows.clear()
+            before = server.state.stats.get('429', 0)
+            elapsed, matches = run_mode(name, server.base_url, team, args.count, app_limits, workers, use_async, tmp)
+            throttled = server.state.stats.get('429', 0) - before
+            print(f"{name:<10} {elapsed:>9.2f} {matches:>8} {matches / elapsed:>10.1f} {throttled:>5}")
+
+        server.shutdown()
+        print(f"Mock totals: {server.state.stats}")
+
+
+if __name__ == "__main__":
+    main()
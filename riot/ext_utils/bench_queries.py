@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+import random
+import sqlite3
+import tempfile
+
+# Allow `from src...` imports when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.migrations import apply_migrations
+
+# Benchmark for the scout.db hot queries, before and after the schema migrations.
+# Builds a throwaway DB with the original (unindexed) schema, so scout.db is never touched.
+# Usage: python riot/ext_utils/bench_queries.py [participant_rows]
+
+ROLES = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+
+def build_db(path, participant_rows, players=2000):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE players (puuid TEXT PRIMARY KEY, game_name TEXT, tag_line TEXT, last_updated REAL);
+        CREATE TABLE matches (match_id TEXT PRIMARY KEY, queue_id INTEGER, game_mode TEXT,
+                              game_version TEXT, game_duration INTEGER, timestamp INTEGER);
+        CREATE TABLE match_participants (id INTEGER PRIMARY KEY AUTOINCREMENT, match_id TEXT, puuid TEXT,
+                                         champion_id INTEGER, win BOOLEAN, team_id INTEGER);
+        CREATE TABLE player_mastery (id INTEGER PRIMARY KEY AUTOINCREMENT, puuid TEXT, champion_id INTEGER,
+                                     mastery_points INTEGER, rank INTEGER);
+    ''')
+    rng = random.Random(42)
+    puuids = [f"puuid-{i:05d}" for i in range(players)]
+    conn.executemany('INSERT INTO players VALUES (?, ?, ?, ?)',
+                     [(p, f"Player{i}", "NA1", 0) for i, p in enumerate(puuids)])
+
+    match_count = participant_rows // 10
+    conn.executemany('INSERT INTO matches VALUES (?, 420, "CLASSIC", "15.23.1", 1800, ?)',
+                     [(f"NA1_{m}", 1700000000000 + m) for m in range(match_count)])
+    conn.executemany('INSERT INTO match_participants (match_id, puuid, champion_id, win, team_id) VALUES (?, ?, ?, ?, ?)',
+                     [(f"NA1_{m}", p, rng.randint(1, 170), rng.random() < 0.5, 100 if k < 5 else 200)
+                      for m in range(match_count)
+                      for k, p in enumerate(rng.sample(puuids, 10))])
+    conn.executemany('INSERT INTO player_mastery (puuid, champion_id, mastery_points, rank) VALUES (?, ?, ?, ?)',
+                     [(p, c, rng.randint(1000, 500000), 7) for p in puuids for c in rng.sample(range(1, 171), 15)])
+    conn.commit()
+    return conn, puuids
+
+def run_queries(conn, puuids, rounds=200):
+    rng = random.Random(7)
+    sample = [rng.choice(puuids) for _ in range(rounds)]
+    queries = {
+        "get_player (lower name)": lambda p: conn.execute(
+            'SELECT puuid FROM players WHERE lower(game_name) = ? AND lower(tag_line) = ?',
+            (f"player{p[-5:].lstrip('0') or '0'}", "na1")).fetchone(),
+        "pool (participants)": lambda p: conn.execute(
+            'SELECT champion_id FROM match_participants WHERE puuid = ?', (p,)).fetchall(),
+        "role counts": lambda p: conn.execute(
+            'SELECT role, COUNT(*) FROM match_participants WHERE puuid = ? GROUP BY role', (p,)).fetchall(),
+        "top 15 mastery": lambda p: conn.execute(
+            'SELECT champion_id FROM player_mastery WHERE puuid = ? ORDER BY mastery_points DESC LIMIT 15', (p,)).fetchall(),
+    }
+    results = {}
+    for name, query in queries.items():
+        start = time.perf_counter()
+        for p in sample:
+            query(p)
+        results[name] = (time.perf_counter() - start) / rounds * 1000
+    return results
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        conn, puuids = build_db(os.path.join(tmp, "bench.db"), rows)
+        # The role column arrives via migration 1; add it so "before" runs the same queries
+        conn.execute('ALTER TABLE match_participants ADD COLUMN role TEXT')
+        conn.execute('UPDATE match_participants SET role = ?', (ROLES[0],))
+        conn.commit()
+        before = run_queries(conn, puuids)
+
+        start = time.perf_counter()
+        apply_migrations(conn)
+        migrate_time = time.perf_counter() - start
+        after = run_queries(conn, puuids)
+        conn.close()
+
+    print(f"{rows:,} participant rows, migrations applied in {migrate_time:.2f}s")
+    print(f"{'Query':<26}{'Before (ms)':>12}{'After (ms)':>12}{'Speedup':>10}")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<26}{before[name]:>12.3f}{after[name]:>12.3f}{speedup:>9.0f}x")
+
+if __name__ == "__main__":
+    main()
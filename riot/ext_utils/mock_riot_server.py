@@ -0,0 +1,400 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Allow `from src...` imports when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Offline stand-in for the Riot API, for benchmarks and runs without a key.
+# Serves fixtures from a directory with simulated latency and Riot-style rate limits
+# (X-App-Rate-Limit / X-Method-Rate-Limit headers, 429 + Retry-After when exceeded).
+#
+# Routes are the real API paths behind a routing prefix, so point the client at it with
+#   RIOT_API_BASE_URL=http://127.0.0.1:8765/{routing}
+#
+# Fixture layout (one JSON file per response):
+#   accounts/<gameName>#<tagLine>.json   Account-V1 body
+#   mastery/<puuid>.json                 Champion-Mastery-V4 list
+#   matchlists/<puuid>.json              all match IDs, newest first
+#   matches/<match_id>.json              Match-V5 body
+#
+# Usage:
+#   python riot/ext_utils/mock_riot_server.py --generate 10            # synthetic fixtures
+#   python riot/ext_utils/mock_riot_server.py --record riot/team.txt  # capture real responses
+#   python riot/ext_utils/mock_riot_server.py --latency 0.08 --app-limit 20:1,100:120
+
+DEFAULT_FIXTURES = "riot/db/fixtures"
+DEFAULT_PORT = 8765
+
+ROLES = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+
+
+def parse_limits(value):
+    """'20:1,100:120' -> [(20, 1), (100, 120)]"""
+    if not value:
+        return []
+    return [tuple(int(x) for x in part.split(':')) for part in value.split(',')]
+
+
+class FixtureStore:
+    """Loads fixture files lazily and keeps them in memory."""
+    def __init__(self, root):
+        self.root = Path(root)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def load(self, kind, key):
+        with self._lock:
+            if (kind, key) in self._cache:
+                return self._cache[(kind, key)]
+        path = self.root / kind / f"{key}.json"
+        data = None
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        with self._lock:
+            self._cache[(kind, key)] = data
+        return data
+
+    def account(self, game_name, tag_line):
+        # Riot IDs are case-insensitive
+        data = self.load('accounts', f"{game_name}#{tag_line}")
+        if data is None and (self.root / 'accounts').exists():
+            wanted = f"{game_name}#{tag_line}.json".lower()
+            for path in (self.root / 'accounts').iterdir():
+                if path.name.lower() == wanted:
+                    return self.load('accounts', path.stem)
+        return data
+
+    def match_time(self, match_id):
+        match = self.load('matches', match_id)
+        if not match:
+            return 0
+        return match.get('info', {}).get('gameCreation', 0) // 1000
+
+    def match_queue(self, match_id):
+        match = self.load('matches', match_id)
+        return match.get('info', {}).get('queueId') if match else None
+
+
+class FixedWindow:
+    """Riot-style fixed window: starts on the first request, resets after `window` seconds."""
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.started = 0.0
+        self.count = 0
+
+    def hit(self, now):
+        if now - self.started >= self.window:
+            self.started = now
+            self.count = 0
+        self.count += 1
+        return self.count <= self.limit
+
+    def retry_after(self, now):
+        return max(1, int(self.window - (now - self.started) + 0.999))
+
+
+class MockState:
+    """Server-wide settings, rate-limit windows and request counters."""
+    def __init__(self, store, latency=0.05, jitter=0.02, app_limits=None, method_limits=None, service_429=0.0):
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.app_limits = app_limits or []
+        self.method_limits = method_limits or []
+        self.service_429 = service_429
+        self.lock = threading.Lock()
+        self.app_windows = {}    # routing -> [FixedWindow]
+        self.method_windows = {} # (routing, method) -> [FixedWindow]
+        self.stats = {'requests': 0, '200': 0, '404': 0, '429': 0}
+
+    def admit(self, routing, method):
+        """
+        Counts one request against the windows.
+        Returns (headers, None) if allowed, else (headers, (retry_after, limit_type)).
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.stats['requests'] += 1
+            app = self.app_windows.setdefault(routing, [FixedWindow(l, w) for l, w in self.app_limits])
+            meth = self.method_windows.setdefault((routing, method), [FixedWindow(l, w) for l, w in self.method_limits])
+
+            # Like Riot, every window counts the request even when it's rejected
+            rejected = None
+            for limit_type, windows in (('application', app), ('method', meth)):
+                for window in windows:
+                    if not window.hit(now) and rejected is None:
+                        rejected = (window.retry_after(now), limit_type)
+
+            headers = {}
+            if app:
+                headers['X-App-Rate-Limit'] = ','.join(f"{w.limit}:{w.window}" for w in app)
+                headers['X-App-Rate-Limit-Count'] = ','.join(f"{min(w.count, w.limit + 1)}:{w.window}" for w in app)
+            if meth:
+                headers['X-Method-Rate-Limit'] = ','.join(f"{w.limit}:{w.window}" for w in meth)
+                headers['X-Method-Rate-Limit-Count'] = ','.join(f"{min(w.count, w.limit + 1)}:{w.window}" for w in meth)
+
+            if rejected is None and self.service_429 and random.random() < self.service_429:
+                rejected = (1, None) # Underlying service limit: no X-Rate-Limit-Type
+            return headers, rejected
+
+    def count(self, status):
+        with self.lock:
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+
+
+class MockRiotHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, so pooled sessions behave like production
+
+    def log_message(self, format, *args):
+        pass # Quiet; the benchmark reports totals instead
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        # Counted before the body goes out, so a client that has its response also sees the stats
+        self.server.state.count(status)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self, parts, query):
+        """Returns (method, handler) for a path split into segments (routing prefix removed)."""
+        store = self.server.state.store
+        path = '/'.join(parts)
+        if path.startswith('riot/account/v1/accounts/by-riot-id/') and len(parts) == 7:
+            return 'account', lambda: store.account(unquote(parts[5]), unquote(parts[6]))
+        if path.startswith('lol/champion-mastery/v4/champion-masteries/by-puuid/') and parts[-1] == 'top':
+            count = int(query.get('count', ['3'])[0])
+            return 'mastery', lambda: (store.load('mastery', parts[5]) or [])[:count]
+        if path.startswith('lol/match/v5/matches/by-puuid/') and parts[-1] == 'ids':
+            return 'matchlist', lambda: self._matchlist(parts[5], query)
+        if path.startswith('lol/match/v5/matches/') and len(parts) == 5:
+            return 'match', lambda: store.load('matches', parts[4])
+        return None, None
+
+    def _matchlist(self, puuid, query):
+        store = self.server.state.store
+        ids = store.load('matchlists', puuid)
+        if ids is None:
+            return []
+        start = int(query.get('start', ['0'])[0])
+        count = int(query.get('count', ['20'])[0])
+        if 'queue' in query:
+            queue = int(query['queue'][0])
+            ids = [mid for mid in ids if store.match_queue(mid) == queue]
+        if 'startTime' in query:
+            start_time = int(query['startTime'][0])
+            ids = [mid for mid in ids if store.match_time(mid) >= start_time]
+        if 'endTime' in query:
+            end_time = int(query['endTime'][0])
+            ids = [mid for mid in ids if store.match_time(mid) <= end_time]
+        return ids[start:start + count]
+
+    def do_GET(self):
+        state = self.server.state
+        parsed = urlparse(self.path)
+        parts = [p for p in parsed.path.split('/') if p]
+        if not parts:
+            return self._send_json(404, {'status': {'message': 'Not found', 'status_code': 404}})
+        routing, parts = parts[0], parts[1:]
+
+        method, handler = self._route(parts, parse_qs(parsed.query))
+        if method is None:
+            return self._send_json(404, {'status': {'message': 'Not found', 'status_code': 404}})
+
+        headers, rejected = state.admit(routing, method)
+        if state.latency:
+            time.sleep(max(0.0, random.gauss(state.latency, state.jitter)))
+
+        if rejected:
+            retry_after, limit_type = rejected
+            headers['Retry-After'] = str(retry_after)
+            if limit_type:
+                headers['X-Rate-Limit-Type'] = limit_type
+            return self._send_json(429, {'status': {'message': 'Rate limit exceeded', 'status_code': 429}}, headers)
+
+        body = handler()
+        if body is None:
+            return self._send_json(404, {'status': {'message': 'Data not found', 'status_code': 404}}, headers)
+        self._send_json(200, body, headers)
+
+
+def start_server(fixtures=DEFAULT_FIXTURES, host='127.0.0.1', port=DEFAULT_PORT, **state_kwargs):
+    """
+    Starts the mock in a daemon thread (port=0 picks a free port).
+    Returns the server; its base URL is server.base_url and it stops with server.shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), MockRiotHandler)
+    server.daemon_threads = True
+    server.state = MockState(FixtureStore(fixtures), **state_kwargs)
+    server.base_url = f"http://{host}:{server.server_address[1]}/{{routing}}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def generate_fixtures(root, players=10, matches_per_player=40, shared=0.3, seed=42, platform=None):
+    """
+    Writes synthetic fixtures: `players` accounts with mastery, matchlists and matches.
+    A `shared` fraction of each player's games include another generated player,
+    like a premade team queueing together. `platform` (e.g. 'euw1') prefixes the match IDs
+    and names, so several regions can share one fixture directory. Returns the list of Riot IDs.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    for kind in ('accounts', 'mastery', 'matchlists', 'matches'):
+        (root / kind).mkdir(parents=True, exist_ok=True)
+
+    champions = list(range(1, 170))
+    label = platform.upper() if platform else "MOCK"
+    accounts = [(f"Mock{i}", label, f"{label.lower()}-puuid-{i:04d}") for i in range(players)]
+    history = {puuid: [] for _, _, puuid in accounts}
+    start = 1_700_000_000
+
+    match_no = 0
+    for p_idx, (_, _, puuid) in enumerate(accounts):
+        while len(history[puuid]) < matches_per_player:
+            match_no += 1
+            match_id = f"{label}_{match_no}"
+            created = start + match_no * 1800
+            # Teammates from the generated players, filler puuids for everyone else
+            lobby = [puuid]
+            if rng.random() < shared:
+                others = [a[2] for a in accounts if a[2] != puuid and len(history[a[2]]) < matches_per_player]
+                lobby += rng.sample(others, min(len(others), rng.randint(1, 3)))
+            lobby += [f"filler-{match_no}-{k}" for k in range(10 - len(lobby))]
+
+            participants = []
+            for slot, p in enumerate(lobby):
+                participants.append({
+                    'puuid': p,
+                    'championId': rng.choice(champions),
+                    'win': (slot < 5) == (match_no % 2 == 0),
+                    'teamId': 100 if slot < 5 else 200,
+                    'teamPosition': ROLES[slot % 5],
+                    'kills': rng.randint(0, 15), 'deaths': rng.randint(0, 12), 'assists': rng.randint(0, 20),
+                    'goldEarned': rng.randint(6000, 18000),
+                    'totalMinionsKilled': rng.randint(0, 300), 'neutralMinionsKilled': rng.randint(0, 150),
+                    'totalDamageDealtToChampions': rng.randint(5000, 45000),
+                    'visionScore': rng.randint(5, 90),
+                })
+                if p in history:
+                    history[p].append((created, match_id))
+
+            match = {
+                'metadata': {'matchId': match_id, 'participants': lobby},
+                'info': {
+                    'gameCreation': created * 1000,
+                    'gameDuration': rng.randint(1200, 2400),
+                    'gameMode': 'CLASSIC',
+                    'gameVersion': rng.choice(['15.22.1.1', '15.23.1.1', '15.24.1.1']),
+                    'queueId': rng.choice([420, 420, 420, 440]),
+                    'participants': participants,
+                }
+            }
+            with open(root / 'matches' / f"{match_id}.json", 'w', encoding='utf-8') as f:
+                json.dump(match, f)
+
+    for name, tag, puuid in accounts:
+        with open(root / 'accounts' / f"{name}#{tag}.json", 'w', encoding='utf-8') as f:
+            json.dump({'puuid': puuid, 'gameName': name, 'tagLine': tag}, f)
+        mastery = [{'puuid': puuid, 'championId': c, 'championLevel': 7,
+                    'championPoints': rng.randint(20000, 600000)} for c in rng.sample(champions, 15)]
+        mastery.sort(key=lambda m: m['championPoints'], reverse=True)
+        with open(root / 'mastery' / f"{puuid}.json", 'w', encoding='utf-8') as f:
+            json.dump(mastery, f)
+        ids = [mid for _, mid in sorted(history[puuid], reverse=True)]
+        with open(root / 'matchlists' / f"{puuid}.json", 'w', encoding='utf-8') as f:
+            json.dump(ids, f)
+
+    return [f"{name}#{tag}" for name, tag, _ in accounts]
+
+
+def record_fixtures(team_file, root, count=100):
+    """Captures real API responses for every player in a team file (needs RIOT_API_KEY)."""
+    from src.api_client import RiotClient
+    from scout import load_team_from_file
+
+    root = Path(root)
+    for kind in ('accounts', 'mastery', 'matchlists', 'matches'):
+        (root / kind).mkdir(parents=True, exist_ok=True)
+
+    def dump(kind, key, data):
+        with open(root / kind / f"{key}.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    with RiotClient(use_cache=False) as client:
+        for member in load_team_from_file(team_file):
+            name, tag = member['name'], member['tag']
+            account = client.get_account(name, tag)
+            if not account:
+                print(f"Skipping {name}#{tag}: account not found")
+                continue
+            puuid = account['puuid']
+            dump('accounts', f"{account['gameName']}#{account['tagLine']}", account)
+            dump('mastery', puuid, client.get_top_mastery(puuid, count=15) or [])
+
+            ids = []
+            while len(ids) < count:
+                page = client.get_matchlist(puuid, count=min(100, count - len(ids)), start=len(ids))
+                if not page:
+                    break
+                ids.extend(page)
+            dump('matchlists', puuid, ids)
+
+            for match_id in ids:
+                if not (root / 'matches' / f"{match_id}.json").exists():
+                    details = client.get_match_details(match_id)
+                    if details:
+                        dump('matches', match_id, details)
+            print(f"Recorded {name}#{tag}: {len(ids)} matches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Riot API server backed by fixtures")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help="Fixture directory")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.05, help="Mean response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.02, help="Latency standard deviation")
+    parser.add_argument('--app-limit', default="20:1,100:120", help="Application limits per routing value")
+    parser.add_argument('--method-limit', default="", help="Method limits per (routing, method)")
+    parser.add_argument('--service-429', type=float, default=0.0, help="Chance of a service 429 per request")
+    parser.add_argument('--generate', type=int, metavar='PLAYERS', help="Write synthetic fixtures and exit")
+    parser.add_argument('--record', metavar='TEAM_FILE', help="Record real responses for a team file and exit")
+    args = parser.parse_args()
+
+    if args.generate:
+        riot_ids = generate_fixtures(args.fixtures, players=args.generate)
+        print(f"Generated {len(riot_ids)} players in {args.fixtures}: {', '.join(riot_ids)}")
+        return
+    if args.record:
+        record_fixtures(args.record, args.fixtures)
+        return
+
+    server = start_server(args.fixtures, port=args.port, latency=args.latency, jitter=args.jitter,
+                          app_limits=parse_limits(args.app_limit), method_limits=parse_limits(args.method_limit),
+                          service_429=args.service_429)
+    print(f"Mock Riot API on {server.base_url} (fixtures: {args.fixtures})")
+    print(f"Run clients with RIOT_API_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Stats: {server.state.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,40 @@
-import sqlite3
+import sys
 import os
 
+# Allow `from src...` imports when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import RiotDatabase
+from src.migrations import get_version
+
 DB_PATH = os.path.abspath('riot/db/scout.db')
 
 def reset_db():
     print(f"Connecting to {DB_PATH}...")
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # 1. Schema Migration (Try add column)
-        try:
-            print("Attempting to add 'role' column...")
-            cursor.execute("ALTER TABLE match_participants ADD COLUMN role TEXT")
-            print("Column 'role' added.")
-        except sqlite3.OperationalError as e:
-            if "duplicate column name" in str(e):
-                print("Column 'role' already exists.")
-            else:
-                print(f"Migration warning: {e}")
-
-        # 2. Clear Data
-        print("Clearing match data to force re-fetch...")
-        cursor.execute("DELETE FROM matches")
-        cursor.execute("DELETE FROM match_participants")
-        # Optional: Keep players/champions/mastery to speed up, or wipe all?
-        # User wants "past 17 games" analysis. If we keep players, we assume their PUUIDs are fine.
-        # Clearing mastery forces mastery refresh too.
-        cursor.execute("DELETE FROM player_mastery")
-        
-        conn.commit()
-        conn.close()
+        # 1. Schema Migration (RiotDatabase applies pending migrations on init)
+        db = RiotDatabase(DB_PATH)
+
+        with db.get_conn() as conn:
+            print(f"Schema is at version {get_version(conn)}.")
+
+            # 2. Clear Data
+            print("Clearing match data to force re-fetch...")
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM matches")
+            cursor.execute("DELETE FROM match_participants")
+            cursor.execute("DELETE FROM participant_stats")
+            # Drop sync high-water marks too, or incremental sync would skip the cleared matches
+            cursor.execute("DELETE FROM player_sync")
+            # ...and refresh times, or the scheduler would treat the wiped players as fresh
+            cursor.execute("DELETE FROM player_refresh")
+            # Optional: Keep players/champions/mastery to speed up, or wipe all?
+            # User wants "past 17 games" analysis. If we keep players, we assume their PUUIDs are fine.
+            # Clearing mastery forces mastery refresh too.
+            cursor.execute("DELETE FROM player_mastery")
+            conn.commit()
+
+        db.close()
         print("Database reset complete.")
         
     except Exception as e:
@@ -0,0 +1,63 @@
+import os
+import sys
+import logging
+import tempfile
+import requests
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.api_client import RiotClient
+from src.rate_limiter import RateLimiter
+from src.response_cache import ResponseCache
+from src.metrics import get_metrics
+from mock_riot_server import generate_fixtures, start_server
+
+# Checks RiotClient against the mock server:
+#   python riot/ext_utils/test_api_client.py   (or pytest riot/ext_utils/test_api_client.py)
+
+
+def _rate_limited_total(metrics):
+    return sum(entry['value'] for entry in metrics.snapshot()['counters'].get('riot_rate_limited_total', []))
+
+
+def test_429_reaches_rate_limiter():
+    """
+    A 429 must surface in _handle_response (penalty, warning, metrics), not be retried
+    silently inside the urllib3 adapter. Goes through the 'match' class, so the per-method
+    limiter and the response cache are on the path.
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    root = tempfile.mkdtemp()
+    generate_fixtures(root, players=1, matches_per_player=1)
+    match_id = os.listdir(os.path.join(root, 'matches'))[0][:-len('.json')]
+    server = start_server(root, port=0, latency=0, jitter=0, app_limits=[(1, 2)])
+    cache = ResponseCache(os.path.join(root, 'http_cache.db'))
+    client = RiotClient(api_key='RGAPI-mock', base_url=server.base_url, cache=cache,
+                        rate_limiter=RateLimiter([(100, 1)]))
+    try:
+        url = client._match_url(match_id)
+        # 1. Spend the server's window behind the client's back, so its next request gets a 429
+        requests.get(url, timeout=5)
+        before = _rate_limited_total(get_metrics())
+
+        # 2. The client sees the 429, backs off for Retry-After, then succeeds
+        data = client._request(url, 'match')
+        assert data and data['metadata']['matchId'] == match_id
+        assert server.state.stats['429'] == 1
+        assert _rate_limited_total(get_metrics()) == before + 1
+
+        # 3. The 200 was cached: match details never expire, so no further request
+        requests_seen = sum(server.state.stats.values())
+        assert client._request(url, 'match') == data
+        assert sum(server.state.stats.values()) == requests_seen
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_429_reaches_rate_limiter()
+    print("OK")
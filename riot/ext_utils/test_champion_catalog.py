@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import logging
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import champion_catalog
+from src.champion_catalog import ChampionCatalog, get_catalog
+from src.database import RiotDatabase
+
+# Checks how ChampionCatalog merges its sources and when it is rebuilt:
+#   python riot/ext_utils/test_champion_catalog.py   (or pytest riot/ext_utils/test_champion_catalog.py)
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return path
+
+
+def test_build_merges_sources():
+    """DataDragon JSON first, the champions table fills gaps and overrides, curated attributes last."""
+    logging.getLogger().setLevel(logging.WARNING)
+    root = tempfile.mkdtemp()
+    db = RiotDatabase(os.path.join(root, 'scout.db'))
+    champions = _write_json(os.path.join(root, 'champions.json'), {'data': {
+        'Annie': {'key': '1', 'name': 'Annie', 'tags': ['Mage']},
+        'Olaf': {'key': '2', 'name': 'Olaf', 'tags': ['Fighter', 'Tank']},
+    }})
+    db.import_champions(_write_json(os.path.join(root, 'newer.json'), {'data': {
+        'Olaf': {'key': '2', 'name': 'Olaf', 'tags': ['Fighter']},
+        'Mel': {'key': '800', 'name': 'Mel', 'tags': ['Mage', 'Support']},
+    }}))
+    attributes = _write_json(os.path.join(root, 'attributes.json'), {
+        '_comment': 'skipped', '1': {'role': 'MIDDLE', 'dmg_type': 'Magic', 'class': 'Burst Mage'},
+    })
+
+    catalog = ChampionCatalog.build(db, champions_path=champions, attributes_path=attributes)
+    assert catalog.ids == [1, 2, 800]
+    assert catalog.get_tags(2) == ['Fighter']
+    assert catalog.get_name(800) == 'Mel' and catalog.get_name(5) == '5'
+    assert (catalog.role[1], catalog.get_dmg_type(1), catalog.get_class(1)) == ('MIDDLE', 'Magic', 'Mage')
+    assert catalog.get_dmg_type(5000) is None
+    assert 800 in catalog and 3 not in catalog
+    # Same shape as the DB lookup it replaces
+    assert catalog.batch([2, 800, 3]) == db.get_champions_batch([2, 800, 3])
+
+
+def test_catalog_is_shared_until_import():
+    logging.getLogger().setLevel(logging.WARNING)
+    root = tempfile.mkdtemp()
+    db = RiotDatabase(os.path.join(root, 'scout.db'))
+    champion_catalog.reset_catalog()
+    try:
+        first = get_catalog(db)
+        assert get_catalog(db) is first
+        db.import_champions(_write_json(os.path.join(root, 'newer.json'), {'data': {
+            'Test': {'key': '999', 'name': 'Test', 'tags': []},
+        }}))
+        rebuilt = get_catalog(db)
+        assert rebuilt is not first and 999 in rebuilt
+    finally:
+        champion_catalog.reset_catalog()
+
+
+if __name__ == "__main__":
+    test_build_merges_sources()
+    test_catalog_is_shared_until_import()
+    print("OK")
@@ -0,0 +1,46 @@
+import os
+import sys
+import random
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.champion_pool import ChampionIndex, intersect_all, union_all, overlap_matrix, tag_coverage_counts
+
+# Checks the bitset pool operations against plain Python sets:
+#   python riot/ext_utils/test_champion_pool.py   (or pytest riot/ext_utils/test_champion_pool.py)
+
+
+def test_encode_decode():
+    """Round trips in index order; ids the index hasn't seen are appended, not lost."""
+    index = ChampionIndex([30, 10, 20])
+    assert index.decode(index.encode({20, 30})) == [20, 30]
+    assert index.decode(index.encode([999, 10])) == [10, 999]
+    assert index.positions[999] == 3
+    assert index.encode([]) == 0 and index.decode(0) == []
+
+
+def test_set_operations_match_sets():
+    rng = random.Random(7)
+    index = ChampionIndex(range(1, 170))
+    for _ in range(50):
+        pools = [set(rng.sample(range(1, 200), rng.randint(0, 40))) for _ in range(rng.randint(1, 6))]
+        masks = [index.encode(pool) for pool in pools]
+
+        assert set(index.decode(intersect_all(masks))) == set.intersection(*pools)
+        assert set(index.decode(union_all(masks))) == set.union(*pools)
+        assert overlap_matrix(masks) == [[len(a & b) for b in pools] for a in pools]
+    assert intersect_all([]) == 0 and union_all([]) == 0
+
+
+def test_tag_coverage():
+    index = ChampionIndex()
+    tag_masks = index.tag_masks({1: {'tags': ['Mage']}, 2: {'tags': ['Mage', 'Support']}, 3: {'tags': ['Tank']}})
+    assert tag_coverage_counts(index.encode({1, 2}), tag_masks) == {'Mage': 2, 'Support': 1}
+
+
+if __name__ == "__main__":
+    test_encode_decode()
+    test_set_operations_match_sets()
+    test_tag_coverage()
+    print("OK")
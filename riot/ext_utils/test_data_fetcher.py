@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import asyncio
+import threading
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.api_client import RiotClient
+from src.async_client import AsyncRiotClient, gather_or_cancel
+from src.database import RiotDatabase
+from src.match_archive import MatchArchive
+from src.data_fetcher import DataFetcher
+from src.rate_limiter import RateLimiter
+from src.regions import parse_riot_id
+from mock_riot_server import generate_fixtures, start_server
+
+# Checks DataFetcher end to end against the mock server and a throwaway DB:
+#   python riot/ext_utils/test_data_fetcher.py   (or pytest riot/ext_utils/test_data_fetcher.py)
+
+
+class MockSetup:
+    """Fixtures, a running mock server, a client without disk cache and an empty DB."""
+    def __init__(self, players=2, matches_per_player=6, latency=0, root=None, team=None, **fixture_kwargs):
+        """`root` and `team` reuse fixtures the caller generated instead of making new ones."""
+        logging.getLogger().setLevel(logging.WARNING)
+        if root is None:
+            root = tempfile.mkdtemp()
+            team = [parse_riot_id(riot_id) for riot_id in
+                    generate_fixtures(root, players=players, matches_per_player=matches_per_player, **fixture_kwargs)]
+        self.root = root
+        self.team = team
+        self.server = start_server(self.root, port=0, latency=latency, jitter=0)
+        self.client = RiotClient(api_key='RGAPI-mock', base_url=self.server.base_url, use_cache=False,
+                                 rate_limiter=RateLimiter([(1000, 1)]))
+        self.db = RiotDatabase(os.path.join(self.root, 'scout.db'))
+
+    def match_count(self):
+        with self.db.get_conn() as conn:
+            return conn.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+
+    def add_match(self, puuid, match_id):
+        """Adds a brand new game to the top of the player's matchlist (copied from their latest)."""
+        ids = self.server.state.store.load('matchlists', puuid)
+        match = json.loads(json.dumps(self.server.state.store.load('matches', ids[0])))
+        match['metadata']['matchId'] = match_id
+        match['info']['gameCreation'] = int(time.time() * 1000)
+        with open(os.path.join(self.root, 'matches', f'{match_id}.json'), 'w', encoding='utf-8') as f:
+            json.dump(match, f)
+        with open(os.path.join(self.root, 'matchlists', f'{puuid}.json'), 'w', encoding='utf-8') as f:
+            json.dump([match_id] + ids, f)
+        self.server.state.store._cache.clear()
+
+    def count_calls(self, method):
+        """Wraps a client method; returns the list its call arguments are appended to."""
+        calls = []
+        original = getattr(self.client, method)
+        def counting(*args, **kwargs):
+            calls.append((args, kwargs))
+            return original(*args, **kwargs)
+        setattr(self.client, method, counting)
+        return calls
+
+    def close(self):
+        self.client.close()
+        self.db.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_match_details_fetched_concurrently():
+    """process_team keeps several detail requests in flight and stores every match once."""
+    mock = MockSetup(players=2, matches_per_player=8, latency=0.02)
+    in_flight = peak = 0
+    lock = threading.Lock()
+    get_match_details = mock.client.get_match_details
+
+    def counting(match_id):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            return get_match_details(match_id)
+        finally:
+            with lock:
+                in_flight -= 1
+
+    mock.client.get_match_details = counting
+    try:
+        data = DataFetcher(mock.client, mock.db, workers=4).process_team(mock.team, count=8)
+        assert [p['gameName'] for p in data] == [m['name'] for m in mock.team]
+        assert all(p['pool'] for p in data)
+        assert 1 < peak <= 4
+        listed = set()
+        for player in data:
+            listed.update(mock.client.get_matchlist(player['puuid'], count=8))
+        assert mock.match_count() == len(listed)
+    finally:
+        mock.close()
+
+
+def test_incremental_sync():
+    """Re-runs only list games since the last sync, deeper counts page backward, failures keep the state."""
+    mock = MockSetup(players=1, matches_per_player=8, shared=0)
+    fetcher = DataFetcher(mock.client, mock.db, workers=2)
+    try:
+        puuid = fetcher.process_team(mock.team, count=4)[0]['puuid']
+        ids = mock.server.state.store.load('matchlists', puuid)
+        assert mock.db.get_sync_state(puuid)[1:] == (ids[0], 4)
+
+        # Nothing new: one forward request, no details
+        listed = mock.count_calls('get_matchlist')
+        details = mock.count_calls('get_match_details')
+        fetcher.process_team(mock.team, count=4)
+        assert len(listed) == 1 and details == []
+
+        # One new game: only that game is fetched, and it becomes the high-water mark
+        mock.add_match(puuid, 'MOCK_NEW1')
+        fetcher.process_team(mock.team, count=4)
+        assert [args for args, _ in details] == [('MOCK_NEW1',)]
+        assert mock.db.get_sync_state(puuid)[1:] == ('MOCK_NEW1', 5)
+
+        # A deeper count pages backward from the synced depth
+        del listed[:]
+        fetcher.process_team(mock.team, count=8)
+        assert [kw['start'] for _, kw in listed] == [0, 5]
+        assert mock.match_count() == 8
+        assert mock.db.get_sync_state(puuid)[1:] == ('MOCK_NEW1', 8)
+
+        # A failed detail request leaves the state alone, so the next run lists the game again
+        mock.add_match(puuid, 'MOCK_NEW2')
+        get_match_details = mock.client.get_match_details
+        mock.client.get_match_details = lambda match_id: None
+        fetcher.process_team(mock.team, count=8)
+        assert mock.db.get_sync_state(puuid)[1:] == ('MOCK_NEW1', 8)
+        mock.client.get_match_details = get_match_details
+        fetcher.process_team(mock.team, count=8)
+        assert mock.db.get_sync_state(puuid)[1:] == ('MOCK_NEW2', 9)
+        assert mock.match_count() == 9
+    finally:
+        mock.close()
+
+
+def test_process_teams_shares_players():
+    """Players on several teams are resolved once; each team gets its own data in input order."""
+    mock = MockSetup(players=3, matches_per_player=4)
+    accounts = mock.count_calls('get_account')
+    listed = mock.count_calls('get_matchlist')
+    try:
+        teams = [mock.team[:2], mock.team[1:], [mock.team[0]]]
+        data = DataFetcher(mock.client, mock.db).process_teams(teams, count=4)
+        assert [[p['gameName'] for p in team] for team in data] == [['Mock0', 'Mock1'], ['Mock1', 'Mock2'], ['Mock0']]
+        assert len(accounts) == 3 and len(listed) == 3
+    finally:
+        mock.close()
+
+
+def _table(db, query):
+    with db.get_conn() as conn:
+        return sorted(conn.execute(query).fetchall())
+
+
+def test_async_matches_sync():
+    """The asyncio fetch path stores the same matches and returns the same player data."""
+    mock = MockSetup(players=3, matches_per_player=6, latency=0.01)
+    async_db = RiotDatabase(os.path.join(mock.root, 'async.db'))
+    async_client = AsyncRiotClient(mock.client, max_in_flight=4)
+    try:
+        sync_data = DataFetcher(mock.client, mock.db).process_team(mock.team, count=6)
+        async_data = DataFetcher(mock.client, async_db, async_client=async_client).process_team(mock.team, count=6)
+        assert async_data == sync_data
+        for query in ('SELECT * FROM matches', 'SELECT match_id, puuid, champion_id, role FROM match_participants',
+                      'SELECT puuid, newest_match_id, depth FROM player_sync',
+                      'SELECT puuid, champion_id, mastery_points FROM player_mastery'):
+            sync_rows = _table(mock.db, query)
+            assert sync_rows and _table(async_db, query) == sync_rows, query
+    finally:
+        async_client.close()
+        async_db.close()
+        mock.close()
+
+
+def test_gather_or_cancel():
+    """Results come back in order; one failure cancels the requests still running."""
+    cancelled = []
+
+    async def slow(value):
+        try:
+            await asyncio.sleep(value)
+            return value
+        except asyncio.CancelledError:
+            cancelled.append(value)
+            raise
+
+    async def failing():
+        raise ValueError("boom")
+
+    assert asyncio.run(gather_or_cancel([slow(0.02), slow(0.01)])) == [0.02, 0.01]
+    try:
+        asyncio.run(gather_or_cancel([slow(5), failing()]))
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert cancelled == [5]
+
+
+def test_archive_and_rebuild():
+    """Archived matches are never re-fetched, and rebuild_from_archive re-derives the tables offline."""
+    mock = MockSetup(players=2, matches_per_player=5)
+    archive = MatchArchive(os.path.join(mock.root, 'archive.db'))
+    try:
+        DataFetcher(mock.client, mock.db, archive=archive).process_team(mock.team, count=5)
+        saved = mock.match_count()
+        assert archive.stats()['matches'] >= saved > 0
+
+        # A fresh DB on the same archive needs no detail requests
+        details = mock.count_calls('get_match_details')
+        fresh_db = RiotDatabase(os.path.join(mock.root, 'fresh.db'))
+        DataFetcher(mock.client, fresh_db, archive=archive).process_team(mock.team, count=5)
+        assert details == []
+        assert _table(fresh_db, 'SELECT * FROM participant_stats') == _table(mock.db, 'SELECT * FROM participant_stats')
+
+        # Lost derived rows (e.g. a table added after ingest) come back from the archive
+        with mock.db.get_conn() as conn:
+            conn.execute('DELETE FROM participant_stats')
+            conn.commit()
+        archive.put('MOCK_OTHER', {'metadata': {'matchId': 'MOCK_OTHER'}, 'info': {'queueId': 0}})
+        rebuilt, skipped = DataFetcher(None, mock.db, archive=archive).rebuild_from_archive()
+        assert (rebuilt, skipped) == (saved, archive.stats()['matches'] - saved)
+        assert _table(mock.db, 'SELECT * FROM participant_stats') == _table(fresh_db, 'SELECT * FROM participant_stats')
+        assert mock.match_count() == saved
+        fresh_db.close()
+    finally:
+        archive.close()
+        mock.close()
+
+
+def test_players_fetched_from_their_region():
+    """Mixed-region teams: each player and match is requested from its own routing value."""
+    logging.getLogger().setLevel(logging.WARNING)
+    root = tempfile.mkdtemp()
+    generate_fixtures(root, players=1, matches_per_player=3, platform='euw1')
+    generate_fixtures(root, players=1, matches_per_player=3, platform='na1')
+    mock = MockSetup(root=root, team=[parse_riot_id('Mock0#EUW1@euw1'), parse_riot_id('Mock0#NA1@na1')])
+    requested = []
+    send = mock.client._request
+    def recording(url, endpoint_class):
+        requested.append((endpoint_class, url.split('/')[3]))
+        return send(url, endpoint_class)
+    mock.client._request = recording
+    try:
+        data = DataFetcher(mock.client, mock.db, workers=2).process_team(mock.team, count=3)
+        assert [len(p['pool']) > 0 for p in data] == [True, True]
+        assert {(method, routing) for method, routing in requested if method != 'account'} == {
+            ('mastery', 'euw1'), ('mastery', 'na1'),
+            ('matchlist', 'europe'), ('matchlist', 'americas'),
+            ('match', 'europe'), ('match', 'americas'),
+        }
+        # The platform is stored, so later runs route the player without the @suffix
+        assert mock.db.get_player('Mock0', 'NA1')[2] == 'na1'
+        assert DataFetcher(mock.client, mock.db)._platform({'name': 'Mock0', 'tag': 'NA1'}) == 'na1'
+    finally:
+        mock.close()
+
+
+def test_progress_callback():
+    """Progress reports every player, then every new match, each counting up to its total."""
+    mock = MockSetup(players=2, matches_per_player=3, shared=0)
+    events = []
+    try:
+        DataFetcher(mock.client, mock.db, progress=lambda *event: events.append(event)).process_team(mock.team, count=3)
+        assert [e for e in events if e[0] == 'players'] == [('players', 1, 2), ('players', 2, 2)]
+        assert sorted(e for e in events if e[0] == 'matches') == [('matches', i, 6) for i in range(1, 7)]
+    finally:
+        mock.close()
+
+
+if __name__ == "__main__":
+    test_match_details_fetched_concurrently()
+    test_incremental_sync()
+    test_process_teams_shares_players()
+    test_async_matches_sync()
+    test_gather_or_cancel()
+    test_archive_and_rebuild()
+    test_players_fetched_from_their_region()
+    test_progress_callback()
+    print("OK")
@@ -0,0 +1,232 @@
+import os
+import sys
+import sqlite3
+import logging
+import tempfile
+import threading
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import RiotDatabase
+from src.migrations import SCHEMA_VERSION, apply_migrations, get_version
+
+# Checks RiotDatabase against throwaway DB files:
+#   python riot/ext_utils/test_database.py   (or pytest riot/ext_utils/test_database.py)
+
+DAY_MS = 24 * 3600 * 1000
+
+
+def _db():
+    logging.getLogger().setLevel(logging.WARNING)
+    return RiotDatabase(os.path.join(tempfile.mkdtemp(), 'scout.db'))
+
+
+def _match(match_id, participants, created=None, queue=420):
+    """Minimal Match-V5 payload. participants: [(puuid, champion_id, role), ...]"""
+    info = {
+        'queueId': queue, 'gameMode': 'CLASSIC', 'gameVersion': '15.23.1', 'gameDuration': 1800,
+        'participants': [{'puuid': puuid, 'championId': c_id, 'win': True, 'teamId': 100, 'teamPosition': role}
+                         for puuid, c_id, role in participants],
+    }
+    if created is not None:
+        info['gameCreation'] = created
+    return {'metadata': {'matchId': match_id}, 'info': info}
+
+
+def test_playstyle_profiles_without_timestamps():
+    """A match with no gameCreation must not break the decay weight for the whole report."""
+    db = _db()
+    db.save_player('p1', 'One', 'EUW')
+    db.save_matches_batch([
+        _match('EUW1_1', [('p1', 1, 'TOP')], created=1_700_000_000_000),
+        _match('EUW1_2', [('p1', 2, 'TOP')]),
+    ])
+
+    profile = db.get_playstyle_profiles(['p1'], now=1_700_000_000)['p1']
+    assert profile['games'] == 2
+    # Both games weigh 1: one is brand new, the other has no timestamp
+    assert abs(profile['recent_versatility'] - 1.0) < 1e-9
+
+
+def test_playstyle_profiles_decay():
+    """Plain and time-decayed metrics over every recorded game, against hand-computed values."""
+    db = _db()
+    now = 1_700_000_000
+    now_ms = now * 1000
+    db.save_player('p1', 'One', 'EUW')
+    # Comfort (depth 2) = champions 1 and 2; champion 3 has less mastery
+    db.save_mastery('p1', [
+        {'championId': 1, 'championPoints': 900, 'championLevel': 7},
+        {'championId': 2, 'championPoints': 800, 'championLevel': 7},
+        {'championId': 3, 'championPoints': 100, 'championLevel': 2},
+    ])
+    # Half-life 30 days: weights 1, 0.5, 0.25, 1
+    db.save_matches_batch([
+        _match('EUW1_1', [('p1', 1, 'TOP')], created=now_ms),
+        _match('EUW1_2', [('p1', 1, 'TOP')], created=now_ms - 30 * DAY_MS),
+        _match('EUW1_3', [('p1', 2, 'JUNGLE')], created=now_ms - 60 * DAY_MS),
+        _match('EUW1_4', [('p1', 3, 'TOP')], created=now_ms),
+    ])
+
+    profile = db.get_playstyle_profiles(['p1'], now=now, half_life_days=30, comfort_depth=2)['p1']
+    assert (profile['games'], profile['champions'], profile['comfort_games']) == (4, 3, 3)
+    # 3 champions / 4 games; 3 of 4 games on comfort picks
+    assert abs(profile['versatility'] - 0.75) < 1e-9
+    assert abs(profile['comfort_percent'] - 75.0) < 1e-9
+    # Latest game per champion (1 + 0.25 + 1) over all weight (1 + 0.5 + 0.25 + 1)
+    assert abs(profile['recent_versatility'] - 2.25 / 2.75) < 1e-9
+    # Comfort weight (1 + 0.5 + 0.25) over all weight
+    assert abs(profile['recent_comfort_percent'] - 1.75 / 2.75 * 100) < 1e-9
+    assert profile['most_played'][0] == (1, 2)
+    assert profile['lanes'] == [('TOP', 3), ('JUNGLE', 1)]
+
+
+def test_thread_connections():
+    """One long-lived WAL connection per thread, closed on release_thread_conn."""
+    db = _db()
+    with db.get_conn() as first, db.get_conn() as second:
+        assert first is second
+        assert first.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    other = []
+    def worker():
+        with db.get_conn() as conn:
+            other.append(conn)
+        db.release_thread_conn()
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+    assert other[0] not in db._conns
+
+    # A failed write rolls back, leaving the shared connection usable
+    try:
+        with db.get_conn() as conn:
+            conn.execute("INSERT INTO players (puuid) VALUES ('p1')")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    with db.get_conn() as conn:
+        assert not conn.in_transaction
+        assert conn.execute('SELECT COUNT(*) FROM players').fetchone()[0] == 0
+
+
+def test_batch_ingest_is_idempotent():
+    """Batches split across transactions; re-ingesting the same matches adds no rows."""
+    db = _db()
+    matches = [_match(f'EUW1_{i}', [('p1', 1, 'TOP'), ('p2', 2, 'MIDDLE')], created=i) for i in range(5)]
+    assert db.save_matches_batch(iter(matches), batch_size=2) == 5
+    db.save_matches_batch(matches[:3], batch_size=2)
+    db.save_match_details(matches[0])
+
+    with db.get_conn() as conn:
+        counts = [conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('matches', 'match_participants', 'participant_stats')]
+    assert counts == [5, 10, 10]
+    assert db.get_existing_match_ids(['EUW1_0', 'EUW1_9']) == {'EUW1_0'}
+
+
+def test_migrates_original_schema():
+    """A DB from the original init_db (no role column, duplicate participants) upgrades in place."""
+    logging.getLogger().setLevel(logging.WARNING)
+    path = os.path.join(tempfile.mkdtemp(), 'scout.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE players (puuid TEXT PRIMARY KEY, game_name TEXT, tag_line TEXT, last_updated REAL);
+        CREATE TABLE matches (match_id TEXT PRIMARY KEY, queue_id INTEGER, game_mode TEXT,
+                              game_version TEXT, game_duration INTEGER, timestamp INTEGER);
+        CREATE TABLE match_participants (id INTEGER PRIMARY KEY AUTOINCREMENT, match_id TEXT, puuid TEXT,
+                                         champion_id INTEGER, win BOOLEAN, team_id INTEGER);
+        INSERT INTO players VALUES ('p1', 'One', 'EUW', 1000);
+        INSERT INTO matches VALUES ('EUW1_1', 420, 'CLASSIC', '15.23.1', 1800, 0);
+        INSERT INTO match_participants (match_id, puuid, champion_id, win, team_id) VALUES
+            ('EUW1_1', 'p1', 7, 1, 100), ('EUW1_1', 'p1', 7, 1, 100);
+    ''')
+    conn.commit()
+    conn.close()
+
+    db = RiotDatabase(path)
+    with db.get_conn() as conn:
+        assert get_version(conn) == SCHEMA_VERSION
+        assert conn.execute('SELECT COUNT(*) FROM match_participants').fetchone()[0] == 1
+        assert conn.execute('SELECT games, wins FROM player_champion_stats').fetchall() == [(1, 1)]
+        assert conn.execute('SELECT mastery_at FROM player_refresh').fetchall() == [(1000,)]
+        assert apply_migrations(conn) == []
+
+    # The backfilled aggregates keep following new matches
+    db.save_match_details(_match('EUW1_2', [('p1', 7, 'TOP')]))
+    assert db.get_champion_counts('p1') == [(7, 2, 2)]
+
+
+def test_aggregates_follow_inserts_and_deletes():
+    """Champion and role aggregates are kept in step with match_participants by triggers."""
+    db = _db()
+    db.save_matches_batch([
+        _match('EUW1_1', [('p1', 1, 'TOP')]),
+        _match('EUW1_2', [('p1', 1, 'JUNGLE')]),
+        _match('EUW1_3', [('p1', 2, 'UNKNOWN')]),
+    ])
+    db.save_match_details(_match('EUW1_1', [('p1', 1, 'TOP')])) # Ignored duplicate, no double count
+    assert db.get_champion_counts('p1') == [(1, 2, 2), (2, 1, 1)]
+    assert db.get_role_counts('p1') == {'TOP': 1, 'JUNGLE': 1}
+
+    assert db.delete_matches(['EUW1_1', 'EUW1_3']) == 2
+    assert db.get_champion_counts('p1') == [(1, 1, 1)]
+    assert db.get_role_counts('p1') == {'JUNGLE': 1}
+
+
+def test_participant_stats_and_averages():
+    """Typed stat rows with team-relative shares, averaged per champion for several players at once."""
+    db = _db()
+
+    def player(puuid, c_id, team, kills, deaths, assists, damage):
+        return {'puuid': puuid, 'championId': c_id, 'teamId': team, 'win': team == 100, 'teamPosition': 'TOP',
+                'kills': kills, 'deaths': deaths, 'assists': assists, 'goldEarned': 12000,
+                'totalMinionsKilled': 200, 'neutralMinionsKilled': 40,
+                'totalDamageDealtToChampions': damage, 'visionScore': 30}
+
+    def match(match_id, duration, p1_line):
+        return {'metadata': {'matchId': match_id},
+                'info': {'queueId': 420, 'gameVersion': '15.23.712.2345', 'gameDuration': duration, 'participants': [
+                    player('p1', 1, 100, *p1_line),
+                    player('ally', 2, 100, 6, 2, 4, 10000),
+                    player('p2', 3, 200, 1, 5, 2, 8000),
+                ]}}
+
+    db.save_matches_batch([
+        match('EUW1_1', 1200, (4, 2, 6, 30000)),
+        match('EUW1_2', 1800, (2, 0, 2, 10000)),
+    ])
+    with db.get_conn() as conn:
+        row = conn.execute('''
+            SELECT patch, cs, damage_share, kill_participation FROM participant_stats
+            WHERE match_id = 'EUW1_1' AND puuid = 'p1'
+        ''').fetchone()
+    assert row == ('15.23', 240, 0.75, 1.0)
+
+    averages = db.get_champion_stat_averages(['p1', 'p2', 'nobody'])
+    assert set(averages) == {'p1', 'p2'}
+    p1 = averages['p1'][0]
+    assert (p1['champion_id'], p1['games']) == (1, 2)
+    assert abs(p1['kda'] - 14 / 2) < 1e-9
+    assert abs(p1['cs_per_min'] - 480 * 60 / 3000) < 1e-9
+    assert abs(p1['damage_per_min'] - 40000 * 60 / 3000) < 1e-9
+    assert abs(p1['damage_share'] - (0.75 + 0.5) / 2) < 1e-9
+    assert abs(averages['p2'][0]['kda'] - 6 / 10) < 1e-9
+
+    # limit keeps each player's most played champions
+    db.save_match_details(_match('EUW1_3', [('p1', 9, 'TOP')]))
+    assert [c['champion_id'] for c in db.get_champion_stat_averages(['p1'])['p1']] == [1, 9]
+    assert [c['champion_id'] for c in db.get_champion_stat_averages(['p1'], limit=1)['p1']] == [1]
+
+
+if __name__ == "__main__":
+    test_playstyle_profiles_without_timestamps()
+    test_playstyle_profiles_decay()
+    test_thread_connections()
+    test_batch_ingest_is_idempotent()
+    test_migrates_original_schema()
+    test_aggregates_follow_inserts_and_deletes()
+    test_participant_stats_and_averages()
+    print("OK")
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.match_archive import MatchArchive
+
+# Checks the compressed, content-addressed match archive:
+#   python riot/ext_utils/test_match_archive.py   (or pytest riot/ext_utils/test_match_archive.py)
+
+
+def test_put_get_and_dedupe():
+    archive = MatchArchive(os.path.join(tempfile.mkdtemp(), 'archive.db'))
+    payload = {'metadata': {'matchId': 'EUW1_1'}, 'info': {'queueId': 420, 'participants': [{'puuid': 'p'}] * 10}}
+    assert archive.put('EUW1_1', payload) == 1
+    # Same content under another id (key order doesn't matter) shares the blob
+    reordered = {'info': payload['info'], 'metadata': payload['metadata']}
+    archive.put_many([('EUW1_2', reordered), ('EUW1_3', {'info': {'queueId': 440}})])
+
+    assert archive.get('EUW1_1') == payload
+    assert archive.get('EUW1_9') is None
+    assert set(archive.get_many(['EUW1_1', 'EUW1_3', 'EUW1_9'])) == {'EUW1_1', 'EUW1_3'}
+    assert archive.contains_many(['EUW1_2', 'EUW1_9']) == {'EUW1_2'}
+    assert [mid for mid, _ in archive.iter_matches(batch_size=2)] == ['EUW1_1', 'EUW1_2', 'EUW1_3']
+
+    stats = archive.stats()
+    assert (stats['matches'], stats['blobs']) == (3, 2)
+    assert stats['stored_bytes'] < stats['raw_bytes']
+    archive.close()
+
+
+if __name__ == "__main__":
+    test_put_get_and_dedupe()
+    print("OK")
@@ -0,0 +1,60 @@
+import os
+import sys
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.metrics import Metrics
+
+# Checks the in-process metrics registry and its exports:
+#   python riot/ext_utils/test_metrics.py   (or pytest riot/ext_utils/test_metrics.py)
+
+
+def test_counters_and_histograms():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc('requests_total', method='match')
+    metrics.inc('requests_total', 2, method='match')
+    metrics.inc('requests_total', method='account')
+    for value in (0.05, 0.5, 0.7, 5.0):
+        metrics.observe('latency_seconds', value, host='europe')
+    try:
+        with metrics.timer('latency_seconds', host='americas'):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot['counters']['requests_total'] == [
+        {'labels': {'method': 'account'}, 'value': 1},
+        {'labels': {'method': 'match'}, 'value': 3},
+    ]
+    americas, europe = snapshot['histograms']['latency_seconds']
+    assert americas['count'] == 1 # Timed even though the block raised
+    assert (europe['count'], europe['sum']) == (4, 6.25)
+    assert europe['buckets'] == {'0.1': 1, '1.0': 3}
+    assert (europe['p50'], europe['p95']) == (1.0, float('inf'))
+
+    metrics.reset()
+    assert metrics.snapshot() == {'counters': {}, 'histograms': {}}
+
+
+def test_prometheus_text():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.inc('requests_total', status='200')
+    metrics.observe('latency_seconds', 0.5)
+    assert metrics.to_prometheus().splitlines() == [
+        '# TYPE requests_total counter',
+        'requests_total{status="200"} 1',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{le="0.1"} 0',
+        'latency_seconds_bucket{le="1.0"} 1',
+        'latency_seconds_bucket{le="+Inf"} 1',
+        'latency_seconds_sum 0.5',
+        'latency_seconds_count 1',
+    ]
+
+
+if __name__ == "__main__":
+    test_counters_and_histograms()
+    test_prometheus_text()
+    print("OK")
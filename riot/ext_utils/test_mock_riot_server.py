@@ -0,0 +1,89 @@
+import os
+import sys
+import json
+import tempfile
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mock_riot_server import generate_fixtures, start_server
+
+# Checks the mock Riot API over plain HTTP:
+#   python riot/ext_utils/test_mock_riot_server.py   (or pytest riot/ext_utils/test_mock_riot_server.py)
+
+
+def _get(server, routing, path):
+    """Returns (status, body, headers)."""
+    url = server.base_url.format(routing=routing) + path
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read()), e.headers
+
+
+def test_fixture_routes():
+    root = tempfile.mkdtemp()
+    riot_ids = generate_fixtures(root, players=2, matches_per_player=5, seed=1)
+    assert riot_ids == ['Mock0#MOCK', 'Mock1#MOCK']
+    server = start_server(root, port=0, latency=0, jitter=0)
+    try:
+        # Riot IDs are case-insensitive
+        status, account, _ = _get(server, 'europe', '/riot/account/v1/accounts/by-riot-id/mock0/mock')
+        assert status == 200 and account['gameName'] == 'Mock0'
+        puuid = account['puuid']
+
+        _, mastery, _ = _get(server, 'euw1', f'/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top?count=4')
+        assert len(mastery) == 4
+
+        base = f'/lol/match/v5/matches/by-puuid/{puuid}/ids'
+        _, ids, _ = _get(server, 'europe', base + '?count=20')
+        assert len(ids) == 5
+        assert _get(server, 'europe', base + '?start=2&count=2')[1] == ids[2:4]
+
+        matches = {mid: _get(server, 'europe', f'/lol/match/v5/matches/{mid}')[1] for mid in ids}
+        created = [matches[mid]['info']['gameCreation'] for mid in ids]
+        assert created == sorted(created, reverse=True) # Newest first
+        assert all(puuid in m['metadata']['participants'] for m in matches.values())
+        since = created[1] // 1000
+        assert _get(server, 'europe', base + f'?startTime={since}')[1] == ids[:2]
+        ranked = [mid for mid in ids if matches[mid]['info']['queueId'] == 420]
+        assert _get(server, 'europe', base + '?queue=420')[1] == ranked
+
+        assert _get(server, 'europe', '/lol/match/v5/matches/MOCK_999')[0] == 404
+        assert _get(server, 'europe', '/lol/unknown')[0] == 404
+        assert server.state.stats['404'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_rate_limit_windows():
+    """Method windows are per routing value and method; 429s say which limit was hit."""
+    root = tempfile.mkdtemp()
+    generate_fixtures(root, players=1, matches_per_player=2)
+    server = start_server(root, port=0, latency=0, jitter=0, app_limits=[(100, 60)], method_limits=[(2, 60)])
+    try:
+        path = '/riot/account/v1/accounts/by-riot-id/Mock0/MOCK'
+        assert _get(server, 'europe', path)[0] == 200
+        status, _, headers = _get(server, 'europe', path)
+        assert status == 200
+        assert headers['X-Method-Rate-Limit'] == '2:60' and headers['X-Method-Rate-Limit-Count'] == '2:60'
+        assert headers['X-App-Rate-Limit-Count'] == '2:60'
+
+        status, _, headers = _get(server, 'europe', path)
+        assert status == 429
+        assert headers['X-Rate-Limit-Type'] == 'method' and 0 < int(headers['Retry-After']) <= 60
+        # Other routing values have their own windows
+        assert _get(server, 'americas', path)[0] == 200
+        assert server.state.stats['429'] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    test_fixture_routes()
+    test_rate_limit_windows()
+    print("OK")
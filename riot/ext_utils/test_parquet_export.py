@@ -0,0 +1,82 @@
+import os
+import sys
+import logging
+import tempfile
+
+import pytest
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import RiotDatabase
+from src.parquet_export import ParquetExporter
+
+pa = pytest.importorskip('pyarrow')
+ds = pytest.importorskip('pyarrow.dataset')
+
+# Checks the incremental Parquet export (skipped without pyarrow):
+#   python riot/ext_utils/test_parquet_export.py   (or pytest riot/ext_utils/test_parquet_export.py)
+
+
+def _match(match_id, version, queue, created):
+    return {'metadata': {'matchId': match_id},
+            'info': {'queueId': queue, 'gameMode': 'CLASSIC', 'gameVersion': version, 'gameDuration': 1800,
+                     'gameCreation': created, 'participants': [
+                         {'puuid': f'{match_id}-{slot}', 'championId': slot + 1, 'win': slot < 5,
+                          'teamId': 100 if slot < 5 else 200, 'teamPosition': 'TOP', 'kills': slot}
+                         for slot in range(10)]}}
+
+
+def _read(root, dataset):
+    partitioning = ds.partitioning(pa.schema([('patch', pa.string()), ('queue_id', pa.int32())]), flavor='hive')
+    return ds.dataset(os.path.join(root, dataset), format='parquet', partitioning=partitioning).to_table()
+
+
+def _parts(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root)
+                  for d, _, files in os.walk(root) for f in files if f.startswith('part-'))
+
+
+def test_incremental_export():
+    logging.getLogger().setLevel(logging.WARNING)
+    tmp = tempfile.mkdtemp()
+    db = RiotDatabase(os.path.join(tmp, 'scout.db'))
+    root = os.path.join(tmp, 'export')
+    db.save_matches_batch([
+        _match('EUW1_1', '15.23.712.1', 420, 1000),
+        _match('EUW1_2', '15.23.712.1', 440, 2000),
+        _match('EUW1_3', '15.24.1.1', 420, 3000),
+    ])
+
+    exporter = ParquetExporter(db, root, chunk=2)
+    assert exporter.export_matches() == {'matches': 3, 'match_participants': 30, 'participant_stats': 30}
+    matches = _read(root, 'matches')
+    assert sorted(zip(matches['match_id'].to_pylist(), matches['patch'].to_pylist(),
+                      matches['queue_id'].to_pylist())) == [
+        ('EUW1_1', '15.23', 420), ('EUW1_2', '15.23', 440), ('EUW1_3', '15.24', 420)]
+    stats = _read(root, 'participant_stats').to_pydict()
+    assert sum(stats['kills']) == 3 * sum(range(10)) and stats['win'].count(True) == 15
+    first_parts = _parts(root)
+
+    # Nothing new: no files; a new match: only its rows, in files of a new run
+    assert exporter.export_matches() == {}
+    db.save_match_details(_match('EUW1_4', '15.24.1.1', 420, 4000))
+    assert ParquetExporter(db, root).export_matches()['matches'] == 1
+    new_parts = [p for p in _parts(root) if p not in first_parts]
+    assert len(new_parts) == 3 and len(_read(root, 'matches')) == 4
+    assert {p.rsplit('part-', 1)[1].split('-')[0] for p in new_parts}.isdisjoint(
+        {p.rsplit('part-', 1)[1].split('-')[0] for p in first_parts})
+
+    # Files an interrupted run wrote, but never recorded, are removed
+    orphan = os.path.join(root, 'matches', 'patch=15.24', 'queue_id=420', 'part-1-0000.parquet')
+    with open(orphan, 'wb') as f:
+        f.write(b'partial')
+    exporter.export_matches()
+    assert not os.path.exists(orphan)
+
+    assert exporter.export_snapshots() == {'player_mastery': 0, 'champions': 0}
+
+
+if __name__ == "__main__":
+    test_incremental_export()
+    print("OK")
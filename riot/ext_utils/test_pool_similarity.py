@@ -0,0 +1,96 @@
+import os
+import sys
+import heapq
+import random
+import logging
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import RiotDatabase
+from src.pool_similarity import PoolSimilarity, build_vectors
+
+# Checks that incremental similarity refreshes keep the same cache as full recomputes:
+#   python riot/ext_utils/test_pool_similarity.py   (or pytest riot/ext_utils/test_pool_similarity.py)
+
+NEIGHBORS = 3
+
+
+def _brute_force(db):
+    """Top neighbours of every player from all pairwise dot products."""
+    vectors = build_vectors(*db.get_pool_entries())
+    expected = {}
+    for puuid, row in vectors.items():
+        scores = {}
+        for other, other_row in vectors.items():
+            score = sum(w * other_row.get(c_id, 0.0) for c_id, w in row.items())
+            if other != puuid and score > 0:
+                scores[other] = score
+        expected[puuid] = dict(heapq.nlargest(NEIGHBORS, scores.items(), key=lambda item: (item[1], item[0])))
+    return expected
+
+
+def _assert_cache(db):
+    cache = db.get_similarity_cache()
+    for puuid, neighbors in _brute_force(db).items():
+        cached = cache.get(puuid, {})
+        assert set(cached) == set(neighbors), puuid
+        assert all(abs(cached[n] - score) < 1e-9 for n, score in neighbors.items())
+
+
+def test_incremental_refresh_matches_full():
+    logging.getLogger().setLevel(logging.WARNING)
+    db = RiotDatabase(os.path.join(tempfile.mkdtemp(), 'scout.db'))
+    rng = random.Random(5)
+    players = [f'p{i}' for i in range(12)]
+    match_no = 0
+
+    def play(puuid, games):
+        nonlocal match_no
+        matches = []
+        for _ in range(games):
+            match_no += 1
+            matches.append({'metadata': {'matchId': f'EUW1_{match_no}'},
+                            'info': {'queueId': 420, 'participants': [
+                                {'puuid': puuid, 'championId': rng.randint(1, 15), 'win': True, 'teamPosition': 'TOP'},
+                                {'puuid': 'opponent', 'championId': rng.randint(1, 15), 'win': False}]}})
+        db.save_matches_batch(matches)
+
+    def mastery(puuid):
+        db.save_mastery(puuid, [{'championId': c, 'championPoints': rng.randint(1000, 100000), 'championLevel': 5}
+                                for c in rng.sample(range(1, 15), 3)])
+
+    for puuid in players:
+        db.save_player(puuid, puuid, 'EUW')
+        mastery(puuid)
+        play(puuid, rng.randint(1, 4))
+
+    similarity = PoolSimilarity(db, neighbors=NEIGHBORS)
+    assert similarity.refresh() == len(players) # Everyone starts dirty
+    _assert_cache(db)
+    assert similarity.refresh() == 0
+
+    recomputed = []
+    for step in range(20):
+        puuid = rng.choice(players)
+        if step % 3 == 0:
+            mastery(puuid)
+        else:
+            play(puuid, rng.randint(1, 3))
+        if step % 5 == 0:
+            db.save_player(f'new{step}', 'New', 'EUW')
+            play(f'new{step}', 2)
+        recomputed.append(similarity.refresh())
+        _assert_cache(db)
+    # Single-player changes usually leave most of the cache alone
+    assert 0 < min(recomputed) < len(players)
+
+    # Opponents from match payloads are never flagged or listed
+    assert 'opponent' not in db.get_similarity_cache()
+    assert [n['puuid'] for n in similarity.similar('p0')] == list(_brute_force(db)['p0'])
+
+
+if __name__ == "__main__":
+    test_incremental_refresh_matches_full()
+    print("OK")
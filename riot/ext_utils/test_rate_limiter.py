@@ -0,0 +1,58 @@
+import os
+import sys
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rate_limiter import RateLimiter, parse_limit_header
+
+# Checks RateLimiter budgets without sending requests:
+#   python riot/ext_utils/test_rate_limiter.py   (or pytest riot/ext_utils/test_rate_limiter.py)
+
+
+def test_parse_limit_header():
+    assert parse_limit_header("20:1,100:120") == [(20, 1), (100, 120)]
+    assert parse_limit_header("20:1,bad") == [(20, 1)]
+    assert parse_limit_header(None) == []
+
+
+def test_budgets_per_host_and_method():
+    """The app budget is shared per host; method limits from headers only apply to that method."""
+    limiter = RateLimiter([(2, 60)])
+    assert limiter.try_acquire('europe', 'match') == 0
+    assert limiter.try_acquire('europe', 'match') == 0
+    assert limiter.try_acquire('europe', 'matchlist') > 0
+    assert limiter.try_acquire('euw1', 'mastery') == 0
+
+    limiter.update('euw1', 'mastery', {'X-App-Rate-Limit': '100:60', 'X-Method-Rate-Limit': '2:60',
+                                       'X-Method-Rate-Limit-Count': '1:60'})
+    assert limiter.try_acquire('euw1', 'mastery') == 0
+    assert limiter.try_acquire('euw1', 'mastery') > 0
+    assert limiter.try_acquire('euw1', 'account') == 0
+
+
+def test_update_syncs_server_counts():
+    """Requests reported by the server (other processes on the key) use up our budget too."""
+    limiter = RateLimiter([(5, 60)])
+    limiter.update('europe', 'match', {'X-App-Rate-Limit': '5:60', 'X-App-Rate-Limit-Count': '5:60'})
+    assert limiter.try_acquire('europe', 'match') > 0
+
+
+def test_penalize():
+    """A method 429 only blocks that method; an application 429 blocks the whole host."""
+    limiter = RateLimiter([(100, 1)])
+    limiter.penalize('europe', 'match', 30, limit_type='method')
+    assert 29 < limiter.try_acquire('europe', 'match') <= 30
+    assert limiter.try_acquire('europe', 'matchlist') == 0
+
+    limiter.penalize('europe', 'match', 30, limit_type='application')
+    assert limiter.try_acquire('europe', 'matchlist') > 29
+    assert limiter.try_acquire('euw1', 'mastery') == 0
+
+
+if __name__ == "__main__":
+    test_parse_limit_header()
+    test_budgets_per_host_and_method()
+    test_update_syncs_server_counts()
+    test_penalize()
+    print("OK")
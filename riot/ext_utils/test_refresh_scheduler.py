@@ -0,0 +1,66 @@
+import os
+import sys
+import logging
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import reset_db
+from src.database import RiotDatabase
+from src.refresh_scheduler import RefreshScheduler
+
+# Checks RefreshScheduler planning against a throwaway DB (no API calls):
+#   python riot/ext_utils/test_refresh_scheduler.py   (or pytest riot/ext_utils/test_refresh_scheduler.py)
+
+NOW = 1_700_000_000
+HOUR = 3600
+
+
+def _db(players):
+    """players: {puuid: (mastery_at, matchlist_at)}"""
+    logging.getLogger().setLevel(logging.WARNING)
+    db = RiotDatabase(os.path.join(tempfile.mkdtemp(), 'scout.db'))
+    for puuid, (mastery_at, matchlist_at) in players.items():
+        db.save_player(puuid, puuid, 'EUW')
+        # Accounts are resolved once, long before the refreshes under test
+        with db.get_conn() as conn:
+            conn.execute('UPDATE players SET last_updated = ? WHERE puuid = ?', (NOW - 30 * 24 * HOUR, puuid))
+            conn.commit()
+        if mastery_at:
+            db.mark_refreshed(puuid, mastery_at, mastery=True)
+        if matchlist_at:
+            db.mark_refreshed(puuid, matchlist_at, matchlist=True)
+    return db
+
+
+def test_tracked_players_first():
+    """Equally stale players: the tracked one is planned first and gets the budget."""
+    db = _db({'a': (NOW, NOW - 4 * HOUR), 'b': (NOW, NOW - 4 * HOUR)})
+    intervals = {'mastery': 24 * HOUR, 'matchlist': 2 * HOUR}
+
+    tasks = RefreshScheduler(None, db, intervals=intervals, tracked=lambda: ['b']).due_tasks(NOW)
+    assert [(t.puuid, t.kind) for t in tasks] == [('b', 'matchlist'), ('a', 'matchlist')]
+    assert tasks[0].priority == 10 * tasks[1].priority
+
+    # No recent games: one matchlist request each, so a budget of 1 only covers the tracked player
+    assert [t.cost for t in tasks] == [1, 1]
+    plan = RefreshScheduler(None, db, intervals=intervals, budget=1, tracked=lambda: ['b']).plan(NOW)
+    assert [t.puuid for t in plan] == ['b']
+
+
+def test_reset_makes_players_due():
+    """After reset_db wipes the matches, the scheduler must not treat the players as fresh."""
+    db = _db({'a': (NOW, NOW)})
+    assert RefreshScheduler(None, db).due_tasks(NOW) == []
+
+    reset_db.DB_PATH = db.db_path
+    reset_db.reset_db()
+    assert {t.kind for t in RefreshScheduler(None, db).due_tasks(NOW)} == {'mastery', 'matchlist'}
+
+
+if __name__ == "__main__":
+    test_tracked_players_first()
+    test_reset_makes_players_due()
+    print("OK")
@@ -0,0 +1,35 @@
+import os
+import sys
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.regions import parse_riot_id, platform_of_match, region_for_platform
+
+# Checks Riot ID parsing and platform/region routing helpers:
+#   python riot/ext_utils/test_regions.py   (or pytest riot/ext_utils/test_regions.py)
+
+
+def test_parse_riot_id():
+    assert parse_riot_id(" Faker#KR1@KR ") == {'name': 'Faker', 'tag': 'KR1', 'platform': 'kr'}
+    assert parse_riot_id("Some Name # EUW") == {'name': 'Some Name', 'tag': 'EUW', 'platform': None}
+    # Unknown platforms fall back to the default instead of failing the line
+    assert parse_riot_id("Name#Tag@moon")['platform'] is None
+    assert parse_riot_id("NoTag") is None
+    assert parse_riot_id("#Tag") is None
+
+
+def test_routing():
+    assert platform_of_match('EUW1_7123456') == 'euw1'
+    assert platform_of_match('7123456') is None
+    assert region_for_platform('EUW1') == 'europe'
+    assert region_for_platform('na1') == 'americas'
+    assert region_for_platform('kr') == 'asia'
+    assert region_for_platform(None, default='americas') == 'americas'
+    assert region_for_platform('moon', default='europe') == 'europe'
+
+
+if __name__ == "__main__":
+    test_parse_riot_id()
+    test_routing()
+    print("OK")
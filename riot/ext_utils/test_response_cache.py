@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.response_cache import ResponseCache
+
+# Checks ResponseCache TTLs and purging:
+#   python riot/ext_utils/test_response_cache.py   (or pytest riot/ext_utils/test_response_cache.py)
+
+
+def _age(cache, url, seconds):
+    with cache._conn() as conn:
+        conn.execute('UPDATE responses SET fetched_at = ? WHERE url = ?', (time.time() - seconds, url))
+
+
+def test_ttls_and_purge():
+    path = os.path.join(tempfile.mkdtemp(), 'http_cache.db')
+    cache = ResponseCache(path)
+    cache.store('/match', 'match', {'id': 1}, {'ETag': '"m"'})
+    cache.store('/matchlist', 'matchlist', [1], {'ETag': '"l"'})
+    cache.store('/account', 'account', {'puuid': 'p'}, {})
+    year = 365 * 24 * 3600
+    _age(cache, '/match', year)
+    _age(cache, '/matchlist', 3600)
+
+    # Match details never go stale; an old matchlist is stale but still revalidatable
+    assert cache.lookup('/match', 'match')[1] is True
+    data, fresh, validators = cache.lookup('/matchlist', 'matchlist')
+    assert data == [1] and not fresh and validators == {'If-None-Match': '"l"'}
+
+    # Purged at most once per interval, and never the immutable match entries
+    assert cache.purge_if_due() == 0
+    with cache._conn() as conn:
+        conn.execute("UPDATE cache_meta SET value = value - 2 * 24 * 3600")
+    reopened = ResponseCache(path)
+    assert reopened.lookup('/matchlist', 'matchlist') is None
+    assert reopened.lookup('/match', 'match') is not None
+    assert reopened.lookup('/account', 'account') is not None
+
+
+if __name__ == "__main__":
+    test_ttls_and_purge()
+    print("OK")
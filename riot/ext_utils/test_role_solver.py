@@ -0,0 +1,72 @@
+import os
+import sys
+import heapq
+import random
+import logging
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analyzer import Analyzer
+from src.database import RiotDatabase
+from src.role_solver import solve_roles, _permutations
+
+# Checks the exact role solver and the analyzer's role options:
+#   python riot/ext_utils/test_role_solver.py   (or pytest riot/ext_utils/test_role_solver.py)
+
+
+def _brute_force(weights, k):
+    """Every assignment of distinct players to the roles, best k (ties: lowest player tuple)."""
+    def candidates():
+        for players in _permutations(len(weights), len(weights[0])):
+            yield sum(weights[p][role] for role, p in enumerate(players)), players
+    return [(score, dict(enumerate(players))) for score, players in heapq.nlargest(k, candidates(), key=lambda c: c[0])]
+
+
+def test_dp_matches_brute_force():
+    """Larger lobbies use the DP; results and tie order must equal full enumeration."""
+    rng = random.Random(1)
+    for _ in range(100):
+        n_players, k = rng.randint(6, 8), rng.randint(1, 5)
+        # Many zeros and repeated values, so ties are common
+        weights = [[rng.choice([0, 0, 0.25, 0.5, 1.0, rng.random()]) for _ in range(5)] for _ in range(n_players)]
+        assert solve_roles(weights, k) == _brute_force(weights, k)
+
+
+def test_small_teams():
+    weights = [[0.0, 1.0], [1.0, 0.0]]
+    assert solve_roles(weights, k=2) == [(2.0, {1: 0, 0: 1}), (0.0, {0: 0, 1: 1})]
+    # Fewer players than roles: the rest stay unfilled
+    assert solve_roles([[0.2, 0.8, 0.0]]) == [(0.8, {1: 0})]
+    assert solve_roles([]) == []
+
+
+def test_options_skip_autofill_reshuffles():
+    """Swapping two autofilled players between roles is the same setup and listed once."""
+    logging.getLogger().setLevel(logging.WARNING)
+    db = RiotDatabase(os.path.join(tempfile.mkdtemp(), 'scout.db'))
+    roles = ['TOP', 'JUNGLE', 'MIDDLE', None, None]
+    db.save_matches_batch([
+        {'metadata': {'matchId': f'EUW1_{i}'},
+         'info': {'queueId': 420, 'participants': [{'puuid': f'p{i}', 'championId': 1, 'win': True,
+                                                    'teamPosition': role or 'UNKNOWN'}]}}
+        for i, role in enumerate(roles)
+    ])
+    team = [{'puuid': f'p{i}', 'gameName': f'P{i}'} for i in range(5)]
+
+    options, warnings = Analyzer(db).rank_role_assignments(team, k=3)
+    assert len(options) == 3
+    assert [o['score'] for o in options] == [3.0, 2.0, 2.0]
+    assert options[0]['structure'] == {'TOP': 'P0', 'JUNGLE': 'P1', 'MIDDLE': 'P2',
+                                       'BOTTOM': 'P3 (Autofill)', 'UTILITY': 'P4 (Autofill)'}
+    assert len(warnings) == 2
+    keys = [tuple(name for name in o['structure'].values() if 'Autofill' not in name) for o in options]
+    assert len(set(keys)) == 3
+
+
+if __name__ == "__main__":
+    test_dp_matches_brute_force()
+    test_small_teams()
+    test_options_skip_autofill_reshuffles()
+    print("OK")
@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import random
+import logging
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.champion_catalog import ChampionCatalog
+from src.config import ROLE_ORDER
+from src.database import RiotDatabase
+from src.roster_optimizer import RosterOptimizer
+
+# Checks RosterOptimizer on a small synthetic catalog and throwaway DB:
+#   python riot/ext_utils/test_roster_optimizer.py   (or pytest riot/ext_utils/test_roster_optimizer.py)
+
+CLASSES = ['Fighter', 'Tank', 'Mage', 'Assassin', 'Marksman', 'Support']
+
+
+def _catalog(root):
+    """20 champions; the first few have curated subclasses that must map onto the DataDragon classes."""
+    champions = {'data': {f'C{c}': {'key': str(c), 'name': f'C{c}', 'tags': [CLASSES[c % 6]]} for c in range(1, 21)}}
+    attributes = {'_comment': 'test', '1': {'class': 'Enchanter', 'dmg_type': 'Magic'},
+                  '2': {'class': 'Juggernaut', 'dmg_type': 'Physical'}, '3': {'class': 'Unknown Subclass'}}
+    for name, data in (('champions.json', champions), ('attributes.json', attributes)):
+        with open(os.path.join(root, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+    return ChampionCatalog.build(champions_path=os.path.join(root, 'champions.json'),
+                                 attributes_path=os.path.join(root, 'attributes.json'))
+
+
+def test_class_families():
+    catalog = _catalog(tempfile.mkdtemp())
+    assert catalog.get_class(1) == 'Support'    # Enchanter
+    assert catalog.get_class(2) == 'Fighter'    # Juggernaut
+    assert catalog.get_class(3) == 'Assassin'   # Unmapped subclass: primary tag
+    assert catalog.get_class(4) == 'Marksman'   # No curated attributes
+    assert catalog.get_class(99) is None
+
+
+def test_pruning_keeps_the_best_rosters():
+    """The top-n search (with pruning) returns the head of the full ranking."""
+    logging.getLogger().setLevel(logging.WARNING)
+    root = tempfile.mkdtemp()
+    db = RiotDatabase(os.path.join(root, 'scout.db'))
+    rng = random.Random(3)
+    players = []
+    matches = []
+    for i in range(8):
+        puuid = f'p{i}'
+        players.append({'puuid': puuid, 'gameName': f'P{i}', 'pool': set(rng.sample(range(1, 21), 6))})
+        for g in range(rng.randint(1, 6)):
+            matches.append({'metadata': {'matchId': f'EUW1_{i}_{g}'},
+                            'info': {'queueId': 420, 'participants': [
+                                {'puuid': puuid, 'championId': 1, 'win': True,
+                                 'teamPosition': rng.choice(ROLE_ORDER)}]}})
+    db.save_matches_batch(matches)
+
+    optimizer = RosterOptimizer(db, catalog=_catalog(root))
+    ranked = optimizer.best_rosters(players, size=5, top_n=56) # C(8, 5): every roster
+    assert len(ranked) == 56
+    assert [r['score'] for r in ranked] == sorted((r['score'] for r in ranked), reverse=True)
+    best = optimizer.best_rosters(players, size=5, top_n=3)
+    assert [r['players'] for r in best] == [r['players'] for r in ranked[:3]]
+    assert set(best[0]['structure']) == set(ROLE_ORDER)
+    assert set(best[0]['structure'].values()) == set(best[0]['players'])
+    assert optimizer.best_rosters(players[:4], size=5) == []
+
+
+if __name__ == "__main__":
+    test_class_families()
+    test_pruning_keeps_the_best_rosters()
+    print("OK")
@@ -0,0 +1,42 @@
+import os
+import sys
+import tempfile
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scout import load_batch
+
+# Checks the batch file loading in scout.py:
+#   python riot/ext_utils/test_scout.py   (or pytest riot/ext_utils/test_scout.py)
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_load_batch():
+    """A directory loads every *.txt team; a manifest resolves relative paths and skips empty teams."""
+    root = tempfile.mkdtemp()
+    teams_dir = os.path.join(root, 'teams')
+    os.mkdir(teams_dir)
+    _write(os.path.join(teams_dir, 'b.txt'), "Two#EUW\n")
+    _write(os.path.join(teams_dir, 'a.txt'), "# comment\nOne#EUW\nThree#NA1@na1\n")
+    _write(os.path.join(teams_dir, 'empty.txt'), "# nobody yet\n")
+    _write(os.path.join(teams_dir, 'notes.md'), "Four#EUW\n")
+
+    batch = load_batch(teams_dir)
+    assert [label for label, _ in batch] == ['a', 'b']
+    assert [m['name'] for m in batch[0][1]] == ['One', 'Three']
+    assert batch[0][1][1]['platform'] == 'na1'
+
+    manifest = os.path.join(root, 'batch.txt')
+    _write(manifest, f"# teams\nteams/b.txt\n{os.path.join(teams_dir, 'a.txt')}\nteams/missing.txt\n")
+    assert [label for label, _ in load_batch(manifest)] == ['b', 'a']
+    assert load_batch(os.path.join(root, 'nope')) == []
+
+
+if __name__ == "__main__":
+    test_load_batch()
+    print("OK")
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
+# Create absolute path to the riot package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from scout_service import ScoutService, serve
+from src.api_client import RiotClient
+from src.database import RiotDatabase
+from src.match_archive import MatchArchive
+from src.rate_limiter import RateLimiter
+from mock_riot_server import generate_fixtures, start_server
+
+# Checks ScoutService and its HTTP API against the mock server and a throwaway DB:
+#   python riot/ext_utils/test_scout_service.py   (or pytest riot/ext_utils/test_scout_service.py)
+
+
+def _service():
+    logging.getLogger().setLevel(logging.WARNING)
+    root = tempfile.mkdtemp()
+    riot_ids = generate_fixtures(root, players=3, matches_per_player=4)
+    server = start_server(root, port=0, latency=0, jitter=0)
+    client = RiotClient(api_key='RGAPI-mock', base_url=server.base_url, use_cache=False,
+                        rate_limiter=RateLimiter([(1000, 1)]))
+    service = ScoutService(count=4, db=RiotDatabase(os.path.join(root, 'scout.db')), client=client,
+                           archive=MatchArchive(os.path.join(root, 'archive.db')))
+    return service, server, riot_ids
+
+
+def _post(base_url, path, body):
+    request = urllib.request.Request(base_url + path, data=json.dumps(body).encode('utf-8'), method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_players_data_fetches_only_unknown_players():
+    service, server, riot_ids = _service()
+    fetched = []
+    process_team = service.fetcher.process_team
+    def counting(members, count):
+        fetched.append(members)
+        return process_team(members, count)
+    service.fetcher.process_team = counting
+    try:
+        first = service.players_data(riot_ids[:2])
+        assert len(fetched) == 1 and all(p['pool'] for p in first)
+        # Known players are answered from the DB
+        again = service.players_data([riot_id.lower() for riot_id in riot_ids[:2]])
+        assert len(fetched) == 1
+        assert [(p['puuid'], p['pool']) for p in again] == [(p['puuid'], p['pool']) for p in first]
+
+        service.players_data(riot_ids[:2], refresh=True)
+        assert len(fetched) == 2
+        with service.db.get_conn() as conn:
+            counts = conn.execute('SELECT query_count FROM player_refresh ORDER BY puuid').fetchall()
+        assert counts[:2] == [(3,), (3,)]
+        assert sorted(service.tracked_puuids()) == sorted(p['puuid'] for p in first)
+        try:
+            service.players_data(['NoTag'])
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    finally:
+        service.stop()
+        server.shutdown()
+        server.server_close()
+
+
+def test_http_api():
+    """Queries over HTTP; each handler thread's DB connection is closed with it."""
+    service, mock, riot_ids = _service()
+    http = serve(service, host='127.0.0.1', port=0)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{http.server_address[1]}"
+    try:
+        status, analysis = _post(base_url, '/analyze', {'players': riot_ids})
+        assert status == 200 and 'role_coverage' in analysis
+        for _ in range(5):
+            assert _post(base_url, '/rankings', {'players': riot_ids[:1]})[0] == 200
+        assert _post(base_url, '/analyze', {'players': ['NoTag']})[0] == 400
+        assert _post(base_url, '/nothing', {})[0] == 404
+
+        with urllib.request.urlopen(base_url + '/tracked') as response:
+            assert sorted(json.loads(response.read())) == sorted(riot_ids)
+        with urllib.request.urlopen(base_url + '/health') as response:
+            assert json.loads(response.read())['can_fetch'] is True
+        # Handler threads close their connection in finish(), just after the response is sent
+        deadline = time.time() + 2
+        while len(service.db._conns) > 1 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(service.db._conns) <= 1
+    finally:
+        http.shutdown()
+        http.server_close()
+        service.stop()
+        mock.shutdown()
+        mock.server_close()
+
+
+if __name__ == "__main__":
+    test_players_data_fetches_only_unknown_players()
+    test_http_api()
+    print("OK")
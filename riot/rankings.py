@@ -6,12 +6,21 @@ from collections import Counter
 from src.database import RiotDatabase
 from src.data_fetcher import DataFetcher
 from src.api_client import RiotClient
+from src.champion_catalog import get_catalog
+from src.pool_similarity import PoolSimilarity
+from src.regions import parse_riot_id
 from src.config import TEAM_FILE_PATH, ROLE_DISPLAY_MAP
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Profile of a player with no recorded games or mastery
+EMPTY_PROFILE = {
+    'games': 0, 'champions': 0, 'comfort_games': 0, 'versatility': 0.0, 'recent_versatility': 0.0,
+    'comfort_percent': 0.0, 'recent_comfort_percent': 0.0, 'mastery': [], 'most_played': [], 'lanes': [],
+}
+
 # Reusing load logic from scout.py
 def load_team_from_file(path):
     team = []
@@ -24,63 +33,154 @@ def load_team_from_file(path):
             line = line.strip()
             if not line or line.startswith("#"):
                 continue
-            if "#" in line:
-                name, tag = line.split("#", 1)
-                team.append({"name": name.strip(), "tag": tag.strip()})
+            member = parse_riot_id(line)
+            if member:
+                team.append(member)
             else:
-                print(f"Skipping invalid line: {line} (Must be Name#Tag)")
+                print(f"Skipping invalid line: {line} (Must be Name#Tag or Name#Tag@platform)")
     return team
 
-def get_player_stats(db, puuid):
+def build_player_rankings(db, catalog, players):
     """
-    Returns:
-      - top_mastery: List of (champion_id, points)
-      - recent_counts: List of (champion_id, count)
-      - role_counts: Counter of roles (e.g. {'MIDDLE': 5, 'TOP': 2})
+    Playstyle profiles for many players, from the DB only (no API calls).
+    All metrics come from one set-based query (see RiotDatabase.get_playstyle_profiles),
+    so a full roster costs the same round trips as a single player.
+    Shared by main() and scout_service.py.
+    players: [(puuid, name), ...]
+    Returns: list of dicts with style, versatility, comfort, lanes, tags, mastery, most played
+    and per-champion performance.
     """
-    with db.get_conn() as conn:
-        cursor = conn.cursor()
-        
-        # 1. Top Mastery (Limit 5)
-        cursor.execute('''
-            SELECT champion_id, mastery_points 
-            FROM player_mastery 
-            WHERE puuid = ? 
-            ORDER BY mastery_points DESC 
-            LIMIT 5
-        ''', (puuid,))
-        mastery = cursor.fetchall()
-        
-        # 2. Recent Match Frequency & Roles
-        # Gracefully handle if 'role' column missing (old DB)
-        try:
-            cursor.execute('''
-                SELECT champion_id, role 
-                FROM match_participants 
-                WHERE puuid = ?
-            ''', (puuid,))
-            rows = cursor.fetchall()
-            
-            # rows = [(cid, role), ...]
-            champ_ids = [r[0] for r in rows]
-            roles = [r[1] for r in rows if r[1] and r[1] != 'UNKNOWN'] 
-            
-            recent = Counter(champ_ids).most_common(5)
-            role_dist = Counter(roles)
-            
-            return mastery, recent, role_dist
-            
-        except Exception as e:
-            logger.warning(f"Could not fetch roles (DB schema outdated?): {e}")
-            # Fallback to old query
-            cursor.execute('SELECT champion_id FROM match_participants WHERE puuid = ?', (puuid,))
-            rows = cursor.fetchall()
-            recent = Counter([r[0] for r in rows]).most_common(5)
-            return mastery, recent, Counter()
+    puuids = [puuid for puuid, _ in players]
+    profiles = db.get_playstyle_profiles(puuids)
+    # KDA, CS, damage share etc. on each player's most played champions (participant_stats)
+    stat_averages = db.get_champion_stat_averages(puuids, limit=3)
+
+    # Batch resolve names & tags (in-memory catalog)
+    all_ids = {c_id for p in profiles.values() for c_id, _ in p['mastery'] + p['most_played']}
+    all_ids.update(s['champion_id'] for stats in stat_averages.values() for s in stats)
+    champ_info = catalog.batch(all_ids)
+
+    rankings = []
+    for puuid, name in players:
+        profile = profiles.get(puuid, EMPTY_PROFILE)
+        total_games = profile['games']
+        versatility = profile['versatility']
+
+        # Labeling
+        if total_games < 5:
+            style_label = "Insufficient Data"
+        elif versatility < 0.3:
+            style_label = "Stable / One-Trick"
+        elif versatility > 0.6:
+            style_label = "Versatile / Fill"
+        else:
+            style_label = "Flexible Pool"
+
+        # Role Preference (Tags) of the most played champions
+        tag_counts = Counter()
+        for c_id, count in profile['most_played']:
+            for tag in champ_info.get(c_id, {}).get('tags', []):
+                tag_counts[tag] += count
+
+        rankings.append({
+            'name': name,
+            'puuid': puuid,
+            'style': style_label,
+            'versatility': versatility,
+            'recent_versatility': profile['recent_versatility'],
+            'comfort_percent': profile['comfort_percent'],
+            'recent_comfort_percent': profile['recent_comfort_percent'],
+            'comfort_games': profile['comfort_games'],
+            'total_games': total_games,
+            'lanes': profile['lanes'],
+            'top_tags': tag_counts.most_common(3),
+            'mastery': [{'champion_id': c_id, 'name': champ_info.get(c_id, {}).get('name', str(c_id)), 'points': points}
+                        for c_id, points in profile['mastery']],
+            'most_played': [{'champion_id': c_id, 'name': champ_info.get(c_id, {}).get('name', str(c_id)),
+                             'tags': champ_info.get(c_id, {}).get('tags', []), 'games': count}
+                            for c_id, count in profile['most_played']],
+            'champion_stats': [dict(s, name=champ_info.get(s['champion_id'], {}).get('name', str(s['champion_id'])))
+                               for s in stat_averages.get(puuid, [])],
+        })
+    return rankings
+
+def build_player_ranking(db, catalog, puuid, name):
+    """Playstyle profile for one player. See build_player_rankings."""
+    return build_player_rankings(db, catalog, [(puuid, name)])[0]
+
+def print_player_ranking(ranking):
+    print(f"\nPlayer: {ranking['name']}")
+    print(f"  [Playstyle Profile]")
+    print(f"    - Style: {ranking['style']} (Versatility: {ranking['versatility']:.2f}, "
+          f"recent-weighted {ranking['recent_versatility']:.2f})")
+    print(f"    - Comfort Picks: {ranking['comfort_percent']:.0f}% of recorded games "
+          f"({ranking['comfort_games']}/{ranking['total_games']}), "
+          f"{ranking['recent_comfort_percent']:.0f}% recent-weighted")
+
+    # Display Lanes if available
+    if ranking['lanes']:
+        # Map API terms to Display terms
+        lane_str = ", ".join([f"{ROLE_DISPLAY_MAP.get(r, r)} ({c})" for r, c in ranking['lanes']])
+        print(f"    - Lanes Played: {lane_str}")
+
+    if ranking['top_tags']:
+        tag_str = ", ".join([f"{t} ({c})" for t, c in ranking['top_tags']])
+        print(f"    - Preferred Roles: {tag_str}")
+
+    print("  [Top 5 Mastery]")
+    for champ in ranking['mastery']:
+        print(f"    - {champ['name']:<15} ({champ['points']:,} pts)")
+
+    print("  [Most Played (Recorded Games)]")
+    if ranking['most_played']:
+        for champ in ranking['most_played']:
+            # Add Tags to recent list for context
+            tags = ",".join(champ['tags'][:1]) # Just primary tag
+            print(f"    - {champ['name']:<15} [{tags}] ({champ['games']} games)")
+    else:
+        print("    - No recent matches found.")
+
+    if ranking['champion_stats']:
+        print("  [Champion Performance (Recorded Games)]")
+        for s in ranking['champion_stats']:
+            print(f"    - {s['name']:<15} {s['games']:>3} games  KDA {s['kda'] or 0:.2f}  CS/min {s['cs_per_min'] or 0:.1f}  "
+                  f"Dmg share {(s['damage_share'] or 0) * 100:.0f}%  KP {(s['kill_participation'] or 0) * 100:.0f}%")
+
+def print_similar_players(db, catalog, team, limit, full=False):
+    """
+    Nearest neighbours by champion pool among every stored player, from the DB only.
+    High scores across accounts suggest smurfs; lower ones are candidate substitutes.
+    """
+    similarity = PoolSimilarity(db)
+    recomputed = similarity.refresh(full=full)
+    print(f"(Similarity cache: {recomputed} players recomputed)")
+
+    print("\n" + "="*50)
+    print(f"SIMILAR PLAYERS (Champion Pool)")
+    print("="*50)
+
+    for member in team:
+        player = db.get_player(member['name'], member['tag'])
+        print(f"\nPlayer: {member['name']}#{member['tag']}")
+        if not player:
+            print("    - Not in the database yet (run rankings.py without --similar first).")
+            continue
+        db.record_queries([player[0]])
+        pool = db.get_player_pool_champions(player[0])
+        neighbours = similarity.similar(player[0], limit)
+        if not neighbours:
+            print("    - No players with overlapping pools.")
+        for other in neighbours:
+            shared = pool & db.get_player_pool_champions(other['puuid'])
+            names = sorted(catalog.get_name(c_id) for c_id in shared)
+            print(f"    - {other['name']:<25} {other['score']:.2f}  shared: {', '.join(names[:5]) or '-'}")
 
 def main():
     parser = argparse.ArgumentParser(description="Player Champion Rankings")
     parser.add_argument('--file', type=str, help="Path to team file", default=TEAM_FILE_PATH)
+    parser.add_argument('--similar', type=int, nargs='?', const=5, metavar="N",
+                        help="Show the N stored players with the most similar champion pools (no API calls)")
+    parser.add_argument('--full', action="store_true", help="With --similar: recompute the whole similarity cache")
     args = parser.parse_args()
     
     team = load_team_from_file(args.file)
@@ -88,6 +188,12 @@ def main():
         print("No team loaded.")
         return
 
+    if args.similar:
+        db = RiotDatabase()
+        db.init_db()
+        print_similar_players(db, get_catalog(db), team, args.similar, full=args.full)
+        return
+
     # Initialize
     client = RiotClient()
     db = RiotDatabase()
@@ -97,94 +203,18 @@ def main():
     # User said "make a ranking... past 17 matches". 
     # Let's ensure we fetch if missing, reusing fetcher logic is safest.
     fetcher = DataFetcher(client, db)
+    catalog = get_catalog(db)
     print(f"Ensuring data is fresh for {len(team)} players...")
     fetched_data = fetcher.process_team(team) 
     # process_team already updates DB with mastery and recent history
+    db.record_queries([p['puuid'] for p in fetched_data])
 
     print("\n" + "="*50)
     print(f"INDIVIDUAL PLAYER RANKINGS")
     print("="*50)
 
-    for p in fetched_data:
-        name = p['gameName']
-        puuid = p['puuid']
-        
-        mastery, recent, role_dist = get_player_stats(db, puuid)
-        
-        # Batch resolve names & tags
-        all_ids = set([m[0] for m in mastery] + [r[0] for r in recent])
-        champ_info = db.get_champions_batch(all_ids)
-        
-        # --- Advanced Metrics ---
-        # 1. Versatility Score
-        total_games = sum([count for _, count in recent])
-        unique_champs = len(recent)
-        versatility = (unique_champs / total_games) if total_games > 0 else 0
-        
-        # Labeling
-        if total_games < 5:
-            style_label = "Insufficient Data"
-        elif versatility < 0.3:
-            style_label = "Stable / One-Trick"
-        elif versatility > 0.6:
-            style_label = "Versatile / Fill"
-        else:
-            style_label = "Flexible Pool"
-            
-        # 2. Comfort Score (Recent intersection with Top 15 Mastery)
-        # Fetch Top 15 instead of 5 for broader "Comfort" check
-        top_15_ids = set()
-        with db.get_conn() as conn:
-            c = conn.cursor()
-            c.execute('SELECT champion_id FROM player_mastery WHERE puuid = ? ORDER BY mastery_points DESC LIMIT 15', (puuid,))
-            top_15_ids = {r[0] for r in c.fetchall()}
-            
-        recent_comfort_games = sum([count for c_id, count in recent if c_id in top_15_ids])
-        comfort_percent = (recent_comfort_games / total_games * 100) if total_games > 0 else 0
-        
-        # 3. Role Preference (Tags)
-        tag_counts = Counter()
-        for c_id, count in recent:
-            info = champ_info.get(c_id, {})
-            for tag in info.get('tags', []):
-                tag_counts[tag] += count
-        
-        top_tags = tag_counts.most_common(3)
-        
-        # Print Report
-        print(f"\nPlayer: {name}")
-        print(f"  [Playstyle Profile]")
-        print(f"    - Style: {style_label} (Versatility: {versatility:.2f})")
-        print(f"    - Comfort Picks: {comfort_percent:.0f}% of recent games ({recent_comfort_games}/{total_games})")
-        
-        # Display Lanes if available
-        if role_dist:
-            # Sort by count desc
-            sorted_roles = role_dist.most_common()
-            
-            # Map API terms to Display terms
-            lane_str = ", ".join([f"{ROLE_DISPLAY_MAP.get(r, r)} ({c})" for r, c in sorted_roles])
-            print(f"    - Lanes Played: {lane_str}")
-            
-        if top_tags:
-            tag_str = ", ".join([f"{t} ({c})" for t, c in top_tags])
-            print(f"    - Preferred Roles: {tag_str}")
-        
-        print("  [Top 5 Mastery]")
-        for c_id, points in mastery:
-            c_name = champ_info.get(c_id, {}).get('name', str(c_id))
-            print(f"    - {c_name:<15} ({points:,} pts)")
-            
-        print("  [Most Played (Recorded Games)]")
-        if recent:
-            for c_id, count in recent:
-                info = champ_info.get(c_id, {})
-                c_name = info.get('name', str(c_id))
-                # Add Tags to recent list for context
-                tags = ",".join(info.get('tags', [])[:1]) # Just primary tag
-                print(f"    - {c_name:<15} [{tags}] ({count} games)")
-        else:
-            print("    - No recent matches found.")
+    for ranking in build_player_rankings(db, catalog, [(p['puuid'], p['gameName']) for p in fetched_data]):
+        print_player_ranking(ranking)
 
 if __name__ == "__main__":
     main()
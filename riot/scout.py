@@ -5,6 +5,8 @@ from src.data_fetcher import DataFetcher
 from src.database import RiotDatabase
 from src.analyzer import Analyzer
 from src.api_client import RiotClient
+from src.roster_optimizer import RosterOptimizer
+from src.regions import parse_riot_id
 from src.config import TEAM_FILE_PATH, DB_PATH, ROLE_DISPLAY_MAP, ROLE_ORDER
 import logging
 import os
@@ -21,6 +23,7 @@ def load_team_from_file(path):
     """
     Expected format:
     GameName#Tag
+    GameName#Tag@platform   (optional shard, e.g. @euw1, for mixed-region teams)
     """
     team = []
     if not os.path.exists(path):
@@ -32,54 +35,50 @@ def load_team_from_file(path):
             line = line.strip()
             if not line or line.startswith("#"):
                 continue
-            if "#" in line:
-                name, tag = line.split("#", 1)
-                team.append({"name": name.strip(), "tag": tag.strip()})
+            member = parse_riot_id(line)
+            if member:
+                team.append(member)
             else:
-                print(f"Skipping invalid line: {line} (Must be Name#Tag)")
+                print(f"Skipping invalid line: {line} (Must be Name#Tag or Name#Tag@platform)")
     return team
 
-def main():
-    parser = argparse.ArgumentParser(description="League Team Composition Scout")
-    parser.add_argument('--file', type=str, help="Path to text file containing team (Name#Tag per line)")
-    args = parser.parse_args()
-
-
-    team = []
-    if args.file:
-        team = load_team_from_file(args.file)
+def load_batch(path):
+    """
+    Loads several teams for batch scouting.
+    `path` is either a directory (every *.txt file is one team) or a manifest file
+    listing one team file per line (relative paths resolve against the manifest's folder).
+    Returns: [(label, team), ...]
+    """
+    batch_path = Path(path)
+    if batch_path.is_dir():
+        team_files = sorted(batch_path.glob("*.txt"))
+    elif batch_path.is_file():
+        team_files = []
+        with open(batch_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                team_file = Path(line)
+                if not team_file.is_absolute():
+                    team_file = batch_path.parent / team_file
+                team_files.append(team_file)
     else:
-        print("Enter up to 5 Riot IDs (Name#Tag). Type 'done' when finished.")
-        while len(team) < 5:
-            user_input = input(f"Player {len(team)+1} (or 'done'): ").strip()
-            if user_input.lower() == 'done':
-                break
-            if "#" not in user_input:
-                print("Invalid format. Use Name#Tag")
-                continue
-            name, tag = user_input.split("#", 1)
-            team.append({"name": name, "tag": tag})
+        logger.error(f"Batch path not found: {path}")
+        return []
 
-    if not team:
-        print("No players to analyze.")
-        return
+    teams = []
+    for team_file in team_files:
+        team = load_team_from_file(str(team_file))
+        if team:
+            teams.append((team_file.stem, team))
+        else:
+            logger.warning(f"No players loaded from {team_file}, skipping.")
+    return teams
 
-    # Initialize
-    client = RiotClient()
-    db = RiotDatabase()
-    db.init_db()
-    fetcher = DataFetcher(client, db)
-    analyzer = Analyzer(db)
-
-    print(f"\nAnalying {len(team)} players... Data will be cached in {DB_PATH}")
-    players_data = fetcher.process_team(team)
-    
-    # Analyze
-    print("\n--- Composition Analysis ---")
-    analysis = analyzer.analyze_team_composition(players_data)
-    
+def print_report(team_size, analysis):
     # Report
-    print(f"\n[Global Intersection] Champions playable by ALL {len(team)} members:")
+    print(f"\n[Global Intersection] Champions playable by ALL {team_size} members:")
     intersection = analysis.get('enriched_intersection', [])
     if intersection:
         for champ in intersection:
@@ -110,8 +109,8 @@ def main():
         print(f" - {tag} ({len(names)}): {line}")
         
     # Phase 3: Recommended Structure
-    if len(team) < 5:
-        print(f"\n[Recommended Roles (Partial Team: {len(team)})]")
+    if team_size < 5:
+        print(f"\n[Recommended Roles (Partial Team: {team_size})]")
     else:
         print("\n[Recommended Composition]")
     
@@ -124,11 +123,128 @@ def main():
         display_role = ROLE_DISPLAY_MAP.get(role, role)
         print(f" - {display_role:<10}: {player}")
         
+    # Runner-up setups from the role solver
+    alternatives = analysis.get('role_options', [])[1:]
+    if alternatives:
+        best_score = analysis['role_options'][0]['score']
+        print("\n[Alternative Setups]")
+        for option in alternatives:
+            lanes = ", ".join(f"{ROLE_DISPLAY_MAP.get(r, r)}: {option['structure'][r]}" for r in ROLE_ORDER)
+            print(f" - ({option['score'] - best_score:+.2f}) {lanes}")
+
     if warnings:
         print("\n[Viability Warnings]")
         for w in warnings:
             print(f"  {w}")
 
+def run_batch(path):
+    """Scouts every team in a directory/manifest with one shared fetch."""
+    batch = load_batch(path)
+    if not batch:
+        print("No teams to analyze.")
+        return
+
+    # Initialize once for the whole batch
+    client = RiotClient()
+    db = RiotDatabase()
+    fetcher = DataFetcher(client, db)
+    analyzer = Analyzer(db)
+
+    unique_players = {(m['name'].lower(), m['tag'].lower()) for _, team in batch for m in team}
+    print(f"\nBatch scouting {len(batch)} teams ({len(unique_players)} unique players)... Data will be cached in {DB_PATH}")
+    teams_data = fetcher.process_teams([team for _, team in batch])
+    # Every scouted player counts as a query; the refresh scheduler favours frequently queried players
+    db.record_queries({p['puuid'] for players_data in teams_data for p in players_data})
+
+    for (label, team), players_data in zip(batch, teams_data):
+        print("\n" + "=" * 50)
+        print(f"TEAM: {label} ({len(team)} players)")
+        print("=" * 50)
+        analysis = analyzer.analyze_team_composition(players_data)
+        print_report(len(team), analysis)
+
+    print(f"\nDone! Analyzed {len(batch)} teams.")
+
+def run_roster_search(path, top_n):
+    """Finds the best 5-player rosters among the candidates in a team file."""
+    candidates = load_team_from_file(path)
+    if len(candidates) < 5:
+        print(f"Roster search needs at least 5 candidates, got {len(candidates)}.")
+        return
+
+    client = RiotClient()
+    db = RiotDatabase()
+    fetcher = DataFetcher(client, db)
+    optimizer = RosterOptimizer(db)
+
+    print(f"\nSearching rosters among {len(candidates)} candidates... Data will be cached in {DB_PATH}")
+    players_data = fetcher.process_team(candidates)
+    db.record_queries([p['puuid'] for p in players_data])
+    rosters = optimizer.best_rosters(players_data, size=5, top_n=top_n)
+
+    print(f"\n[Top {len(rosters)} Rosters]")
+    for rank, roster in enumerate(rosters, start=1):
+        b = roster['breakdown']
+        print(f"\n#{rank} Score {roster['score']:.3f} (Roles {b['roles']:.2f} | Overlap {b['overlap']:.2f} | Balance {b['balance']:.2f})")
+        for role in ROLE_ORDER:
+            display_role = ROLE_DISPLAY_MAP.get(role, role)
+            print(f" - {display_role:<10}: {roster['structure'][role]}")
+
+    print("\nDone! Roster search complete.")
+
+def main():
+    parser = argparse.ArgumentParser(description="League Team Composition Scout")
+    parser.add_argument('--file', type=str, help="Path to text file containing team (Name#Tag per line)")
+    parser.add_argument('--batch', type=str, help="Directory of team files, or a manifest listing one team file per line")
+    parser.add_argument('--roster', type=int, metavar='N', help="Treat --file as a candidate list and show the top N 5-player rosters")
+    args = parser.parse_args()
+
+    if args.roster:
+        if not args.file:
+            print("--roster requires --file with the candidate players.")
+            return
+        run_roster_search(args.file, args.roster)
+        return
+
+    if args.batch:
+        run_batch(args.batch)
+        return
+
+    team = []
+    if args.file:
+        team = load_team_from_file(args.file)
+    else:
+        print("Enter up to 5 Riot IDs (Name#Tag, optionally @platform). Type 'done' when finished.")
+        while len(team) < 5:
+            user_input = input(f"Player {len(team)+1} (or 'done'): ").strip()
+            if user_input.lower() == 'done':
+                break
+            member = parse_riot_id(user_input)
+            if not member:
+                print("Invalid format. Use Name#Tag")
+                continue
+            team.append(member)
+
+    if not team:
+        print("No players to analyze.")
+        return
+
+    # Initialize
+    client = RiotClient()
+    db = RiotDatabase()
+    db.init_db()
+    fetcher = DataFetcher(client, db)
+    analyzer = Analyzer(db)
+
+    print(f"\nAnalying {len(team)} players... Data will be cached in {DB_PATH}")
+    players_data = fetcher.process_team(team)
+    db.record_queries([p['puuid'] for p in players_data])
+    
+    # Analyze
+    print("\n--- Composition Analysis ---")
+    analysis = analyzer.analyze_team_composition(players_data)
+    print_report(len(team), analysis)
+
     print("\nDone! Analysis complete.")
 
 if __name__ == "__main__":
@@ -0,0 +1,351 @@
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Ensure we can import from src
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.api_client import RiotClient
+from src.async_client import AsyncRiotClient
+from src.data_fetcher import DataFetcher
+from src.database import RiotDatabase
+from src.analyzer import Analyzer
+from src.roster_optimizer import RosterOptimizer
+from src.match_archive import MatchArchive
+from src.champion_catalog import get_catalog
+from src.metrics import get_metrics
+from src.regions import parse_riot_id
+from src.refresh_scheduler import RefreshScheduler
+from src.pool_similarity import PoolSimilarity
+from src.config import SERVICE_HOST, SERVICE_PORT, DEFAULT_MATCH_COUNT, REFRESH_LOOP_SECONDS
+from rankings import build_player_rankings, load_team_from_file
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Long-running scout: DB connections, champion catalog and HTTP pools are created once,
+# stale players are refreshed in the background by the refresh scheduler every
+# REFRESH_LOOP_SECONDS (--interval), and queries are answered over HTTP (or a Unix socket)
+# straight from scout.db. Tracked players (--file, /track and every queried player) get a
+# full refresh at startup and on /refresh; each scheduler cycle covers every stored player
+# but ranks tracked ones first (config.TRACKED_PRIORITY_BOOST), then most-queried and stalest.
+#
+#   python riot/scout_service.py --file riot/team.txt
+#   curl -s localhost:8766/analyze -d '{"players": ["Name#Tag", "Other#EUW@euw1"]}'
+#
+# GET  /health            uptime, tracked players, last refresh
+# GET  /tracked           tracked Riot IDs
+# GET  /metrics           Prometheus text (client, cache, DB and fetcher metrics)
+# POST /analyze           {"players": [...], "refresh": false}  -> team composition
+# POST /rankings          {"players": [...]}                    -> per-player playstyle profiles
+# POST /roster            {"players": [...], "top": 5}          -> best 5-player rosters
+# POST /similar           {"players": [...], "top": 5}          -> stored players with the closest champion pools
+# POST /track             {"players": [...]}                    -> add to background refresh
+# POST /refresh           full refresh of all tracked players now
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class ScoutService:
+    """
+    Warm state shared by all requests. Reads run concurrently (one SQLite connection
+    per handler thread); fetches are serialized so two refreshes never sync the same player.
+    """
+    def __init__(self, count=DEFAULT_MATCH_COUNT, refresh_interval=REFRESH_LOOP_SECONDS, use_async=False,
+                 db=None, client=None, archive=None):
+        """db, client and archive default to the configured ones (e.g. a test passes its own)."""
+        self.db = db or RiotDatabase()
+        self.catalog = get_catalog(self.db)
+        self.analyzer = Analyzer(self.db, self.catalog)
+        self.optimizer = RosterOptimizer(self.db, self.catalog)
+        self.similarity = PoolSimilarity(self.db)
+        self.count = count
+        self.refresh_interval = refresh_interval
+        self.started = time.time()
+        self.last_refresh = None
+
+        # Without a key the service still answers from the DB, it just can't fetch
+        self.client = client
+        if self.client is None:
+            try:
+                self.client = RiotClient()
+            except ValueError as e:
+                logger.warning(f"{e} Running read-only: unknown players can't be fetched.")
+        self.fetcher = None
+        self.scheduler = None
+        if self.client:
+            async_client = AsyncRiotClient(self.client) if use_async else None
+            self.fetcher = DataFetcher(self.client, self.db, async_client=async_client,
+                                       archive=archive or MatchArchive())
+            self.scheduler = RefreshScheduler(self.fetcher, self.db, count=count, tracked=self.tracked_puuids)
+
+        self._tracked = {}  # (name, tag) lowercased -> member
+        self._tracked_lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # --- Players ---
+
+    def track(self, members):
+        with self._tracked_lock:
+            for member in members:
+                self._tracked.setdefault((member['name'].lower(), member['tag'].lower()), member)
+
+    def tracked(self):
+        with self._tracked_lock:
+            return list(self._tracked.values())
+
+    def tracked_puuids(self):
+        """PUUIDs of tracked players already in the DB, for the refresh scheduler."""
+        players = (self.db.get_player(m['name'], m['tag']) for m in self.tracked())
+        return [player[0] for player in players if player]
+
+    def _fetch(self, members):
+        if not self.fetcher:
+            raise RuntimeError("No API key configured; only players already in the DB can be queried")
+        with self._fetch_lock:
+            return self.fetcher.process_team(members, count=self.count)
+
+    def players_data(self, riot_ids, refresh=False):
+        """
+        Resolves Riot IDs to the {'gameName', 'puuid', 'pool'} dicts the analyzers take.
+        Known players are read from the DB; unknown ones (or all, with refresh) are fetched first.
+        """
+        members = []
+        for riot_id in riot_ids:
+            member = parse_riot_id(riot_id)
+            if not member:
+                raise ValueError(f"Invalid Riot ID: {riot_id} (Must be Name#Tag or Name#Tag@platform)")
+            members.append(member)
+        self.track(members)
+
+        known = {}
+        for member in members:
+            player = self.db.get_player(member['name'], member['tag'])
+            if player:
+                known[(member['name'].lower(), member['tag'].lower())] = player[0]
+
+        if refresh or len(known) < len(members):
+            players = self._fetch(members)
+        else:
+            players = [{
+                "gameName": member['name'],
+                "puuid": known[(member['name'].lower(), member['tag'].lower())],
+                "pool": self.db.get_player_pool_champions(known[(member['name'].lower(), member['tag'].lower())])
+            } for member in members]
+        # Only client queries count; the refresh loop's own fetches don't
+        self.db.record_queries([p['puuid'] for p in players])
+        return players
+
+    # --- Queries ---
+
+    def analyze(self, riot_ids, refresh=False):
+        return self.analyzer.analyze_team_composition(self.players_data(riot_ids, refresh))
+
+    def rankings(self, riot_ids, refresh=False):
+        players = self.players_data(riot_ids, refresh)
+        return build_player_rankings(self.db, self.catalog, [(p['puuid'], p['gameName']) for p in players])
+
+    def roster(self, riot_ids, top=5, refresh=False):
+        return self.optimizer.best_rosters(self.players_data(riot_ids, refresh), size=5, top_n=top)
+
+    def similar(self, riot_ids, top=5, refresh=False):
+        return [{'name': p['gameName'], 'puuid': p['puuid'], 'similar': self.similarity.similar(p['puuid'], top)}
+                for p in self.players_data(riot_ids, refresh)]
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'uptime': time.time() - self.started,
+            'tracked': len(self.tracked()),
+            'last_refresh': self.last_refresh,
+            'can_fetch': self.fetcher is not None,
+        }
+
+    # --- Background refresh ---
+
+    def refresh_tracked(self):
+        """Full refresh of every tracked player (also resolves ones not yet in the DB)."""
+        members = self.tracked()
+        if not members or not self.fetcher:
+            return
+        logger.info(f"Refreshing {len(members)} tracked players...")
+        self._fetch(members)
+        self.last_refresh = time.time()
+
+    def refresh_stale(self):
+        """One scheduler cycle: only the stalest data of known players, within the budget."""
+        if not self.scheduler:
+            return []
+        with self._fetch_lock:
+            tasks = self.scheduler.run_once()
+        if tasks:
+            self.last_refresh = time.time()
+        return tasks
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh_stale()
+            except Exception as e:
+                logger.error(f"Background refresh failed: {e}")
+
+    def start_refresh(self):
+        threading.Thread(target=self._refresh_loop, name="scout-refresh", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self.client:
+            self.client.close()
+        self.db.close()
+
+
+class ScoutHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def finish(self):
+        # One thread per connection: close its SQLite connection with it, or every request leaks one
+        try:
+            super().finish()
+        finally:
+            self.server.service.db.release_thread_conn()
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def _send(self, status, body, content_type='application/json'):
+        if content_type == 'application/json':
+            payload = json.dumps(body, default=_json_default).encode('utf-8')
+        else:
+            payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_GET(self):
+        service = self.server.service
+        path = urlparse(self.path).path
+        if path == '/health':
+            return self._send(200, service.health())
+        if path == '/tracked':
+            return self._send(200, [f"{m['name']}#{m['tag']}" for m in service.tracked()])
+        if path == '/metrics':
+            return self._send(200, get_metrics().to_prometheus(), 'text/plain; version=0.0.4')
+        self._send(404, {'error': f'Unknown path {path}'})
+
+    def do_POST(self):
+        service = self.server.service
+        path = urlparse(self.path).path
+        start = time.perf_counter()
+        try:
+            body = self._body()
+            players = body.get('players', [])
+            refresh = bool(body.get('refresh', False))
+            if path == '/analyze':
+                result = service.analyze(players, refresh)
+            elif path == '/rankings':
+                result = service.rankings(players, refresh)
+            elif path == '/roster':
+                result = service.roster(players, int(body.get('top', 5)), refresh)
+            elif path == '/similar':
+                result = service.similar(players, int(body.get('top', 5)), refresh)
+            elif path == '/track':
+                members = [parse_riot_id(p) for p in players]
+                service.track([m for m in members if m])
+                result = {'tracked': len(service.tracked())}
+            elif path == '/refresh':
+                service.refresh_tracked()
+                result = service.health()
+            else:
+                return self._send(404, {'error': f'Unknown path {path}'})
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            return self._send(400, {'error': str(e)})
+        except RuntimeError as e:
+            return self._send(503, {'error': str(e)})
+        except Exception as e:
+            logger.exception(f"Request {path} failed")
+            return self._send(500, {'error': str(e)})
+        finally:
+            get_metrics().observe('riot_service_request_seconds', time.perf_counter() - start, path=path)
+        self._send(200, result)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(service, host=SERVICE_HOST, port=SERVICE_PORT, unix_socket=None):
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, ScoutHandler)
+        where = f"unix:{unix_socket}"
+    else:
+        server = ThreadingHTTPServer((host, port), ScoutHandler)
+        server.daemon_threads = True
+        where = f"http://{host}:{server.server_address[1]}"
+    server.service = service
+    logger.info(f"Scout service listening on {where}")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scout service: warm caches and a local query API")
+    parser.add_argument('--file', type=str, action='append', help="Team file of players to track (repeatable)")
+    parser.add_argument('--host', type=str, default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--socket', type=str, help="Listen on this Unix socket instead of TCP")
+    parser.add_argument('--interval', type=int, default=REFRESH_LOOP_SECONDS, help="Seconds between background refresh scheduler cycles")
+    parser.add_argument('--count', type=int, default=DEFAULT_MATCH_COUNT, help="Recent matches per player")
+    parser.add_argument('--async', dest="use_async", action="store_true", help="Refresh with the asyncio client")
+    args = parser.parse_args()
+
+    if args.socket and not hasattr(socket, 'AF_UNIX'):
+        print("Unix sockets are not supported on this platform.")
+        return
+
+    service = ScoutService(count=args.count, refresh_interval=args.interval, use_async=args.use_async)
+    for path in args.file or []:
+        service.track(load_team_from_file(path))
+
+    server = serve(service, args.host, args.port, args.socket)
+    # Initial refresh in the background so queries are answered immediately (and new players resolved)
+    threading.Thread(target=service.refresh_tracked, name="scout-initial-refresh", daemon=True).start()
+    service.start_refresh()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
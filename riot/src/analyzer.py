@@ -1,14 +1,20 @@
 import json
 import logging
-from collections import Counter
 from pathlib import Path
-from .config import ROLE_ORDER
+from .config import ROLE_ORDER, ROLE_OPTIONS_K
+from .role_solver import preference_matrix, solve_roles
+from .champion_catalog import get_catalog
+from .champion_pool import ChampionIndex, intersect_all, union_all, overlap_matrix, tag_coverage_counts
 
 logger = logging.getLogger(__name__)
 
 class Analyzer:
-    def __init__(self, db):
+    def __init__(self, db, catalog=None):
         self.db = db
+        # Names/tags come from the in-memory catalog, not the DB
+        self.catalog = catalog or get_catalog(db)
+        # Fixed champion-id -> bit index; pools become int bitsets
+        self.index = ChampionIndex(self.catalog.ids)
 
     def analyze_team_composition(self, team_data):
         """
@@ -20,124 +26,103 @@ class Analyzer:
             "pairwise": [],
             "role_coverage": {},
             "structure": {},
+            "role_options": [],
             "viability": []
         }
         
         if not team_data:
             return analysis
+
+        # Encode pools once; everything below is bitwise ops + popcounts
+        masks = [self.index.encode(p['pool']) for p in team_data]
+        combined = union_all(masks)
+
+        # Enrichment: one in-memory batch for every champion involved
+        champ_info = self.catalog.batch(self.index.decode(combined))
             
         # 1. Global Intersection
-        global_pool = team_data[0]['pool'].copy()
-        for member in team_data[1:]:
-            global_pool.intersection_update(member['pool'])
-        analysis['intersection'] = global_pool
-        analysis['enriched_intersection'] = self._enrich_champs(global_pool)
+        global_mask = intersect_all(masks)
+        global_ids = self.index.decode(global_mask)
+        analysis['intersection'] = set(global_ids)
+        analysis['enriched_intersection'] = self._enrich_champs(global_ids, champ_info)
 
         # 2. Pairwise Synergies
-        analysis['pairwise'] = self._analyze_pairwise(team_data)
+        analysis['pairwise'] = self._analyze_pairwise(team_data, masks, champ_info)
 
         # 3. Class (Tag) Coverage
-        analysis['role_coverage'] = self._analyze_tag_coverage(team_data)
+        analysis['role_coverage'] = self._analyze_tag_coverage(combined, champ_info)
         
         # 4. Role Allocation (New Phase 3)
-        structure, warnings = self._assign_roles(team_data)
-        analysis['structure'] = structure
+        options, warnings = self.rank_role_assignments(team_data)
+        if options:
+            analysis['structure'] = options[0]['structure']
+        analysis['role_options'] = options
         analysis['viability'] = warnings
 
         return analysis
 
-    def _assign_roles(self, team_data):
+    def rank_role_assignments(self, team_data, k=ROLE_OPTIONS_K):
         """
-        Attempts to assign each player to a standard role (TOP, JUNGLE, MIDDLE, BOTTOM, UTILITY).
-        Returns: 
-          - structure: {Role: PlayerName}
-          - warnings: List of strings (e.g. "No Jungle Main", "Player X Autofilled")
+        Scores role assignments with the exact solver (see role_solver).
+        Score = sum of each player's play share in their assigned role (max = team size).
+        Ties that only reshuffle autofilled players are the same setup and listed once.
+        Returns:
+          - options: [{'score': float, 'structure': {Role: PlayerName}}, ...] best first
+          - warnings: for the best option
         """
         # 1. Fetch Role Prefs for everyone
-        # Format: [{'name': '...', 'prefs': {'TOP': 10, 'MID': 5}}, ...]
-        player_prefs = []
-        for p in team_data:
-            prefs = self._get_db_role_counts(p['puuid'])
-            
-            player_prefs.append({
-                'name': p['gameName'],
-                'prefs': prefs,
-                'total_games': sum(prefs.values())
-            })
-            
-        # 2. Heuristic Assignment
-        # Standard Roles we need to fill
-        needed_roles = ROLE_ORDER
-        assignments = {} # Role -> Player Name
-        assigned_players = set()
+        role_counts = [self._get_db_role_counts(p['puuid']) for p in team_data]
+        weights = preference_matrix(role_counts)
+
+        # 2. Exact Assignment
+        options = []
         warnings = []
-        
-        # Pass 1: "Main Role" Lock-in
-        potential_assignments = []
-        for p in player_prefs:
-            total = p['total_games']
-            if total == 0:
+        seen = set()
+        # Extra candidates, so duplicates dropped below can still leave k distinct options
+        for score, assignment in solve_roles(weights, k=k * len(ROLE_ORDER)):
+            # Same score with the same players in the roles they actually play
+            placed = (assignment.get(r) for r in range(len(ROLE_ORDER)))
+            key = (round(score, 9), tuple(p if p is not None and weights[p][r] > 0 else None
+                                          for r, p in enumerate(placed)))
+            if key in seen:
                 continue
-            for role, count in p['prefs'].items():
-                if role in needed_roles:
-                    score = (count / total) * 100
-                    potential_assignments.append({
-                        'name': p['name'],
-                        'role': role,
-                        'score': score,
-                        'count': count
-                    })
-                    
-        # Sort by score (preference strength)
-        potential_assignments.sort(key=lambda x: x['score'], reverse=True)
-        
-        for pa in potential_assignments:
-            role = pa['role']
-            name = pa['name']
-            
-            if role not in assignments and name not in assigned_players:
-                # Assign
-                assignments[role] = name
-                assigned_players.add(name)
-                
-        # Pass 2: Fill remaining slots with remaining players
-        remaining_roles = [r for r in needed_roles if r not in assignments]
-        remaining_players = [p for p in player_prefs if p['name'] not in assigned_players]
-        
-        # Simple fill for now (improve with secondary check later if needed)
-        for i, role in enumerate(remaining_roles):
-            if i < len(remaining_players):
-                p = remaining_players[i]
-                assignments[role] = p['name'] + " (Autofill)"
-                warnings.append(f"⚠️ {p['name']} autofilled to {role} ({p['prefs'].get(role, 0)} games experienced)")
-                assigned_players.add(p['name'])
-            else:
-                assignments[role] = "UNFILLED"
-                # Only warn if we supposedly had a full team to begin with (size >= 5)
-                # For Duo/Trio, Unfilled is expected.
-                if len(team_data) >= 5:
-                    warnings.append(f"🚨 No player available for {role}")
+            seen.add(key)
+            rank = len(options)
+            structure = {}
+            for r_idx, role in enumerate(ROLE_ORDER):
+                p_idx = assignment.get(r_idx)
+                if p_idx is None:
+                    structure[role] = "UNFILLED"
+                    # Only warn if we supposedly had a full team to begin with (size >= 5)
+                    # For Duo/Trio, Unfilled is expected.
+                    if rank == 0 and len(team_data) >= 5:
+                        warnings.append(f"🚨 No player available for {role}")
+                    continue
+
+                name = team_data[p_idx]['gameName']
+                if weights[p_idx][r_idx] > 0:
+                    structure[role] = name
+                else:
+                    # Never played this role in recorded games
+                    structure[role] = name + " (Autofill)"
+                    if rank == 0:
+                        warnings.append(f"⚠️ {name} autofilled to {role} ({role_counts[p_idx].get(role, 0)} games experienced)")
+            options.append({'score': score, 'structure': structure})
+            if len(options) == k:
+                break
                 
-        return assignments, warnings
+        return options, warnings
 
     def _get_db_role_counts(self, puuid):
-        with self.db.get_conn() as conn:
-            c = conn.cursor()
-            try:
-                c.execute("SELECT role FROM match_participants WHERE puuid = ?", (puuid,))
-                rows = c.fetchall()
-                roles = [r[0].strip() for r in rows if r[0] and r[0] != 'UNKNOWN']
-                return dict(Counter(roles))
-            except Exception as e:
-                # logger.warning(f"Error fetching roles for {puuid}: {e}")
-                return {} # Fallback if schema issues
-
-    def _enrich_champs(self, champ_ids):
-        # Batch fetch from DB
+        # Read from the per-player aggregate table maintained on ingest
+        return self.db.get_role_counts(puuid)
+
+    def _enrich_champs(self, champ_ids, champ_info=None):
         if not champ_ids:
             return []
-            
-        db_data = self.db.get_champions_batch(champ_ids)
+
+        # Batch lookup unless the caller already did
+        db_data = champ_info if champ_info is not None else self.catalog.batch(champ_ids)
         enriched = []
         for c_id in champ_ids:
             info = db_data.get(c_id, {})
@@ -153,47 +138,34 @@ class Analyzer:
             })
         return enriched
 
-    def _analyze_pairwise(self, team_data):
+    def _analyze_pairwise(self, team_data, masks, champ_info):
         """Finds pairs with high overlap."""
         pairs = []
+        counts = overlap_matrix(masks)
         n = len(team_data)
         for i in range(n):
             for j in range(i + 1, n):
-                p1 = team_data[i]
-                p2 = team_data[j]
-                common = p1['pool'].intersection(p2['pool'])
-                if len(common) >= 3: 
+                if counts[i][j] >= 3: 
+                    common = self.index.decode(masks[i] & masks[j])
                     pairs.append({
-                        "p1": p1['gameName'],
-                        "p2": p2['gameName'],
-                        "count": len(common),
-                        "champions": self._enrich_champs(common)
+                        "p1": team_data[i]['gameName'],
+                        "p2": team_data[j]['gameName'],
+                        "count": counts[i][j],
+                        "champions": self._enrich_champs(common, champ_info)
                     })
         pairs.sort(key=lambda x: x['count'], reverse=True)
         return pairs
 
-    def _analyze_tag_coverage(self, team_data):
+    def _analyze_tag_coverage(self, combined_mask, champ_info):
         """Analyzes coverage based on official DataDragon tags (Fighter, Mage, etc.)"""
-        combined_pool = set()
-        for p in team_data:
-            combined_pool.update(p['pool'])
-            
-        # Batch fetch all involved champions
-        db_data = self.db.get_champions_batch(combined_pool)
+        tag_masks = self.index.tag_masks(champ_info)
 
         coverage = {} # Tag -> List of Names
-        
-        for c_id, info in db_data.items():
-            name = info.get('name')
-            tags = info.get('tags', [])
-            
-            for tag in tags:
-                if tag not in coverage:
-                    coverage[tag] = []
-                coverage[tag].append(name)
+        for tag, tag_mask in tag_masks.items():
+            names = [champ_info[c_id]['name'] for c_id in self.index.decode(combined_mask & tag_mask)]
+            if names:
+                coverage[tag] = names
                     
         # Sort stats
-        stats = {tag: len(names) for tag, names in coverage.items()}
+        stats = tag_coverage_counts(combined_mask, tag_masks)
         return {"detailed": coverage, "stats": stats}
-
-
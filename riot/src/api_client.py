@@ -1,10 +1,17 @@
-
 import os
-import time
 import logging
+import threading
+import urllib.parse
 import requests
 from pathlib import Path
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
+from .regions import region_for_platform, platform_of_match
+from .metrics import get_metrics
+from .config import HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_TIMEOUT
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,10 +26,19 @@ RIOT_API_KEY = os.getenv("RIOT_API_KEY")
 ACCOUNT_REGION = os.getenv("RIOT_ACCOUNT_REGION", "americas")
 MATCH_REGION = os.getenv("RIOT_MATCH_REGION", "americas")
 PLATFORM_ID = os.getenv("RIOT_PLATFORM_ID", "na1")
+# {routing} is replaced by the region/platform. Point at ext_utils/mock_riot_server.py
+# with e.g. http://127.0.0.1:8765/{routing} for offline runs.
+API_BASE_URL = os.getenv("RIOT_API_BASE_URL", "https://{routing}.api.riotgames.com")
+
+# Returned by _handle_response when the request should be sent again (after a 429)
+RETRY = object()
 
 class RiotClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, rate_limiter=None, pool_size=HTTP_POOL_SIZE,
+                 max_retries=HTTP_MAX_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR, timeout=HTTP_TIMEOUT,
+                 cache=None, use_cache=True, base_url=None):
         self.api_key = api_key or RIOT_API_KEY
+        self.base_url = base_url or API_BASE_URL
         self.account_region = ACCOUNT_REGION
         self.match_region = MATCH_REGION
         self.platform = PLATFORM_ID
@@ -34,72 +50,202 @@ class RiotClient:
             "X-Riot-Token": self.api_key
         }
 
-    def _request(self, url):
+        # Shared across threads; one app bucket per routing host, one method bucket per endpoint
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+        # Connection pooling: one keep-alive Session per routing host, created lazily
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+        # On-disk response cache with per-endpoint TTLs (see config.CACHE_TTLS)
+        self.cache = cache or (ResponseCache() if use_cache else None)
+
+    def _get_session(self, host):
+        """Returns the pooled Session for a routing host, creating it on first use."""
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=[500, 502, 503, 504],
+                    allowed_methods=["GET"],
+                    raise_on_status=False,
+                    # urllib3 would otherwise sleep on Retry-After and retry 429s itself,
+                    # hiding them from _handle_response and the rate limiter
+                    respect_retry_after_header=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                      max_retries=retry, pool_block=True)
+                session = requests.Session()
+                session.headers.update(self.headers)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def close(self):
+        """Closes all pooled connections."""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _cache_lookup(self, url, method):
+        """Returns (cached_entry, validators); cached_entry is (data, fresh, validators) or None."""
+        if not self.cache:
+            return None, {}
+        cached = self.cache.lookup(url, method)
+        result = 'miss' if not cached else ('hit' if cached[1] else 'stale')
+        get_metrics().inc('riot_cache_lookups_total', endpoint=method, result=result)
+        return cached, (cached[2] if cached else {})
+
+    def _send(self, host, url, method, validators):
+        """One round trip on the host's pooled session. Feeds limit headers to the rate limiter."""
+        logger.debug(f"Requesting: {url}")
+        metrics = get_metrics()
+        with metrics.timer('riot_api_request_seconds', endpoint=method):
+            response = self._get_session(host).get(url, headers=validators, timeout=self.timeout)
+        metrics.inc('riot_api_requests_total', endpoint=method, status=response.status_code)
+        self.rate_limiter.update(host, method, response.headers)
+        return response
+
+    def _handle_response(self, response, url, host, method, cached):
+        """
+        Turns a response into data (or None on errors), storing it in the cache.
+        Returns RETRY after a 429, once the rate limiter has been told to back off.
+        """
+        if response.status_code == 200:
+            data = response.json()
+            if self.cache:
+                self.cache.store(url, method, data, response.headers)
+            return data
+
+        elif response.status_code == 304 and cached:
+            logger.debug(f"Not modified: {url}")
+            self.cache.touch(url)
+            return cached[0]
+        
+        elif response.status_code == 429:
+            retry_after = int(response.headers.get("Retry-After", 1))
+            limit_type = response.headers.get("X-Rate-Limit-Type")
+            logger.warning(f"Rate Limit Exceeded ({limit_type or 'unknown'}) on {host}. Retrying in {retry_after} seconds...")
+            self.rate_limiter.penalize(host, method, retry_after, limit_type)
+            get_metrics().inc('riot_rate_limited_total', host=host, limit_type=limit_type or 'service')
+            get_metrics().inc('riot_retry_after_seconds_total', retry_after, host=host)
+            return RETRY
+        
+        elif response.status_code == 403:
+            logger.error("403 Forbidden. Invalid API Key.")
+            return None
+        
+        elif response.status_code == 404:
+            logger.warning(f"404 Not Found: {url}")
+            return None
+
+        else:
+            logger.error(f"Request Failed: {response.status_code} - {response.text}")
+            return None
+
+    def _request(self, url, method):
         """
-        Internal request wrapper with 429 Rate Limit handling.
+        Internal request wrapper.
+        Serves fresh entries from the response cache and revalidates stale ones.
+        Waits on the rate limiter before sending, feeds the response's limit headers
+        back into it, and still honours Retry-After if a 429 slips through.
         """
+        cached, validators = self._cache_lookup(url, method)
+        if cached and cached[1]:
+            logger.debug(f"Cache hit: {url}")
+            return cached[0]
+
+        host = self._routing_of(url)
         while True:
             try:
-                logger.debug(f"Requesting: {url}")
-                response = requests.get(url, headers=self.headers)
-
-                if response.status_code == 200:
-                    return response.json()
-                
-                elif response.status_code == 429:
-                    retry_after = int(response.headers.get("Retry-After", 1))
-                    logger.warning(f"Rate Limit Exceeded. Sleeping for {retry_after} seconds...")
-                    time.sleep(retry_after)
+                waited = self.rate_limiter.acquire(host, method)
+                if waited:
+                    get_metrics().observe('riot_rate_limit_wait_seconds', waited, host=host)
+                response = self._send(host, url, method, validators)
+                result = self._handle_response(response, url, host, method, cached)
+                if result is RETRY:
                     continue # Retry request
-                
-                elif response.status_code == 403:
-                    logger.error("403 Forbidden. Invalid API Key.")
-                    return None
-                
-                elif response.status_code == 404:
-                    logger.warning(f"404 Not Found: {url}")
-                    return None
-
-                else:
-                    logger.error(f"Request Failed: {response.status_code} - {response.text}")
-                    return None
+                return result
 
             except Exception as e:
                 logger.error(f"Request Exception: {e}")
                 return None
 
+    # --- URL builders (shared with AsyncRiotClient) ---
+
+    def _base(self, routing):
+        return self.base_url.format(routing=routing)
+
+    def _routing_of(self, url):
+        """Routing value (americas, na1, ...) a URL targets. Keys sessions and rate-limit buckets."""
+        prefix, _, suffix = self.base_url.partition('{routing}')
+        return url[len(prefix):].split(suffix or '/', 1)[0]
+
+    def _account_url(self, game_name, tag_line):
+        encoded_name = urllib.parse.quote(game_name)
+        encoded_tag = urllib.parse.quote(tag_line)
+        return f"{self._base(self.account_region)}/riot/account/v1/accounts/by-riot-id/{encoded_name}/{encoded_tag}"
+
+    def match_region_for(self, platform=None):
+        """Match-V5 routing value for a player's platform (the client default if unknown)."""
+        return region_for_platform(platform, default=self.match_region)
+
+    def _mastery_url(self, puuid, count, platform=None):
+        return f"{self._base(platform or self.platform)}/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top?count={count}"
+
+    def _matchlist_url(self, puuid, count, queue=None, start=0, start_time=None, end_time=None, platform=None):
+        url = f"{self._base(self.match_region_for(platform))}/lol/match/v5/matches/by-puuid/{puuid}/ids?start={start}&count={count}"
+        if queue:
+            url += f"&queue={queue}"
+        if start_time is not None:
+            url += f"&startTime={int(start_time)}"
+        if end_time is not None:
+            url += f"&endTime={int(end_time)}"
+        return url
+
+    def _match_url(self, match_id):
+        # Routed by the platform prefix of the ID, so mixed-region batches need no extra arguments
+        return f"{self._base(self.match_region_for(platform_of_match(match_id)))}/lol/match/v5/matches/{match_id}"
+
     def get_account(self, game_name, tag_line):
         """
         Get Account-V1 data by Riot ID.
         """
-        import urllib.parse
-        encoded_name = urllib.parse.quote(game_name)
-        encoded_tag = urllib.parse.quote(tag_line)
-        url = f"https://{self.account_region}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{encoded_name}/{encoded_tag}"
-        return self._request(url)
+        return self._request(self._account_url(game_name, tag_line), "account")
 
-    def get_top_mastery(self, puuid, count=10):
+    def get_top_mastery(self, puuid, count=10, platform=None):
         """
         Get Top N Champion Masteries (Champion-Mastery-V4).
-        Uses Platform ID (e.g. na1).
+        Uses Platform ID (e.g. na1); `platform` overrides the client default.
         """
-        url = f"https://{self.platform}.api.riotgames.com/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}/top?count={count}"
-        return self._request(url)
+        return self._request(self._mastery_url(puuid, count, platform), "mastery")
 
-    def get_matchlist(self, puuid, count=20, queue=None):
+    def get_matchlist(self, puuid, count=20, queue=None, start=0, start_time=None, end_time=None, platform=None):
         """
-        Get Match IDs (Match-V5).
-        Uses Region Group (e.g. americas).
+        Get Match IDs (Match-V5), newest first.
+        Uses Region Group (e.g. americas), derived from `platform` when given.
+        start: offset into the player's history. start_time/end_time: epoch seconds.
+        The API caps `count` at 100 per request.
         """
-        # start=0, count=count
-        url = f"https://{self.match_region}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={count}"
-        if queue:
-            url += f"&queue={queue}"
-        return self._request(url)
+        url = self._matchlist_url(puuid, count, queue, start, start_time, end_time, platform)
+        return self._request(url, "matchlist")
 
     def get_match_details(self, match_id):
         """
         Get Match Details (Match-V5).
         """
-        url = f"https://{self.match_region}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        return self._request(url)
+        return self._request(self._match_url(match_id), "match")
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from .api_client import RiotClient, RETRY
+from .config import ASYNC_MAX_IN_FLIGHT
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def gather_or_cancel(coros):
+    """
+    Structured fan-out: runs every coroutine concurrently and returns results in order.
+    If one raises (or the caller is cancelled), the rest are cancelled before re-raising,
+    so no request outlives the call that started it.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    if not tasks:
+        return []
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+        return [task.result() for task in tasks]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AsyncRiotClient:
+    """
+    asyncio variant of RiotClient with the same methods as coroutines.
+
+    Shares the wrapped client's rate limiter, response cache and pooled sessions, so
+    sync and async callers draw from one budget. The blocking socket I/O runs on a
+    dedicated pool of `max_in_flight` threads (requests has no native asyncio support).
+    Each worker takes its rate-limit slot right before sending, so a request never holds
+    a slot while queued behind others and bursts can't bunch into the server's window.
+    """
+    def __init__(self, client=None, max_in_flight=ASYNC_MAX_IN_FLIGHT, **client_kwargs):
+        self.client = client or RiotClient(**client_kwargs)
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="riot-async")
+
+    def _acquire_and_send(self, host, url, method, validators):
+        """Runs in a worker thread: wait for a slot, then send immediately."""
+        waited = self.client.rate_limiter.acquire(host, method)
+        if waited:
+            get_metrics().observe('riot_rate_limit_wait_seconds', waited, host=host)
+        return self.client._send(host, url, method, validators)
+
+    async def _request(self, url, method):
+        """Async counterpart of RiotClient._request (same cache and 429 handling)."""
+        cached, validators = self.client._cache_lookup(url, method)
+        if cached and cached[1]:
+            logger.debug(f"Cache hit: {url}")
+            return cached[0]
+
+        host = self.client._routing_of(url)
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                response = await loop.run_in_executor(self._executor, self._acquire_and_send,
+                                                      host, url, method, validators)
+                result = self.client._handle_response(response, url, host, method, cached)
+                if result is RETRY:
+                    continue # Retry request
+                return result
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Request Exception: {e}")
+                return None
+
+    async def get_account(self, game_name, tag_line):
+        """Get Account-V1 data by Riot ID."""
+        return await self._request(self.client._account_url(game_name, tag_line), "account")
+
+    async def get_top_mastery(self, puuid, count=10, platform=None):
+        """Get Top N Champion Masteries (Champion-Mastery-V4)."""
+        return await self._request(self.client._mastery_url(puuid, count, platform), "mastery")
+
+    async def get_matchlist(self, puuid, count=20, queue=None, start=0, start_time=None, end_time=None, platform=None):
+        """Get Match IDs (Match-V5), newest first."""
+        url = self.client._matchlist_url(puuid, count, queue, start, start_time, end_time, platform)
+        return await self._request(url, "matchlist")
+
+    async def get_match_details(self, match_id):
+        """Get Match Details (Match-V5)."""
+        return await self._request(self.client._match_url(match_id), "match")
+
+    async def get_many_match_details(self, match_ids):
+        """Fetches all match details concurrently. Returns [(match_id, details), ...]."""
+        results = await gather_or_cancel(self.get_match_details(mid) for mid in match_ids)
+        return list(zip(match_ids, results))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
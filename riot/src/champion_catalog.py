@@ -0,0 +1,139 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from .config import CHAMPIONS_DATA_PATH, CHAMPION_ATTRIBUTES_PATH
+
+logger = logging.getLogger(__name__)
+
+# Curated subclasses (champion_attributes.json) -> DataDragon class tag, so every champion
+# lands in the same six-class taxonomy whether or not it has curated attributes
+CLASS_FAMILIES = {
+    'Enchanter': 'Support', 'Catcher': 'Support',
+    'Juggernaut': 'Fighter', 'Diver': 'Fighter', 'Skirmisher': 'Fighter',
+    'Burst Mage': 'Mage', 'Battlemage': 'Mage', 'Artillery': 'Mage',
+    'Assassin': 'Assassin',
+    'Marksman': 'Marksman',
+    'Vanguard': 'Tank', 'Warden': 'Tank',
+}
+
+
+class ChampionCatalog:
+    """
+    In-memory champion lookup built once per process.
+
+    Sources, later ones filling gaps or overriding:
+      1. champions.json (DataDragon): name, tags
+      2. the `champions` table (covers champions imported after the JSON was saved)
+      3. champion_attributes.json: role, style, dmg_type, class
+
+    Columns are plain lists indexed directly by champion id (ids are < 1000),
+    so lookups are a list index with no DB round trip.
+    """
+    FIELDS = ('name', 'tags', 'role', 'style', 'dmg_type', 'champ_class')
+
+    def __init__(self):
+        self.ids = [] # Known champion ids, ascending
+        self.name = []
+        self.tags = []
+        self.role = []
+        self.style = []
+        self.dmg_type = []
+        self.champ_class = []
+
+    def _ensure(self, c_id):
+        if c_id >= len(self.name):
+            grow = c_id + 1 - len(self.name)
+            for field in self.FIELDS:
+                getattr(self, field).extend([None] * grow)
+
+    def _set(self, c_id, **values):
+        self._ensure(c_id)
+        for field, value in values.items():
+            getattr(self, field)[c_id] = value
+
+    @classmethod
+    def build(cls, db=None, champions_path=None, attributes_path=None):
+        catalog = cls()
+
+        # 1. DataDragon JSON
+        champions_path = Path(champions_path or CHAMPIONS_DATA_PATH)
+        if champions_path.exists():
+            with open(champions_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for val in data.get('data', {}).values():
+                catalog._set(int(val['key']), name=val['name'], tags=list(val.get('tags', [])))
+        else:
+            logger.warning(f"Champion data not found: {champions_path}")
+
+        # 2. DB table
+        if db is not None:
+            with db.get_conn() as conn:
+                for c_id, name, tags_str in conn.execute('SELECT champion_id, name, tags FROM champions'):
+                    catalog._set(c_id, name=name, tags=tags_str.split(',') if tags_str else [])
+
+        # 3. Curated attributes
+        attributes_path = Path(attributes_path or CHAMPION_ATTRIBUTES_PATH)
+        if attributes_path.exists():
+            with open(attributes_path, 'r', encoding='utf-8') as f:
+                attributes = json.load(f)
+            for key, attrs in attributes.items():
+                if key.startswith('_'):
+                    continue
+                catalog._set(int(key), role=attrs.get('role'), style=attrs.get('style'),
+                             dmg_type=attrs.get('dmg_type'), champ_class=attrs.get('class'))
+
+        catalog.ids = [c_id for c_id, name in enumerate(catalog.name) if name is not None]
+        logger.debug(f"Champion catalog built with {len(catalog.ids)} champions")
+        return catalog
+
+    def __contains__(self, c_id):
+        return 0 <= c_id < len(self.name) and self.name[c_id] is not None
+
+    def get_name(self, c_id):
+        return self.name[c_id] if c_id in self else str(c_id)
+
+    def get_tags(self, c_id):
+        return (self.tags[c_id] or []) if c_id in self else []
+
+    def get_class(self, c_id):
+        """
+        DataDragon class (Fighter, Tank, Mage, Assassin, Marksman, Support): the curated
+        subclass mapped through CLASS_FAMILIES if known, else the primary DataDragon tag.
+        """
+        if c_id not in self:
+            return None
+        tags = self.tags[c_id]
+        primary = tags[0] if tags else None
+        return CLASS_FAMILIES.get(self.champ_class[c_id], primary)
+
+    def get_dmg_type(self, c_id):
+        return self.dmg_type[c_id] if c_id < len(self.dmg_type) else None
+
+    def batch(self, champion_ids):
+        """
+        Drop-in for RiotDatabase.get_champions_batch.
+        Returns {id: {'name': str, 'tags': [str]}} for the known ids.
+        """
+        return {c_id: {'name': self.name[c_id], 'tags': self.tags[c_id] or []}
+                for c_id in champion_ids if c_id in self}
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(db=None):
+    """Returns the process-wide catalog, building it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ChampionCatalog.build(db)
+        return _catalog
+
+
+def reset_catalog():
+    """Drops the cached catalog (e.g. after import_champions)."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
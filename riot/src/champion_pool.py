@@ -0,0 +1,97 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ChampionIndex:
+    """
+    Fixed champion-id -> bit position mapping.
+
+    Pools are stored as Python ints used as bitsets, so intersections are a single
+    `&` and sizes a popcount (int.bit_count), regardless of pool size.
+    Unknown ids are appended on first sight, so an index can grow while in use.
+    """
+    def __init__(self, champion_ids=()):
+        self.ids = []       # bit position -> champion id
+        self.positions = {} # champion id -> bit position
+        for c_id in sorted(champion_ids):
+            self._add(c_id)
+
+    def _add(self, c_id):
+        pos = self.positions.get(c_id)
+        if pos is None:
+            pos = len(self.ids)
+            self.ids.append(c_id)
+            self.positions[c_id] = pos
+        return pos
+
+    def encode(self, champion_ids):
+        """Set of champion ids -> bitset."""
+        mask = 0
+        for c_id in champion_ids:
+            mask |= 1 << self._add(c_id)
+        return mask
+
+    def decode(self, mask):
+        """Bitset -> list of champion ids (in index order)."""
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(self.ids[low.bit_length() - 1])
+            mask ^= low
+        return ids
+
+    def tag_masks(self, champ_info):
+        """
+        Builds one bitset per tag from {champion_id: {'tags': [...]}}.
+        Returns: {tag: bitset}
+        """
+        masks = {}
+        for c_id, info in champ_info.items():
+            bit = 1 << self._add(c_id)
+            for tag in info.get('tags', []):
+                masks[tag] = masks.get(tag, 0) | bit
+        return masks
+
+
+def intersect_all(masks):
+    """Bitset of champions present in every pool."""
+    if not masks:
+        return 0
+    result = masks[0]
+    for mask in masks[1:]:
+        result &= mask
+    return result
+
+
+def union_all(masks):
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def overlap_matrix(masks):
+    """
+    All-pairs shared-champion counts.
+    Returns: n x n list of lists, diagonal = pool sizes.
+    """
+    n = len(masks)
+    matrix = [[0] * n for _ in range(n)]
+    for i in range(n):
+        matrix[i][i] = masks[i].bit_count()
+        for j in range(i + 1, n):
+            count = (masks[i] & masks[j]).bit_count()
+            matrix[i][j] = count
+            matrix[j][i] = count
+    return matrix
+
+
+def tag_coverage_counts(pool_mask, tag_masks):
+    """Number of pool champions per tag: {tag: count}."""
+    counts = {}
+    for tag, tag_mask in tag_masks.items():
+        count = (pool_mask & tag_mask).bit_count()
+        if count:
+            counts[tag] = count
+    return counts
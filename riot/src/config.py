@@ -6,12 +6,88 @@ import os
 # Here we stick to the project convention of relative paths from root "riot/..."
 
 DB_PATH = "riot/db/scout.db"
+HTTP_CACHE_PATH = "riot/db/http_cache.db"
+MATCH_ARCHIVE_PATH = "riot/db/match_archive.db"
+PARQUET_EXPORT_PATH = "riot/db/parquet"
 TEAM_FILE_PATH = "riot/team.txt"
 CHAMPIONS_DATA_PATH = "riot/data/champions.json"
+CHAMPION_ATTRIBUTES_PATH = "riot/data/champion_attributes.json"
+
+# --- SQLite ---
+DB_JOURNAL_MODE = "WAL"       # Readers don't block the writer during batch ingest
+DB_SYNCHRONOUS = "NORMAL"     # Safe with WAL; only the last commits can be lost on power failure
+DB_STATEMENT_CACHE = 256      # Prepared statements kept per connection
+DB_BUSY_TIMEOUT = 30          # Seconds to wait on a locked database
 
 # --- Constants ---
 DEFAULT_MATCH_COUNT = 20
 
+# --- Fetching ---
+# Number of match-detail requests kept in flight by DataFetcher.process_team.
+# Set to 1 for the old serial behaviour.
+MATCH_FETCH_WORKERS = 4
+
+# Incremental matchlist sync
+MATCHLIST_PAGE_SIZE = 100      # API maximum per matchlist request
+SYNC_OVERLAP_SECONDS = 3600    # Re-list this much history so games in progress at the last sync aren't missed
+
+# Concurrent requests for AsyncRiotClient (rate limiter still applies)
+ASYNC_MAX_IN_FLIGHT = 8
+
+# Platform (shard) -> regional routing value used by Match-V5.
+# Team files can pin a player's shard with Name#Tag@platform; others use RIOT_PLATFORM_ID.
+PLATFORM_ROUTING = {
+    'na1': 'americas', 'br1': 'americas', 'la1': 'americas', 'la2': 'americas',
+    'euw1': 'europe', 'eun1': 'europe', 'tr1': 'europe', 'ru': 'europe', 'me1': 'europe',
+    'kr': 'asia', 'jp1': 'asia',
+    'oc1': 'sea', 'sg2': 'sea', 'tw2': 'sea', 'vn2': 'sea',
+}
+
+# scout_service.py: local query API and background refresh of tracked players
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8766
+
+# Refresh scheduler (updater.py --schedule / --loop): refresh each data type once it is this old (seconds)
+REFRESH_INTERVALS = {
+    'mastery': 24 * 3600,
+    'matchlist': 2 * 3600,
+}
+REFRESH_BUDGET = 80          # Estimated API requests per scheduler cycle (fits a dev key's 100 / 2 min)
+REFRESH_LOOP_SECONDS = 300   # Pause between cycles in --loop mode and in scout_service.py
+TRACKED_PRIORITY_BOOST = 10  # scout_service.py: tracked players' priority multiplier, so they refresh first
+
+# Matches written per SQLite transaction during bulk ingest
+MATCH_BATCH_SIZE = 50
+
+# zlib level for raw match payloads in the archive (1 fastest - 9 smallest)
+ARCHIVE_COMPRESSION_LEVEL = 6
+
+# Parquet export (updater.py --export-parquet, needs pyarrow)
+PARQUET_COMPRESSION = "zstd"
+PARQUET_EXPORT_CHUNK = 5000   # Matches per part file and manifest commit
+
+# Starting request budget per routing host as (max_requests, window_seconds) pairs.
+# Defaults match a Riot Development Key (20/1s, 100/2min); the X-App-Rate-Limit
+# headers replace them after the first response.
+RATE_LIMITS = [(20, 1), (100, 120)]
+
+# --- HTTP ---
+# One pooled keep-alive session per routing host (americas, na1, ...)
+HTTP_POOL_SIZE = 10          # Max open connections per host, keep >= MATCH_FETCH_WORKERS
+HTTP_MAX_RETRIES = 3         # Retries for connection errors and 5xx responses (429s are handled by the rate limiter)
+HTTP_BACKOFF_FACTOR = 0.5    # Retry sleeps: 0.5s, 1s, 2s, ...
+HTTP_TIMEOUT = (5, 15)       # (connect, read) seconds
+
+# Response cache TTL per endpoint class, in seconds. None = never expires.
+CACHE_TTLS = {
+    'match': None,           # Match-V5 details are immutable
+    'matchlist': 5 * 60,     # New games show up every ~30 min at most
+    'mastery': 6 * 3600,
+    'account': 24 * 3600,
+}
+# Expired responses are deleted at most this often (on open, and by the refresh scheduler)
+CACHE_PURGE_INTERVAL = 24 * 3600
+
 # Valid Queue IDs for filtering matches
 # 420: Ranked Solo/Duo
 # 440: Ranked Flex
@@ -32,3 +108,25 @@ ROLE_DISPLAY_MAP = {
 
 # Standard Role List for Iteration/Ordering
 ROLE_ORDER = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+
+# Number of alternative role setups the Analyzer scores and reports
+ROLE_OPTIONS_K = 3
+
+# Roster optimizer score weights (sum to 1.0)
+ROSTER_WEIGHTS = {
+    'roles': 0.5,    # How well players fit distinct roles
+    'overlap': 0.2,  # Shared champion pools (flex picks)
+    'balance': 0.3,  # Class coverage + physical/magic damage mix
+}
+
+# Champion-pool similarity (rankings.py --similar): share of each player's vector from
+# recorded games vs mastery points (sum to 1.0)
+SIMILARITY_WEIGHTS = {
+    'played': 0.6,
+    'mastery': 0.4,
+}
+SIMILARITY_NEIGHBORS = 10  # Nearest neighbours cached per player
+
+# Playstyle metrics (rankings.py)
+COMFORT_MASTERY_DEPTH = 15   # A game counts as a comfort pick if the champion is in the player's top N mastery
+DECAY_HALF_LIFE_DAYS = 30    # Time-decayed metrics: a game this old counts half as much as one played today
@@ -1,25 +1,55 @@
+import asyncio
+import itertools
 import logging
 import time
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .api_client import RiotClient
+from .async_client import AsyncRiotClient, gather_or_cancel
 from .database import RiotDatabase
-from .config import VALID_QUEUES, DEFAULT_MATCH_COUNT
+from .match_archive import MatchArchive
+from .regions import platform_of_match
+from .metrics import get_metrics
+from .config import (VALID_QUEUES, DEFAULT_MATCH_COUNT, MATCH_FETCH_WORKERS, MATCHLIST_PAGE_SIZE,
+                     SYNC_OVERLAP_SECONDS, MATCH_BATCH_SIZE)
 
 logger = logging.getLogger(__name__)
 
 class DataFetcher:
-    def __init__(self, client: RiotClient, db: RiotDatabase):
+    def __init__(self, client: RiotClient, db: RiotDatabase, workers=MATCH_FETCH_WORKERS, incremental=True,
+                 async_client: AsyncRiotClient = None, archive: MatchArchive = None, progress=None):
         self.client = client
         self.db = db
+        # Max match-detail requests in flight. The client's rate limiter still applies.
+        self.workers = max(1, workers)
+        # Only list matches newer than each player's stored high-water mark
+        self.incremental = incremental
+        # When set, process_teams overlaps all player and match requests on one event loop
+        self.async_client = async_client
+        # Raw payload store: fetched matches are archived, archived ones are never re-fetched
+        self.archive = archive
+        # Optional callback(phase, done, total), called as players and matches complete
+        self.progress = progress
+        self._players_done = itertools.count(1)
+        self._players_total = 0
+        self.metrics = get_metrics()
 
-    def get_or_fetch_player(self, game_name, tag_line):
+    def _report(self, phase, done, total):
+        if self.progress:
+            self.progress(phase, done, total)
+
+    def get_or_fetch_player(self, game_name, tag_line, platform=None):
         """
         Ensures we have the player's PUUID in the DB.
+        `platform` (e.g. euw1) is stored with the player for region routing.
         Returns: puuid or None
         """
         # 1. Check DB
         player = self.db.get_player(game_name, tag_line)
         if player:
             # We could check last_updated to refresh name, but PUUID is constant.
+            if platform and platform != player[2]:
+                self.db.set_player_platform(player[0], platform)
             return player[0] # puuid
 
         # 2. Fetch API
@@ -33,15 +63,23 @@ class DataFetcher:
         real_tag = account.get('tagLine')
         
         # 3. Save to DB
-        self.db.save_player(puuid, real_name, real_tag)
+        self.db.save_player(puuid, real_name, real_tag, platform)
         return puuid
 
-    def update_player_mastery(self, puuid):
-        """Fetches and saves top mastery."""
+    def update_player_mastery(self, puuid, platform=None):
+        """Fetches and saves top mastery. Returns: False if the request failed."""
         # We can implement a "last_updated" check here later to avoid spamming mastery
-        mastery_data = self.client.get_top_mastery(puuid, count=15)
+        mastery_data = self.client.get_top_mastery(puuid, count=15, platform=platform)
         if mastery_data:
             self.db.save_mastery(puuid, mastery_data)
+        return mastery_data is not None
+
+    def _platform(self, member):
+        """Member's platform from the team file, else the one stored for the player (None = client default)."""
+        if member.get('platform'):
+            return member['platform']
+        player = self.db.get_player(member['name'], member['tag'])
+        return player[2] if player else None
 
     def get_player_data(self, puuid, count=DEFAULT_MATCH_COUNT):
         # 1. Update Mastery
@@ -54,80 +92,463 @@ class DataFetcher:
         matches = self.client.get_matchlist(puuid, count=count)
         return matches
 
-    def process_team(self, team_list, count=DEFAULT_MATCH_COUNT):
+    def _page_requests(self, puuid, start=0, count=None, start_time=None, platform=None):
         """
-        Orchestrates Batch Processing:
-        1. Resolve all PUUIDs.
-        2. Update Masteries.
-        3. Collect Match IDs (Latest `count` per player).
-        4. Deduplicate & Filter known matches.
-        5. Fetch Details -> CHECK GAMEMODE -> Save if valid.
+        Pages through match IDs in pages of MATCHLIST_PAGE_SIZE.
+        count=None keeps paging until the API runs out (used with start_time).
+        Generator: yields get_matchlist kwargs, receives each page, returns (ids, complete).
+        A failed page (None, unlike an empty list) stops paging with complete=False.
+        Driven by _drive (sync) or _drive_async so the paging logic exists once.
+        """
+        ids = []
+        while count is None or len(ids) < count:
+            page_size = MATCHLIST_PAGE_SIZE if count is None else min(MATCHLIST_PAGE_SIZE, count - len(ids))
+            page = yield dict(puuid=puuid, count=page_size, start=start + len(ids), start_time=start_time,
+                              platform=platform)
+            if page is None:
+                return ids, False
+            ids.extend(page)
+            if len(page) < page_size:
+                break
+        return ids, True
+
+    def _sync_steps(self, puuid, count, platform=None):
+        sync_started = int(time.time())
+        state = self.db.get_sync_state(puuid)
+
+        if not state:
+            ids, complete = yield from self._page_requests(puuid, count=count, platform=platform)
+            if not complete:
+                return ids, None
+            return ids, (sync_started, ids[0] if ids else None, len(ids))
+
+        synced_at, newest_id, depth = state
+
+        # Forward: everything newer than the high-water mark
+        recent, complete = yield from self._page_requests(puuid, start_time=synced_at - SYNC_OVERLAP_SECONDS,
+                                                          platform=platform)
+        if not complete:
+            # Depth offsets below would be wrong without the full forward list; retry next run
+            return recent, None
+        new_count = recent.index(newest_id) if newest_id in recent else len(recent)
+        ids = recent[:new_count]
+        depth += new_count
+        if recent:
+            newest_id = recent[0]
+
+        # Backward: deeper history than previously synced
+        if count > depth:
+            older, complete = yield from self._page_requests(puuid, start=depth, count=count - depth, platform=platform)
+            ids.extend(older)
+            if not complete:
+                return ids, None
+            depth += len(older)
+
+        return ids, (sync_started, newest_id, depth)
+
+    def _drive(self, steps):
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(self.client.get_matchlist(**request))
+        except StopIteration as done:
+            return done.value
+
+    async def _drive_async(self, steps):
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await self.async_client.get_matchlist(**request))
+        except StopIteration as done:
+            return done.value
+
+    def sync_matchlist(self, puuid, count=DEFAULT_MATCH_COUNT, platform=None):
+        """
+        Incremental matchlist sync using the player's stored high-water mark.
+        - First sync: the latest `count` match IDs.
+        - Later syncs: only games since the last sync (startTime), usually one small request.
+        - If `count` is deeper than what was synced before, pages backward with `start`.
+        Returns: (match_ids, new_state). Save new_state with db.save_sync_state once the
+        matches are stored, so a crashed run is simply re-synced. new_state is None when a
+        page failed: the IDs that did arrive are still returned, the stored state is kept.
+        """
+        return self._drive(self._sync_steps(puuid, count, platform))
+
+    def _list_matches(self, puuid, count, platform=None):
+        """
+        One player's match IDs, for _ingest.
+        Returns: (match_ids, new_state). match_ids is None if the matchlist request failed
+        (non-incremental); new_state is None if incremental sync is off or a page failed.
+        """
+        if self.incremental:
+            # Only matches since the last sync (plus older ones if `count` grew)
+            return self.sync_matchlist(puuid, count=count, platform=platform)
+        # Fetch latest N matches regardless of queue
+        return self.client.get_matchlist(puuid, count=count, platform=platform), None
+
+    def _fetch_match_details(self, match_ids):
+        """
+        Yields (match_id, details) as each request completes.
+        Keeps up to `self.workers` requests in flight per region. Each region gets its own
+        threads, so waiting on one region's rate limit never stalls another region.
+        """
+        by_region = {}
+        for match_id in match_ids:
+            region = self.client.match_region_for(platform_of_match(match_id))
+            by_region.setdefault(region, []).append(match_id)
+
+        if self.workers == 1 and len(by_region) <= 1:
+            for match_id in match_ids:
+                yield match_id, self.client.get_match_details(match_id)
+            return
+
+        with ExitStack() as stack:
+            futures = {}
+            for region, region_ids in by_region.items():
+                pool = stack.enter_context(ThreadPoolExecutor(max_workers=self.workers))
+                for mid in region_ids:
+                    futures[pool.submit(self.client.get_match_details, mid)] = mid
+            for future in as_completed(futures):
+                match_id = futures[future]
+                try:
+                    yield match_id, future.result()
+                except Exception as e:
+                    logger.error(f"Failed to fetch match {match_id}: {e}")
+                    yield match_id, None
+
+    def _collect_region(self, members, count):
+        """
+        Steps 1-3 for the players of one region, one player at a time.
+        members: [(key, member, platform), ...]
+        Returns: (resolved, player_puuids, match_ids, listings)
         """
         player_puuids = []
+        resolved = {} # (name, tag) lowercased -> puuid or None
         
-        # Valid Queues imported from config
-
         # Step 1 & 2: Resolve Players & Masteries
-        for member in team_list:
-            puuid = self.get_or_fetch_player(member['name'], member['tag'])
+        for key, member, platform in members:
+            with self.metrics.timer('riot_fetch_phase_seconds', phase='resolve'):
+                puuid = self.get_or_fetch_player(member['name'], member['tag'], platform)
+            resolved[key] = puuid
             if puuid:
+                with self.metrics.timer('riot_fetch_phase_seconds', phase='mastery'):
+                    mastery_ok = self.update_player_mastery(puuid, platform)
                 player_puuids.append({
                     "name": member['name'],
-                    "puuid": puuid
+                    "puuid": puuid,
+                    "platform": platform,
+                    "mastery_ok": mastery_ok
                 })
-                self.update_player_mastery(puuid)
-            time.sleep(0.1) 
 
         # Step 3: Collect Match IDs (Batch)
-        all_match_ids = set()
+        match_ids = set()
+        listings = {}
         for p in player_puuids:
             logger.info(f"Fetching recent matches for {p['name']}...")
-            # Fetch latest N matches regardless of queue
-            m_ids = self.client.get_matchlist(p['puuid'], count=count)
-            if m_ids:
-                all_match_ids.update(m_ids)
-            time.sleep(0.1)
+            with self.metrics.timer('riot_fetch_phase_seconds', phase='matchlist'):
+                listings[p['puuid']] = self._list_matches(p['puuid'], count, p['platform'])
+            match_ids.update(listings[p['puuid']][0] or [])
+            self._report('players', next(self._players_done), self._players_total)
+
+        return resolved, player_puuids, match_ids, listings
+
+    def _collect(self, members, count):
+        """
+        Steps 1-3. Players are grouped by match region and the regions run in parallel,
+        each within its own rate-limit budget and connection pool.
+        Returns: (resolved, player_puuids, all_match_ids, listings)
+        """
+        by_region = {}
+        for key, member in members.items():
+            platform = self._platform(member)
+            region = self.client.match_region_for(platform)
+            by_region.setdefault(region, []).append((key, member, platform))
+
+        if len(by_region) <= 1:
+            results = [self._collect_region(group, count) for group in by_region.values()]
+        else:
+            logger.info(f"Fetching {len(by_region)} regions in parallel: {', '.join(by_region)}")
+            with ThreadPoolExecutor(max_workers=len(by_region)) as pool:
+                results = list(pool.map(lambda group: self._collect_region(group, count), by_region.values()))
+
+        resolved = {}
+        player_puuids = []
+        all_match_ids = set()
+        listings = {}
+        for region_resolved, region_players, match_ids, region_listings in results:
+            resolved.update(region_resolved)
+            player_puuids.extend(region_players)
+            all_match_ids.update(match_ids)
+            listings.update(region_listings)
+        return resolved, player_puuids, all_match_ids, listings
+
+    async def _collect_async(self, members, count):
+        """
+        Steps 1-3 for every player concurrently, across regions too (each request waits
+        only on its own region's budget). Match details are requested as soon as
+        a player's matchlist arrives instead of after all matchlists are in.
+        DB access stays on the event loop thread.
+        Returns: (resolved, player_puuids, all_match_ids, listings, prefetched details)
+        """
+        resolved = {}
+        listings = {}
+        all_match_ids = set()
+        detail_tasks = {} # match_id -> Task
+
+        async def collect_player(key, member):
+            # Step 1: Resolve
+            player = self.db.get_player(member['name'], member['tag'])
+            platform = member.get('platform') or (player[2] if player else None)
+            if player:
+                puuid = player[0]
+                if platform != player[2]:
+                    self.db.set_player_platform(puuid, platform)
+            else:
+                account = await self.async_client.get_account(member['name'], member['tag'])
+                if not account:
+                    logger.error(f"Could not find player {member['name']}#{member['tag']}")
+                    resolved[key] = None
+                    return None
+                puuid = account.get('puuid')
+                self.db.save_player(puuid, account.get('gameName'), account.get('tagLine'), platform)
+            resolved[key] = puuid
 
+            # Step 2 & 3: Mastery and Match IDs together
+            logger.info(f"Fetching mastery and recent matches for {member['name']}...")
+            if self.incremental:
+                matchlist = self._drive_async(self._sync_steps(puuid, count, platform))
+            else:
+                matchlist = self.async_client.get_matchlist(puuid, count=count, platform=platform)
+            mastery_data, m_result = await gather_or_cancel([
+                self.async_client.get_top_mastery(puuid, count=15, platform=platform),
+                matchlist
+            ])
+            if mastery_data:
+                self.db.save_mastery(puuid, mastery_data)
+
+            listings[puuid] = m_result if self.incremental else (m_result, None)
+            m_ids = listings[puuid][0] or []
+            all_match_ids.update(m_ids)
+
+            # Start detail fetches for matches we don't have yet
+            existing = self.db.get_existing_match_ids(m_ids)
+            if self.archive:
+                existing |= self.archive.contains_many(m_ids)
+            for mid in m_ids:
+                if mid not in existing and mid not in detail_tasks:
+                    detail_tasks[mid] = asyncio.ensure_future(self.async_client.get_match_details(mid))
+            self._report('players', next(self._players_done), self._players_total)
+            return {"name": member['name'], "puuid": puuid, "mastery_ok": mastery_data is not None}
+
+        try:
+            players = await gather_or_cancel(collect_player(key, member) for key, member in members.items())
+            details = await gather_or_cancel(detail_tasks.values())
+        finally:
+            for task in detail_tasks.values():
+                task.cancel()
+
+        player_puuids = [p for p in players if p]
+        prefetched = dict(zip(detail_tasks.keys(), details))
+        return resolved, player_puuids, all_match_ids, listings, prefetched
+
+    def rebuild_from_archive(self):
+        """
+        Re-derives every archived match from its raw payload, with no API calls.
+        Each archived match's rows are deleted and re-ingested with the current schema;
+        matches that predate the archive are left as they are.
+        Returns: (rebuilt, skipped) match counts.
+        """
+        if not self.archive:
+            raise ValueError("rebuild_from_archive needs a MatchArchive")
+
+        skipped = 0
+
+        def valid_details():
+            batch = []
+            for match_id, details in self.archive.iter_matches():
+                batch.append((match_id, details))
+                if len(batch) >= MATCH_BATCH_SIZE:
+                    yield from flush(batch)
+                    batch = []
+            yield from flush(batch)
+
+        def flush(batch):
+            nonlocal skipped
+            self.db.delete_matches([mid for mid, _ in batch])
+            for match_id, details in batch:
+                if details.get('info', {}).get('queueId') in VALID_QUEUES:
+                    yield details
+                else:
+                    skipped += 1
+
+        rebuilt = self.db.save_matches_batch(valid_details())
+        logger.info(f"Rebuild complete. Re-derived {rebuilt} matches from the archive. Skipped {skipped} non-relevant matches.")
+        return rebuilt, skipped
+
+    def _ingest(self, all_match_ids, listings, prefetched=None):
+        """
+        Steps 4-5: skips stored matches, loads archived ones, fetches the rest,
+        saves tracked queues in batches, then advances the sync high-water marks.
+        listings: {puuid: (match_ids, new_state)} from _list_matches.
+        A player's high-water mark only moves if their whole matchlist and every match
+        on it arrived; otherwise the old state stays, so the next run lists them again.
+        Returns: (saved, skipped, synced), synced being the puuids whose matches are complete.
+        """
         # Step 4: Filter Existing
-        unique_ids = list(all_match_ids)
-        existing_ids = self.db.get_existing_match_ids(all_match_ids)
-        missing_ids = [mid for mid in unique_ids if mid not in existing_ids]
+        with self.metrics.timer('riot_fetch_phase_seconds', phase='filter'):
+            unique_ids = list(all_match_ids)
+            existing_ids = self.db.get_existing_match_ids(all_match_ids)
+            missing_ids = [mid for mid in unique_ids if mid not in existing_ids]
 
         logger.info(f"Unique Matches Found: {len(unique_ids)}")
         logger.info(f"New Matches to Analysis: {len(missing_ids)} (Checking Game Modes...)")
 
         # Step 5: Batch Fetch Details & Filter
-        valid_count = 0
-        skipped_count = 0
-        
-        for idx, match_id in enumerate(missing_ids):
-            logger.info(f"Processing Match {idx+1}/{len(missing_ids)}: {match_id}")
-            details = self.client.get_match_details(match_id)
-            
-            if details:
-                # CHECK GAME MODE
-                info = details.get('info', {})
-                queue_id = info.get('queueId')
+        # Details are fetched concurrently; DB writes stay on this thread in batched transactions.
+        skipped = []
+        failed = set()
+        archived = self.archive.get_many(missing_ids) if self.archive else {}
+        to_fetch = [mid for mid in missing_ids if mid not in archived]
+        if archived:
+            logger.info(f"{len(archived)} matches loaded from the local archive")
+            self.metrics.inc('riot_fetch_matches_total', len(archived), result='from_archive')
+
+        def fetched():
+            # Archive new payloads (all queues) in batches as they arrive
+            source = prefetched.items() if prefetched is not None else self._fetch_match_details(to_fetch)
+            pending = []
+            for match_id, details in source:
+                if not details:
+                    failed.add(match_id)
+                elif self.archive:
+                    pending.append((match_id, details))
+                    if len(pending) >= MATCH_BATCH_SIZE:
+                        self.archive.put_many(pending)
+                        pending = []
+                yield match_id, details
+            if pending:
+                self.archive.put_many(pending)
+
+        def valid_details():
+            source = itertools.chain(archived.items(), fetched())
+            for idx, (match_id, details) in enumerate(source):
+                logger.info(f"Processing Match {idx+1}/{len(missing_ids)}: {match_id}")
+                self._report('matches', idx + 1, len(missing_ids))
                 
-                if queue_id in VALID_QUEUES:
-                    self.db.save_match_details(details)
-                    valid_count += 1
-                else:
-                    logger.info(f"Skipping match {match_id} (Queue {queue_id} not in target list)")
-                    skipped_count += 1
-            
-            time.sleep(0.5) 
+                if details:
+                    # CHECK GAME MODE
+                    info = details.get('info', {})
+                    queue_id = info.get('queueId')
+                    
+                    if queue_id in VALID_QUEUES:
+                        yield details
+                    else:
+                        logger.info(f"Skipping match {match_id} (Queue {queue_id} not in target list)")
+                        skipped.append(match_id)
+
+        with self.metrics.timer('riot_fetch_phase_seconds', phase='details'):
+            valid_count = self.db.save_matches_batch(valid_details())
+        skipped_count = len(skipped)
+        self.metrics.inc('riot_fetch_matches_total', valid_count, result='saved')
+        self.metrics.inc('riot_fetch_matches_total', skipped_count, result='skipped')
+
+        if failed:
+            self.metrics.inc('riot_fetch_matches_total', len(failed), result='failed')
+
+        # Advance high-water marks only after the matches are stored
+        synced = set()
+        for puuid, (m_ids, state) in listings.items():
+            if m_ids is None or (self.incremental and state is None) or not failed.isdisjoint(m_ids):
+                logger.warning(f"Incomplete fetch for {puuid}, keeping its previous sync state")
+                continue
+            if state:
+                self.db.save_sync_state(puuid, *state)
+            synced.add(puuid)
 
         logger.info(f"Batch Complete. Saved {valid_count} valid matches. Skipped {skipped_count} non-relevant matches.")
+        return valid_count, skipped_count, synced
 
-        # Step 6: Construct Return Data
-        final_data = []
+    def refresh_players(self, players, count=DEFAULT_MATCH_COUNT, mastery=True, matchlist=True):
+        """
+        Refreshes already-resolved players without touching the account API.
+        players: [(puuid, platform), ...]. Used by RefreshScheduler for per-type refreshes.
+        Returns: (saved, skipped) match counts.
+        """
+        now = int(time.time())
+        all_match_ids = set()
+        listings = {}
+        for puuid, platform in players:
+            if mastery:
+                with self.metrics.timer('riot_fetch_phase_seconds', phase='mastery'):
+                    if self.update_player_mastery(puuid, platform):
+                        self.db.mark_refreshed(puuid, now, mastery=True)
+            if matchlist:
+                with self.metrics.timer('riot_fetch_phase_seconds', phase='matchlist'):
+                    listings[puuid] = self._list_matches(puuid, count, platform)
+                all_match_ids.update(listings[puuid][0] or [])
+
+        if not matchlist:
+            return 0, 0
+        saved, skipped, synced = self._ingest(all_match_ids, listings)
+        # Failed players stay stale, so the scheduler picks them up again
+        for puuid in synced:
+            self.db.mark_refreshed(puuid, now, matchlist=True)
+        return saved, skipped
+
+    def process_team(self, team_list, count=DEFAULT_MATCH_COUNT):
+        """Processes a single team. See process_teams."""
+        return self.process_teams([team_list], count=count)[0]
+
+    def process_teams(self, teams, count=DEFAULT_MATCH_COUNT):
+        """
+        Orchestrates Batch Processing for one or more teams:
+        1. Resolve all PUUIDs (each unique player once, even if on several teams).
+        2. Update Masteries.
+        3. Collect Match IDs (Latest `count` per player).
+        4. Deduplicate & Filter known matches.
+        5. Fetch Details -> CHECK GAMEMODE -> Save if valid.
+        Returns: one list of player data per team, in input order.
+        """
+        # Unique players across all teams
+        members = {}
+        for team_list in teams:
+            for member in team_list:
+                members.setdefault((member['name'].lower(), member['tag'].lower()), member)
+
+        self._players_done = itertools.count(1)
+        self._players_total = len(members)
+
+        # Steps 1-3 (async mode also prefetches new match details as each matchlist arrives)
+        prefetched = None
+        with self.metrics.timer('riot_fetch_phase_seconds', phase='collect'):
+            if self.async_client:
+                resolved, player_puuids, all_match_ids, listings, prefetched = asyncio.run(
+                    self._collect_async(members, count))
+            else:
+                resolved, player_puuids, all_match_ids, listings = self._collect(members, count)
+
+        # Steps 4-5
+        _, _, synced = self._ingest(all_match_ids, listings, prefetched)
+        now = int(time.time())
         for p in player_puuids:
-            pool = self.db.get_player_pool_champions(p['puuid'])
-            final_data.append({
-                "gameName": p['name'], 
-                "puuid": p['puuid'],
-                "pool": pool 
-            })
+            self.db.mark_refreshed(p['puuid'], now, mastery=p['mastery_ok'], matchlist=p['puuid'] in synced)
+
+        # Step 6: Construct Return Data
+        pools = {}
+        teams_data = []
+        for team_list in teams:
+            final_data = []
+            for member in team_list:
+                puuid = resolved.get((member['name'].lower(), member['tag'].lower()))
+                if not puuid:
+                    continue
+                if puuid not in pools:
+                    pools[puuid] = self.db.get_player_pool_champions(puuid)
+                final_data.append({
+                    "gameName": member['name'], 
+                    "puuid": puuid,
+                    "pool": set(pools[puuid]) # Callers may mutate their copy
+                })
+            teams_data.append(final_data)
             
-        return final_data
+        return teams_data
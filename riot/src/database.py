@@ -1,28 +1,164 @@
-
+import json
+import math
 import sqlite3
 import logging
+import threading
 import time
+import weakref
 from pathlib import Path
 from contextlib import contextmanager
-from .config import DB_PATH
+from .migrations import apply_migrations
+from .champion_catalog import reset_catalog
+from .metrics import get_metrics
+from .config import DB_PATH, MATCH_BATCH_SIZE, DB_JOURNAL_MODE, DB_SYNCHRONOUS, DB_STATEMENT_CACHE, DB_BUSY_TIMEOUT
+from .config import COMFORT_MASTERY_DEPTH, DECAY_HALF_LIFE_DAYS
 
 logger = logging.getLogger(__name__)
 
+# participant_stats column -> Match-V5 participant field, copied as-is
+PARTICIPANT_STAT_FIELDS = (
+    ('kills', 'kills'),
+    ('deaths', 'deaths'),
+    ('assists', 'assists'),
+    ('champ_level', 'champLevel'),
+    ('gold_earned', 'goldEarned'),
+    ('damage_to_champions', 'totalDamageDealtToChampions'),
+    ('damage_taken', 'totalDamageTaken'),
+    ('damage_to_buildings', 'damageDealtToBuildings'),
+    ('healing', 'totalHeal'),
+    ('cc_time', 'timeCCingOthers'),
+    ('vision_score', 'visionScore'),
+    ('wards_placed', 'wardsPlaced'),
+    ('wards_killed', 'wardsKilled'),
+)
+
+_STAT_COLUMNS = ('match_id', 'puuid', 'champion_id', 'team_id', 'role', 'win', 'queue_id', 'patch',
+                 'game_duration') + tuple(col for col, _ in PARTICIPANT_STAT_FIELDS) + (
+                 'cs', 'damage_share', 'kill_participation')
+
+
+def _patch(game_version):
+    """'15.23.712.2345' -> '15.23'"""
+    if not game_version:
+        return None
+    return '.'.join(game_version.split('.')[:2])
+
+
+def _participant_stat_rows(match_id, info):
+    """Typed participant_stats rows for one match, with team-relative shares computed here."""
+    participants = info.get('participants', [])
+    team_damage = {}
+    team_kills = {}
+    for p in participants:
+        team = p.get('teamId')
+        team_damage[team] = team_damage.get(team, 0) + (p.get('totalDamageDealtToChampions') or 0)
+        team_kills[team] = team_kills.get(team, 0) + (p.get('kills') or 0)
+
+    patch = _patch(info.get('gameVersion'))
+    rows = []
+    for p in participants:
+        team = p.get('teamId')
+        damage = p.get('totalDamageDealtToChampions') or 0
+        takedowns = (p.get('kills') or 0) + (p.get('assists') or 0)
+        rows.append((
+            match_id, p.get('puuid'), p.get('championId'), team, p.get('teamPosition', 'UNKNOWN'),
+            p.get('win'), info.get('queueId'), patch, info.get('gameDuration'),
+            *(p.get(field) for _, field in PARTICIPANT_STAT_FIELDS),
+            (p.get('totalMinionsKilled') or 0) + (p.get('neutralMinionsKilled') or 0),
+            damage / team_damage[team] if team_damage[team] else None,
+            takedowns / team_kills[team] if team_kills[team] else None,
+        ))
+    return rows
+
+
+def _exp(x):
+    # NULL in, NULL out, like SQLite's own exp()
+    return None if x is None else math.exp(x)
+
+
+class _Connection(sqlite3.Connection):
+    """Plain sqlite3 connection that can be weakly referenced (the C type can't)."""
+
+
 class RiotDatabase:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, persistent=True):
+        """
+        persistent=True keeps one long-lived connection per thread (WAL, tuned synchronous,
+        statement cache). persistent=False opens and closes a connection per call.
+        """
         self.db_path = db_path or DB_PATH
+        self.persistent = persistent
+        self._local = threading.local()
+        # Weak, so a connection is closed once the thread that owns it exits
+        self._conns = weakref.WeakSet()
+        self._conns_lock = threading.Lock()
         self.init_db()
 
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT, cached_statements=DB_STATEMENT_CACHE,
+                               factory=_Connection)
+        conn.execute(f'PRAGMA journal_mode={DB_JOURNAL_MODE}')
+        conn.execute(f'PRAGMA synchronous={DB_SYNCHRONOUS}')
+        # exp() is only built in with SQLITE_ENABLE_MATH_FUNCTIONS (missing on some Windows builds)
+        conn.create_function('exp', 1, _exp, deterministic=True)
+        return conn
+
+    def _thread_conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.add(conn)
+        return conn
+
+    def release_thread_conn(self):
+        """
+        Closes the calling thread's connection. For short-lived threads (one per request),
+        which would otherwise each keep a connection open until the thread is collected.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._conns_lock:
+            self._conns.discard(conn)
+        conn.close()
+
     @contextmanager
     def get_conn(self):
-        conn = sqlite3.connect(self.db_path)
+        """
+        Yields a connection. Callers commit their own writes; an exception rolls back
+        any open transaction so the shared connection is left clean.
+        """
+        if not self.persistent:
+            conn = self._connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        conn = self._thread_conn()
         try:
             yield conn
-        finally:
-            conn.close()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def close(self):
+        """Closes every long-lived connection opened by this instance."""
+        with self._conns_lock:
+            for conn in list(self._conns):
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    pass # Created in another thread that already exited
+            self._conns.clear()
+        self._local = threading.local()
 
     def init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_conn() as conn:
             cursor = conn.cursor()
             
             # Players Table
@@ -81,33 +217,105 @@ class RiotDatabase:
                     tags TEXT
                 )
             ''')
-            
+
             conn.commit()
 
+            # Columns, constraints and indexes added since the original schema
+            apply_migrations(conn)
+
     def get_player(self, game_name, tag_line):
-        """Find player by Name#Tag."""
+        """Find player by Name#Tag. Returns (puuid, last_updated, platform) or None."""
         with self.get_conn() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT puuid, last_updated FROM players WHERE lower(game_name) = ? AND lower(tag_line) = ?', 
+            cursor.execute('SELECT puuid, last_updated, platform FROM players WHERE lower(game_name) = ? AND lower(tag_line) = ?', 
                            (game_name.lower(), tag_line.lower()))
             return cursor.fetchone()
 
-    def save_player(self, puuid, game_name, tag_line):
-        """Update or Insert player."""
+    def save_player(self, puuid, game_name, tag_line, platform=None):
+        """Update or Insert player. A None platform keeps the stored one."""
         with self.get_conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO players (puuid, game_name, tag_line, last_updated)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO players (puuid, game_name, tag_line, last_updated, platform)
+                VALUES (?, ?, ?, ?, ?)
                 ON CONFLICT(puuid) DO UPDATE SET
                     game_name=excluded.game_name,
                     tag_line=excluded.tag_line,
-                    last_updated=excluded.last_updated
-            ''', (puuid, game_name, tag_line, int(time.time())))
+                    last_updated=excluded.last_updated,
+                    platform=COALESCE(excluded.platform, platform)
+            ''', (puuid, game_name, tag_line, int(time.time()), platform))
             conn.commit()
 
+    def set_player_platform(self, puuid, platform):
+        with self.get_conn() as conn:
+            conn.execute('UPDATE players SET platform = ? WHERE puuid = ?', (platform, puuid))
+            conn.commit()
+
+    def get_sync_state(self, puuid):
+        """Returns (synced_at, newest_match_id, depth) or None if never synced."""
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT synced_at, newest_match_id, depth FROM player_sync WHERE puuid = ?', (puuid,))
+            return cursor.fetchone()
+
+    def save_sync_state(self, puuid, synced_at, newest_match_id, depth):
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO player_sync (puuid, synced_at, newest_match_id, depth)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(puuid) DO UPDATE SET
+                    synced_at=excluded.synced_at,
+                    newest_match_id=excluded.newest_match_id,
+                    depth=excluded.depth
+            ''', (puuid, synced_at, newest_match_id, depth))
+            conn.commit()
+
+    def mark_refreshed(self, puuid, refreshed_at, mastery=False, matchlist=False):
+        """Records when a player's mastery and/or matchlist was last refreshed."""
+        with self.get_conn() as conn:
+            conn.execute('''
+                INSERT INTO player_refresh (puuid, mastery_at, matchlist_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(puuid) DO UPDATE SET
+                    mastery_at = COALESCE(excluded.mastery_at, mastery_at),
+                    matchlist_at = COALESCE(excluded.matchlist_at, matchlist_at)
+            ''', (puuid, refreshed_at if mastery else None, refreshed_at if matchlist else None))
+            conn.commit()
+
+    def record_queries(self, puuids):
+        """Counts a report/query for each player; the scheduler refreshes popular players first."""
+        now = int(time.time())
+        with self.get_conn() as conn:
+            conn.executemany('''
+                INSERT INTO player_refresh (puuid, query_count, last_queried)
+                VALUES (?, 1, ?)
+                ON CONFLICT(puuid) DO UPDATE SET
+                    query_count = query_count + 1,
+                    last_queried = excluded.last_queried
+            ''', [(puuid, now) for puuid in puuids])
+            conn.commit()
+
+    def get_refresh_candidates(self, recent_window=7 * 24 * 3600):
+        """
+        Every known player with their refresh state and recent activity.
+        Returns: [(puuid, game_name, tag_line, platform, last_updated, mastery_at, matchlist_at,
+                   query_count, recent_games), ...]  recent_games = games in the last `recent_window` seconds.
+        """
+        since_ms = int((time.time() - recent_window) * 1000)
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT p.puuid, p.game_name, p.tag_line, p.platform, p.last_updated,
+                       r.mastery_at, r.matchlist_at, COALESCE(r.query_count, 0),
+                       (SELECT COUNT(*) FROM match_participants mp JOIN matches m ON m.match_id = mp.match_id
+                        WHERE mp.puuid = p.puuid AND m.timestamp >= ?)
+                FROM players p LEFT JOIN player_refresh r ON r.puuid = p.puuid
+            ''', (since_ms,))
+            return cursor.fetchall()
+
     def save_mastery(self, puuid, mastery_list):
-        with sqlite3.connect(self.db_path) as conn:
+        with get_metrics().timer('riot_db_write_seconds', op='mastery'), self.get_conn() as conn:
             cursor = conn.cursor()
             # Clear old mastery for this player to avoid dupes/stale data
             cursor.execute('DELETE FROM player_mastery WHERE puuid = ?', (puuid,))
@@ -127,7 +335,7 @@ class RiotDatabase:
         if not match_ids_list:
             return set()
             
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_conn() as conn:
             cursor = conn.cursor()
             # Split into chunks if list is huge, but SQLite handles many params okay-ish.
             # Safer to verify one by one or in chunks? 
@@ -149,22 +357,40 @@ class RiotDatabase:
             return existing
 
     def save_match_details(self, details):
-        info = details.get('info', {})
-        meta = details.get('metadata', {})
-        match_id = meta.get('matchId')
-        
-        if not match_id:
-            return
+        """Saves a single match. See save_matches_batch."""
+        return self.save_matches_batch([details])
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+    def save_matches_batch(self, details_iter, batch_size=MATCH_BATCH_SIZE):
+        """
+        Bulk ingest of Match-V5 payloads.
+        Writes each batch of `batch_size` matches in one transaction with executemany.
+        Idempotent: re-ingesting a match never duplicates matches or participant rows.
+        Returns: number of payloads written.
+        """
+        saved = 0
+        batch = []
+        for details in details_iter:
+            batch.append(details)
+            if len(batch) >= batch_size:
+                saved += self._write_match_batch(batch)
+                batch = []
+        if batch:
+            saved += self._write_match_batch(batch)
+        return saved
+
+    def _write_match_batch(self, batch):
+        match_rows = []
+        participant_rows = []
+        stat_rows = []
+        for details in batch:
+            info = details.get('info', {})
+            meta = details.get('metadata', {})
+            match_id = meta.get('matchId')
             
-            # Insert Match
-            cursor.execute('''
-                INSERT OR IGNORE INTO matches 
-                (match_id, queue_id, game_mode, game_version, game_duration, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
+            if not match_id:
+                continue
+
+            match_rows.append((
                 match_id,
                 info.get('queueId'),
                 info.get('gameMode'),
@@ -173,11 +399,8 @@ class RiotDatabase:
                 info.get('gameCreation')
             ))
             
-            # Insert Participants
-            participants = info.get('participants', [])
-            p_data = []
-            for p in participants:
-                p_data.append((
+            for p in info.get('participants', []):
+                participant_rows.append((
                     match_id,
                     p.get('puuid'),
                     p.get('championId'),
@@ -185,28 +408,303 @@ class RiotDatabase:
                     p.get('teamId'),
                     p.get('teamPosition', 'UNKNOWN') # Capture Role/Lane
                 ))
-                
+            stat_rows.extend(_participant_stat_rows(match_id, info))
+
+        if not match_rows:
+            return 0
+
+        metrics = get_metrics()
+        with metrics.timer('riot_db_write_seconds', op='match_batch'), self.get_conn() as conn:
+            cursor = conn.cursor()
+            
+            # Insert Matches
+            cursor.executemany('''
+                INSERT OR IGNORE INTO matches 
+                (match_id, queue_id, game_mode, game_version, game_duration, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', match_rows)
+            
+            # Insert Participants (unique on match_id, puuid)
             cursor.executemany('''
-                INSERT INTO match_participants (match_id, puuid, champion_id, win, team_id, role)
+                INSERT OR IGNORE INTO match_participants (match_id, puuid, champion_id, win, team_id, role)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', p_data)
+            ''', participant_rows)
+
+            # Full stat block, one typed row per participant
+            cursor.executemany(f'''
+                INSERT OR IGNORE INTO participant_stats ({', '.join(_STAT_COLUMNS)})
+                VALUES ({', '.join('?' for _ in _STAT_COLUMNS)})
+            ''', stat_rows)
             
             conn.commit()
+        metrics.inc('riot_db_matches_written_total', len(match_rows))
+        return len(match_rows)
+
+    def delete_matches(self, match_ids):
+        """
+        Removes matches and all rows derived from them (aggregates follow via triggers).
+        Returns: number of matches removed.
+        """
+        ids = list(match_ids)
+        removed = 0
+        chunk_size = 900
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(ids), chunk_size):
+                chunk = ids[i:i+chunk_size]
+                placeholders = ','.join('?' for _ in chunk)
+                cursor.execute(f'DELETE FROM participant_stats WHERE match_id IN ({placeholders})', chunk)
+                cursor.execute(f'DELETE FROM match_participants WHERE match_id IN ({placeholders})', chunk)
+                cursor.execute(f'DELETE FROM matches WHERE match_id IN ({placeholders})', chunk)
+                removed += cursor.rowcount
+            conn.commit()
+        return removed
 
     def get_player_pool_champions(self, puuid):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_conn() as conn:
             cursor = conn.cursor()
             
             # Mastery Pool
             cursor.execute('SELECT champion_id FROM player_mastery WHERE puuid = ?', (puuid,))
             mastery_ids = {row[0] for row in cursor.fetchall()}
             
-            # Match History Pool
-            cursor.execute('SELECT champion_id FROM match_participants WHERE puuid = ?', (puuid,))
+            # Match History Pool (aggregate table, one row per champion played)
+            cursor.execute('SELECT champion_id FROM player_champion_stats WHERE puuid = ?', (puuid,))
             match_ids = {row[0] for row in cursor.fetchall()}
             
             return mastery_ids.union(match_ids)
 
+    def get_champion_counts(self, puuid, limit=None):
+        """
+        Games and wins per champion from the aggregate table, most played first.
+        Returns: [(champion_id, games, wins), ...]
+        """
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            query = '''
+                SELECT champion_id, games, wins
+                FROM player_champion_stats
+                WHERE puuid = ?
+                ORDER BY games DESC, champion_id
+            '''
+            params = (puuid,)
+            if limit:
+                query += ' LIMIT ?'
+                params = (puuid, limit)
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    def get_role_counts(self, puuid):
+        """Returns {role: games} for known roles (UNKNOWN/empty excluded)."""
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT role, games FROM player_role_stats WHERE puuid = ?', (puuid,))
+            return dict(cursor.fetchall())
+
+    def get_playstyle_profiles(self, puuids=None, now=None, half_life_days=DECAY_HALF_LIFE_DAYS,
+                               comfort_depth=COMFORT_MASTERY_DEPTH, limit=5):
+        """
+        Playstyle metrics and top lists for many players in two set-based queries
+        (all known players when puuids is None).
+
+        Every recorded game is weighted by exp(-ln2 * age / half_life), from matches.timestamp
+        (games without a timestamp count as new, weight 1).
+          - versatility:        distinct champions / games
+          - recent_versatility: each champion counts with the weight of its latest game, over the
+                                decayed game total; equals versatility when all games weigh the same
+          - comfort:            share of games on the player's top `comfort_depth` mastery champions,
+                                plain and decayed
+        Returns: {puuid: {'games', 'champions', 'comfort_games', 'versatility', 'recent_versatility',
+                          'comfort_percent', 'recent_comfort_percent',
+                          'mastery': [(champion_id, points)], 'most_played': [(champion_id, games)],
+                          'lanes': [(role, games)]}}
+        """
+        now_ms = int((now or time.time()) * 1000)
+        half_life_ms = half_life_days * 24 * 3600 * 1000
+        # One JSON parameter instead of one placeholder per player (no 999-variable limit)
+        targets = ('SELECT puuid FROM players' if puuids is None
+                   else 'SELECT value AS puuid FROM json_each(?)')
+        target_params = () if puuids is None else (json.dumps(list(puuids)),)
+
+        profiles = {}
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                WITH targets AS ({targets}),
+                comfort AS (
+                    SELECT puuid, champion_id FROM (
+                        SELECT pm.puuid, pm.champion_id,
+                               ROW_NUMBER() OVER (PARTITION BY pm.puuid ORDER BY pm.mastery_points DESC) AS pos
+                        FROM player_mastery pm JOIN targets t ON t.puuid = pm.puuid
+                    ) WHERE pos <= ?
+                ),
+                games AS (
+                    SELECT mp.puuid, mp.champion_id,
+                           exp(-0.6931471805599453 * MAX(? - COALESCE(m.timestamp, ?), 0) / ?) AS weight
+                    FROM match_participants mp
+                    JOIN targets t ON t.puuid = mp.puuid
+                    JOIN matches m ON m.match_id = mp.match_id
+                ),
+                champs AS (
+                    SELECT g.puuid, COUNT(*) AS games, SUM(g.weight) AS weight, MAX(g.weight) AS freshest,
+                           cf.champion_id IS NOT NULL AS is_comfort
+                    FROM games g LEFT JOIN comfort cf ON cf.puuid = g.puuid AND cf.champion_id = g.champion_id
+                    GROUP BY g.puuid, g.champion_id
+                )
+                SELECT puuid,
+                       SUM(games),
+                       COUNT(*),
+                       SUM(games * is_comfort),
+                       SUM(freshest) / SUM(weight),
+                       SUM(weight * is_comfort) / SUM(weight)
+                FROM champs
+                GROUP BY puuid
+            ''', target_params + (comfort_depth, now_ms, now_ms, half_life_ms))
+            for puuid, games, champions, comfort_games, recent_versatility, recent_comfort in cursor.fetchall():
+                profiles[puuid] = {
+                    'games': games,
+                    'champions': champions,
+                    'comfort_games': comfort_games,
+                    'versatility': champions / games,
+                    'recent_versatility': recent_versatility,
+                    'comfort_percent': comfort_games / games * 100,
+                    'recent_comfort_percent': recent_comfort * 100,
+                }
+
+            # Top lists for the report: ranked per player with window functions, one query for everyone
+            cursor.execute(f'''
+                WITH targets AS ({targets})
+                SELECT kind, puuid, key, value FROM (
+                    SELECT 'mastery' AS kind, pm.puuid, pm.champion_id AS key, pm.mastery_points AS value,
+                           ROW_NUMBER() OVER (PARTITION BY pm.puuid ORDER BY pm.mastery_points DESC) AS pos
+                    FROM player_mastery pm JOIN targets t ON t.puuid = pm.puuid
+                    UNION ALL
+                    SELECT 'most_played', s.puuid, s.champion_id, s.games,
+                           ROW_NUMBER() OVER (PARTITION BY s.puuid ORDER BY s.games DESC, s.champion_id)
+                    FROM player_champion_stats s JOIN targets t ON t.puuid = s.puuid
+                    UNION ALL
+                    SELECT 'lanes', r.puuid, r.role, r.games,
+                           ROW_NUMBER() OVER (PARTITION BY r.puuid ORDER BY r.games DESC, r.role)
+                    FROM player_role_stats r JOIN targets t ON t.puuid = r.puuid
+                )
+                WHERE kind = 'lanes' OR pos <= ?
+                ORDER BY puuid, kind, pos
+            ''', target_params + (limit,))
+            for kind, puuid, key, value in cursor.fetchall():
+                profile = profiles.setdefault(puuid, {
+                    'games': 0, 'champions': 0, 'comfort_games': 0, 'versatility': 0.0,
+                    'recent_versatility': 0.0, 'comfort_percent': 0.0, 'recent_comfort_percent': 0.0,
+                })
+                profile.setdefault(kind, []).append((key, value))
+
+        for profile in profiles.values():
+            for kind in ('mastery', 'most_played', 'lanes'):
+                profile.setdefault(kind, [])
+        return profiles
+
+    def get_champion_stat_averages(self, puuids, limit=None):
+        """
+        Per-champion averages from participant_stats for many players in one query.
+        Per-minute values use game_duration (seconds). limit keeps each player's most played.
+        Returns: {puuid: [{'champion_id', 'games', 'kda', 'cs_per_min', 'gold_per_min',
+                           'damage_per_min', 'vision_per_min', 'damage_share', 'kill_participation'}, ...]}
+                 most played first.
+        """
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM (
+                    SELECT puuid, champion_id,
+                           COUNT(*) AS games,
+                           (SUM(kills) + SUM(assists)) * 1.0 / MAX(SUM(deaths), 1),
+                           SUM(cs) * 60.0 / SUM(game_duration),
+                           SUM(gold_earned) * 60.0 / SUM(game_duration),
+                           SUM(damage_to_champions) * 60.0 / SUM(game_duration),
+                           SUM(vision_score) * 60.0 / SUM(game_duration),
+                           AVG(damage_share),
+                           AVG(kill_participation),
+                           ROW_NUMBER() OVER (PARTITION BY puuid ORDER BY COUNT(*) DESC, champion_id) AS pos
+                    FROM participant_stats
+                    WHERE puuid IN (SELECT value FROM json_each(?)) AND game_duration > 0
+                    GROUP BY puuid, champion_id
+                )
+                WHERE ? IS NULL OR pos <= ?
+                ORDER BY puuid, pos
+            ''', (json.dumps(list(puuids)), limit, limit))
+            keys = ('champion_id', 'games', 'kda', 'cs_per_min', 'gold_per_min',
+                    'damage_per_min', 'vision_per_min', 'damage_share', 'kill_participation')
+            averages = {}
+            for row in cursor.fetchall():
+                averages.setdefault(row[0], []).append(dict(zip(keys, row[1:-1])))
+            return averages
+
+    # --- Champion-pool similarity cache ---
+
+    def get_pool_entries(self):
+        """
+        Raw pool data for every known player (not opponents seen only in matches).
+        Returns: (played [(puuid, champion_id, games)], mastery [(puuid, champion_id, points)])
+        """
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT s.puuid, s.champion_id, s.games
+                FROM player_champion_stats s JOIN players p ON p.puuid = s.puuid
+                WHERE s.games > 0
+            ''')
+            played = cursor.fetchall()
+            cursor.execute('''
+                SELECT m.puuid, m.champion_id, m.mastery_points
+                FROM player_mastery m JOIN players p ON p.puuid = m.puuid
+                WHERE m.mastery_points > 0
+            ''')
+            return played, cursor.fetchall()
+
+    def get_similarity_dirty(self):
+        """Players whose pool changed since the similarity cache was last refreshed."""
+        with self.get_conn() as conn:
+            return {row[0] for row in conn.execute('SELECT puuid FROM similarity_dirty')}
+
+    def get_similarity_cache(self):
+        """Returns {puuid: {neighbor: score}} for every cached player."""
+        cache = {}
+        with self.get_conn() as conn:
+            for puuid, neighbor, score in conn.execute('SELECT puuid, neighbor, score FROM player_similarity'):
+                cache.setdefault(puuid, {})[neighbor] = score
+        return cache
+
+    def save_similarity(self, neighbors, cleared):
+        """
+        Replaces the cached neighbours of every player in `neighbors` ({puuid: [(neighbor, score)]})
+        and clears the dirty flags in `cleared` in one transaction.
+        """
+        with self.get_conn() as conn:
+            conn.executemany('DELETE FROM player_similarity WHERE puuid = ?', [(p,) for p in neighbors])
+            conn.executemany('INSERT INTO player_similarity (puuid, neighbor, score) VALUES (?, ?, ?)',
+                             [(p, n, score) for p, rows in neighbors.items() for n, score in rows])
+            conn.executemany('DELETE FROM similarity_dirty WHERE puuid = ?', [(p,) for p in cleared])
+            conn.commit()
+
+    def get_similar_players(self, puuid, limit=None):
+        """
+        Cached nearest neighbours of one player, most similar first.
+        Returns: [(puuid, game_name, tag_line, score), ...]
+        """
+        with self.get_conn() as conn:
+            cursor = conn.cursor()
+            query = '''
+                SELECT s.neighbor, p.game_name, p.tag_line, s.score
+                FROM player_similarity s JOIN players p ON p.puuid = s.neighbor
+                WHERE s.puuid = ?
+                ORDER BY s.score DESC, s.neighbor
+            '''
+            params = (puuid,)
+            if limit:
+                query += ' LIMIT ?'
+                params = (puuid, limit)
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
     def import_champions(self, json_path):
         import json
         with open(json_path, 'r', encoding='utf-8') as f:
@@ -222,16 +720,19 @@ class RiotDatabase:
             tags = ",".join(val.get('tags', []))
             insert_data.append((c_id, name, tags))
             
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_conn() as conn:
             cursor = conn.cursor()
             cursor.executemany('''
                 INSERT OR REPLACE INTO champions (champion_id, name, tags)
                 VALUES (?, ?, ?)
             ''', insert_data)
             conn.commit()
+
+        # Rebuild the in-memory catalog on next use
+        reset_catalog()
             
     def get_champion_name(self, champion_id):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_conn() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT name FROM champions WHERE champion_id = ?', (champion_id,))
             row = cursor.fetchone()
@@ -244,7 +745,7 @@ class RiotDatabase:
         if not champion_ids:
             return {}
             
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_conn() as conn:
             cursor = conn.cursor()
             ids = list(champion_ids)
             chunk_size = 900
@@ -0,0 +1,148 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from .config import MATCH_ARCHIVE_PATH, ARCHIVE_COMPRESSION_LEVEL, MATCH_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(details):
+    """Canonical JSON bytes, so identical payloads hash the same."""
+    return json.dumps(details, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+class MatchArchive:
+    """
+    Raw Match-V5 payloads, zlib-compressed and content-addressed (sha256 of the
+    canonical JSON), in their own SQLite file next to scout.db.
+
+    scout.db only keeps what the current schema extracts; the archive keeps
+    everything, so tables can be re-derived after a schema change
+    (DataFetcher.rebuild_from_archive) without calling the API.
+    """
+    def __init__(self, path=None, level=ARCHIVE_COMPRESSION_LEVEL):
+        self.path = path or MATCH_ARCHIVE_PATH
+        self.level = level
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    raw_size INTEGER,
+                    data BLOB
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS archived_matches (
+                    match_id TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    archived_at REAL
+                ) WITHOUT ROWID
+            ''')
+
+    def _conn(self):
+        # sqlite3 connections are per-thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def put_many(self, items):
+        """
+        Archives [(match_id, details), ...] in one transaction.
+        Payloads already stored (same hash) are not written twice.
+        Returns: number of match ids archived.
+        """
+        blob_rows = []
+        match_rows = []
+        now = time.time()
+        for match_id, details in items:
+            raw = _encode(details)
+            digest = hashlib.sha256(raw).hexdigest()
+            blob_rows.append((digest, len(raw), zlib.compress(raw, self.level)))
+            match_rows.append((match_id, digest, now))
+        if not match_rows:
+            return 0
+
+        with self._conn() as conn:
+            conn.executemany('INSERT OR IGNORE INTO blobs (sha256, raw_size, data) VALUES (?, ?, ?)', blob_rows)
+            conn.executemany('''
+                INSERT OR REPLACE INTO archived_matches (match_id, sha256, archived_at) VALUES (?, ?, ?)
+            ''', match_rows)
+        return len(match_rows)
+
+    def put(self, match_id, details):
+        return self.put_many([(match_id, details)])
+
+    def get(self, match_id):
+        """Returns the decoded payload or None."""
+        return self.get_many([match_id]).get(match_id)
+
+    def get_many(self, match_ids):
+        """Returns {match_id: details} for the ids present in the archive."""
+        ids = list(match_ids)
+        found = {}
+        conn = self._conn()
+        chunk_size = 900
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i+chunk_size]
+            placeholders = ','.join('?' for _ in chunk)
+            rows = conn.execute(f'''
+                SELECT m.match_id, b.data
+                FROM archived_matches m JOIN blobs b ON b.sha256 = m.sha256
+                WHERE m.match_id IN ({placeholders})
+            ''', chunk)
+            for match_id, data in rows:
+                found[match_id] = json.loads(zlib.decompress(data))
+        return found
+
+    def contains_many(self, match_ids):
+        """Returns the subset of match_ids that are archived."""
+        ids = list(match_ids)
+        found = set()
+        conn = self._conn()
+        chunk_size = 900
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i+chunk_size]
+            placeholders = ','.join('?' for _ in chunk)
+            rows = conn.execute(f'SELECT match_id FROM archived_matches WHERE match_id IN ({placeholders})', chunk)
+            found.update(row[0] for row in rows)
+        return found
+
+    def iter_matches(self, batch_size=MATCH_BATCH_SIZE):
+        """Yields (match_id, details) for every archived match, reading batch_size rows at a time."""
+        cursor = self._conn().execute('''
+            SELECT m.match_id, b.data
+            FROM archived_matches m JOIN blobs b ON b.sha256 = m.sha256
+            ORDER BY m.match_id
+        ''')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for match_id, data in rows:
+                yield match_id, json.loads(zlib.decompress(data))
+
+    def stats(self):
+        """Returns {'matches', 'blobs', 'raw_bytes', 'stored_bytes'}."""
+        conn = self._conn()
+        matches = conn.execute('SELECT COUNT(*) FROM archived_matches').fetchone()[0]
+        blobs, raw, stored = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs'
+        ).fetchone()
+        return {'matches': matches, 'blobs': blobs, 'raw_bytes': raw, 'stored_bytes': stored}
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
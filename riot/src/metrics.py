@@ -0,0 +1,147 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Latency buckets in seconds (upper bounds), shared by every histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets) # per bucket, not cumulative
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (None if empty)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """
+    In-process counters and latency histograms, labelled like Prometheus metrics.
+
+    Instrumented code calls inc() / observe() / timer(); exports are a JSON-ready
+    snapshot() or Prometheus text (to_prometheus()). Thread-safe and cheap enough
+    to stay on for every run.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}   # name -> {label_key: value}
+        self._histograms = {} # name -> {label_key: _Histogram}
+
+    def inc(self, name, value=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(self.buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes the wall time of the block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """
+        Returns {'counters': {name: [{'labels', 'value'}]},
+                 'histograms': {name: [{'labels', 'count', 'sum', 'p50', 'p95', 'buckets'}]}}
+        """
+        with self._lock:
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in sorted(series.items())]
+                for name, series in sorted(self._counters.items())
+            }
+            histograms = {
+                name: [{
+                    'labels': dict(key),
+                    'count': hist.count,
+                    'sum': hist.sum,
+                    'p50': hist.quantile(0.5),
+                    'p95': hist.quantile(0.95),
+                    'buckets': {str(bound): total for bound, total in hist.cumulative()},
+                } for key, hist in sorted(series.items())]
+                for name, series in sorted(self._histograms.items())
+            }
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent, default=str)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f'# TYPE {name} counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{name}{_format_labels(key)} {value}')
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f'# TYPE {name} histogram')
+                for key, hist in sorted(series.items()):
+                    for bound, total in hist.cumulative():
+                        lines.append(f'{name}_bucket{_format_labels(key, [("le", bound)])} {total}')
+                    lines.append(f'{name}_bucket{_format_labels(key, [("le", "+Inf")])} {hist.count}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {hist.sum}')
+                    lines.append(f'{name}_count{_format_labels(key)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Returns the process-wide registry used by the client, database and fetcher."""
+    return _metrics
@@ -0,0 +1,260 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Schema migrations for scout.db.
+# The applied version is stored in PRAGMA user_version. Each migration runs once,
+# in its own transaction, and must cope with DBs created by any older init_db.
+# To change the schema, append a new function to MIGRATIONS - never edit old ones.
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_participant_role(conn):
+    """Lane/role column (previously added by ext_utils/reset_db.py)."""
+    if 'role' not in _columns(conn, 'match_participants'):
+        conn.execute('ALTER TABLE match_participants ADD COLUMN role TEXT')
+
+
+def _unique_participants(conn):
+    """One row per player per match, so re-ingesting a match is a no-op."""
+    conn.execute('''
+        DELETE FROM match_participants WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM match_participants GROUP BY match_id, puuid
+        )
+    ''')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_participants_match_puuid ON match_participants (match_id, puuid)')
+
+
+def _hot_query_indexes(conn):
+    """Indexes for the per-player lookups used by the fetcher, analyzer and rankings."""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_participants_puuid_champion ON match_participants (puuid, champion_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_participants_puuid_role ON match_participants (puuid, role)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_mastery_puuid_points ON player_mastery (puuid, mastery_points DESC)')
+    # Matches get_player's lower(game_name) = ? AND lower(tag_line) = ?
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_players_name_lower ON players (lower(game_name), lower(tag_line))')
+
+
+def _player_sync_state(conn):
+    """Per-player matchlist high-water mark for incremental sync."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_sync (
+            puuid TEXT PRIMARY KEY,
+            synced_at INTEGER,
+            newest_match_id TEXT,
+            depth INTEGER,
+            FOREIGN KEY(puuid) REFERENCES players(puuid)
+        )
+    ''')
+
+
+def _player_aggregates(conn):
+    """Per-player champion and role aggregates, maintained by triggers on match_participants."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_champion_stats (
+            puuid TEXT,
+            champion_id INTEGER,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (puuid, champion_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_role_stats (
+            puuid TEXT,
+            role TEXT,
+            games INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (puuid, role)
+        ) WITHOUT ROWID
+    ''')
+
+    # Ignored duplicate inserts don't fire AFTER INSERT, so re-ingesting a match is still a no-op
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_participants_stats_insert AFTER INSERT ON match_participants
+        BEGIN
+            INSERT INTO player_champion_stats (puuid, champion_id, games, wins)
+            VALUES (NEW.puuid, NEW.champion_id, 1, COALESCE(NEW.win, 0))
+            ON CONFLICT (puuid, champion_id) DO UPDATE SET
+                games = games + 1,
+                wins = wins + excluded.wins;
+
+            INSERT INTO player_role_stats (puuid, role, games, wins)
+            SELECT NEW.puuid, TRIM(NEW.role), 1, COALESCE(NEW.win, 0)
+            WHERE NEW.role IS NOT NULL AND TRIM(NEW.role) NOT IN ('', 'UNKNOWN')
+            ON CONFLICT (puuid, role) DO UPDATE SET
+                games = games + 1,
+                wins = wins + excluded.wins;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_participants_stats_delete AFTER DELETE ON match_participants
+        BEGIN
+            UPDATE player_champion_stats
+            SET games = games - 1, wins = wins - COALESCE(OLD.win, 0)
+            WHERE puuid = OLD.puuid AND champion_id = OLD.champion_id;
+            DELETE FROM player_champion_stats
+            WHERE puuid = OLD.puuid AND champion_id = OLD.champion_id AND games <= 0;
+
+            UPDATE player_role_stats
+            SET games = games - 1, wins = wins - COALESCE(OLD.win, 0)
+            WHERE puuid = OLD.puuid AND role = TRIM(OLD.role);
+            DELETE FROM player_role_stats
+            WHERE puuid = OLD.puuid AND role = TRIM(OLD.role) AND games <= 0;
+        END
+    ''')
+
+    # Backfill from existing history
+    conn.execute('DELETE FROM player_champion_stats')
+    conn.execute('DELETE FROM player_role_stats')
+    conn.execute('''
+        INSERT INTO player_champion_stats (puuid, champion_id, games, wins)
+        SELECT puuid, champion_id, COUNT(*), SUM(COALESCE(win, 0))
+        FROM match_participants
+        GROUP BY puuid, champion_id
+    ''')
+    conn.execute('''
+        INSERT INTO player_role_stats (puuid, role, games, wins)
+        SELECT puuid, TRIM(role), COUNT(*), SUM(COALESCE(win, 0))
+        FROM match_participants
+        WHERE role IS NOT NULL AND TRIM(role) NOT IN ('', 'UNKNOWN')
+        GROUP BY puuid, TRIM(role)
+    ''')
+
+
+def _participant_stats(conn):
+    """Typed per-participant stat table (KDA, gold, CS, damage, vision) for analytics."""
+    # Only matches ingested from now on are filled; older rows have no raw payload to derive from
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS participant_stats (
+            match_id TEXT NOT NULL,
+            puuid TEXT NOT NULL,
+            champion_id INTEGER NOT NULL,
+            team_id INTEGER,
+            role TEXT,
+            win INTEGER,
+            queue_id INTEGER,
+            patch TEXT,
+            game_duration INTEGER,
+            kills INTEGER,
+            deaths INTEGER,
+            assists INTEGER,
+            champ_level INTEGER,
+            gold_earned INTEGER,
+            cs INTEGER,
+            damage_to_champions INTEGER,
+            damage_taken INTEGER,
+            damage_to_buildings INTEGER,
+            healing INTEGER,
+            cc_time INTEGER,
+            vision_score INTEGER,
+            wards_placed INTEGER,
+            wards_killed INTEGER,
+            damage_share REAL,
+            kill_participation REAL,
+            PRIMARY KEY (match_id, puuid)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_participant_stats_puuid_champion ON participant_stats (puuid, champion_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_participant_stats_champion ON participant_stats (champion_id, patch)')
+
+
+def _player_platform(conn):
+    """Player shard (na1, euw1, ...) for per-player region routing."""
+    if 'platform' not in _columns(conn, 'players'):
+        conn.execute('ALTER TABLE players ADD COLUMN platform TEXT')
+
+
+def _player_refresh(conn):
+    """Per-player, per-data-type refresh times and query counts for the refresh scheduler."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_refresh (
+            puuid TEXT PRIMARY KEY,
+            mastery_at INTEGER,
+            matchlist_at INTEGER,
+            query_count INTEGER NOT NULL DEFAULT 0,
+            last_queried INTEGER,
+            FOREIGN KEY(puuid) REFERENCES players(puuid)
+        )
+    ''')
+    # Best known times for existing players: mastery was fetched with the account, matchlists at the last sync
+    conn.execute('''
+        INSERT OR IGNORE INTO player_refresh (puuid, mastery_at, matchlist_at)
+        SELECT p.puuid, CAST(p.last_updated AS INTEGER), s.synced_at
+        FROM players p LEFT JOIN player_sync s ON s.puuid = p.puuid
+    ''')
+
+
+def _pool_similarity(conn):
+    """Cached nearest neighbours by champion pool, with dirty tracking for incremental recompute."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS player_similarity (
+            puuid TEXT,
+            neighbor TEXT,
+            score REAL NOT NULL,
+            PRIMARY KEY (puuid, neighbor)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE TABLE IF NOT EXISTS similarity_dirty (puuid TEXT PRIMARY KEY) WITHOUT ROWID')
+
+    # Any change to a known player's pool (ingest, rebuild, mastery refresh) flags them for recompute.
+    # Opponents from match payloads aren't in players and are skipped.
+    for table, events in (('player_champion_stats', ('INSERT', 'UPDATE', 'DELETE')),
+                          ('player_mastery', ('INSERT', 'UPDATE', 'DELETE'))):
+        for event in events:
+            row = 'OLD' if event == 'DELETE' else 'NEW'
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_similarity_{event.lower()} AFTER {event} ON {table}
+                WHEN EXISTS (SELECT 1 FROM players WHERE puuid = {row}.puuid)
+                BEGIN
+                    -- Upsert, not OR IGNORE: the outer statement's conflict policy would override that
+                    INSERT INTO similarity_dirty (puuid) VALUES ({row}.puuid) ON CONFLICT (puuid) DO NOTHING;
+                END
+            ''')
+
+    # Everything starts dirty, so the first refresh is a full pass
+    conn.execute('INSERT OR IGNORE INTO similarity_dirty (puuid) SELECT puuid FROM players')
+
+
+MIGRATIONS = [
+    _add_participant_role,    # 1
+    _unique_participants,     # 2
+    _hot_query_indexes,       # 3
+    _player_sync_state,       # 4
+    _player_aggregates,       # 5
+    _participant_stats,       # 6
+    _player_platform,         # 7
+    _player_refresh,          # 8
+    _pool_similarity,         # 9
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn):
+    """
+    Brings the schema up to SCHEMA_VERSION.
+    Returns: list of applied version numbers.
+    """
+    current = get_version(conn)
+    applied = []
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        logger.info(f"Applying DB migration {version}: {migration.__doc__}")
+        try:
+            conn.execute('BEGIN')
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
@@ -0,0 +1,214 @@
+import os
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from collections import defaultdict
+from .config import PARQUET_EXPORT_PATH, PARQUET_COMPRESSION, PARQUET_EXPORT_CHUNK
+from .database import _patch, _STAT_COLUMNS
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Partition columns live in the directory names (hive style), not inside the files
+PARTITION_KEYS = ('patch', 'queue_id')
+
+# Column types per dataset: 'str', 'int', 'float' or 'bool'
+MATCH_COLUMNS = (
+    ('match_id', 'str'), ('game_mode', 'str'), ('game_version', 'str'),
+    ('game_duration', 'int'), ('timestamp', 'int'),
+)
+PARTICIPANT_COLUMNS = (
+    ('match_id', 'str'), ('puuid', 'str'), ('champion_id', 'int'), ('win', 'bool'),
+    ('team_id', 'int'), ('role', 'str'), ('timestamp', 'int'),
+)
+STAT_COLUMNS = tuple(
+    (col, 'str' if col in ('match_id', 'puuid', 'role') else
+          'bool' if col == 'win' else
+          'float' if col in ('damage_share', 'kill_participation') else 'int')
+    for col in _STAT_COLUMNS if col not in PARTITION_KEYS
+)
+MASTERY_COLUMNS = (('puuid', 'str'), ('champion_id', 'int'), ('mastery_points', 'int'), ('rank', 'int'))
+CHAMPION_COLUMNS = (('champion_id', 'int'), ('name', 'str'), ('tags', 'str'))
+
+
+def _require_pyarrow():
+    """pyarrow is only needed for exports, so it is imported on first use."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow, which is not installed. Run: pip install pyarrow") from None
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetExporter:
+    """
+    Mirrors scout.db into a Parquet dataset for columnar engines (DuckDB, Polars, pyarrow).
+
+        <root>/matches/patch=15.23/queue_id=420/part-<run>-<n>.parquet
+        <root>/match_participants/...      same partitioning
+        <root>/participant_stats/...       same partitioning
+        <root>/player_mastery/data.parquet   snapshot, replaced every run
+        <root>/champions/data.parquet        snapshot, replaced every run
+
+    Match data is append-only: a manifest (SQLite, in the export root) lists every exported
+    match and part file. Re-runs attach it to scout.db and export only the matches missing
+    from it, in one anti-join. Part files a crashed run left behind (not in the manifest)
+    are deleted on the next run. Matches later deleted from scout.db stay in the export.
+
+    Readers should declare the partition types, e.g. with pyarrow:
+        ds.dataset(root + '/participant_stats', format='parquet', partitioning=ds.partitioning(
+            pa.schema([('patch', pa.string()), ('queue_id', pa.int32())]), flavor='hive'))
+    """
+    def __init__(self, db, root=None, compression=PARQUET_COMPRESSION, chunk=PARQUET_EXPORT_CHUNK):
+        self.pa, self.pq = _require_pyarrow()
+        self.db = db
+        self.root = Path(root or PARQUET_EXPORT_PATH)
+        self.compression = compression
+        self.chunk = chunk
+        self.manifest_path = self.root / '_manifest.db'
+        self.metrics = get_metrics()
+        self.root.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(self.manifest_path) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS exported_matches (match_id TEXT PRIMARY KEY) WITHOUT ROWID')
+            conn.execute('CREATE TABLE IF NOT EXISTS parts (path TEXT PRIMARY KEY, rows INTEGER, exported_at REAL) WITHOUT ROWID')
+
+    # --- Files ---
+
+    def _schema(self, columns):
+        types = {'str': self.pa.string(), 'int': self.pa.int64(), 'float': self.pa.float64(), 'bool': self.pa.bool_()}
+        return self.pa.schema([(name, types[kind]) for name, kind in columns])
+
+    def _write(self, path, columns, rows):
+        """Writes rows (tuples in `columns` order) to `path` via a temp file, so readers never see half a file."""
+        names = [name for name, _ in columns]
+        data = {name: [row[i] for row in rows] for i, name in enumerate(names)}
+        table = self.pa.Table.from_pydict(data, schema=self._schema(columns))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        self.pq.write_table(table, tmp, compression=self.compression)
+        os.replace(tmp, path)
+
+    def _remove_orphans(self, known):
+        """Deletes part files (and temp files) that aren't in the manifest."""
+        removed = 0
+        for dataset in ('matches', 'match_participants', 'participant_stats'):
+            for path in (self.root / dataset).rglob('part-*'):
+                if path.relative_to(self.root).as_posix() not in known:
+                    path.unlink()
+                    removed += 1
+        if removed:
+            logger.warning(f"Removed {removed} Parquet files left by an interrupted export")
+
+    # --- Export ---
+
+    def _partitioned(self, rows, key_of):
+        """Groups rows by (patch, queue_id) partition."""
+        groups = defaultdict(list)
+        for row in rows:
+            groups[key_of(row)].append(row)
+        return groups
+
+    def _export_chunk(self, conn, match_ids, run_id, chunk_no):
+        """Exports one batch of new matches. Returns: {dataset: rows} and the part files written."""
+        conn.execute('DELETE FROM temp.export_batch')
+        conn.executemany('INSERT INTO temp.export_batch (match_id) VALUES (?)', [(m,) for m in match_ids])
+
+        # 1. Partition of every match in the batch
+        matches = conn.execute('''
+            SELECT m.match_id, m.game_mode, m.game_version, m.game_duration, m.timestamp, m.queue_id
+            FROM matches m JOIN temp.export_batch b ON b.match_id = m.match_id
+        ''').fetchall()
+        partition = {row[0]: (_patch(row[2]) or 'unknown', row[5] if row[5] is not None else -1) for row in matches}
+
+        # 2. Rows per dataset (the partition columns are dropped from the file contents)
+        participants = conn.execute('''
+            SELECT mp.match_id, mp.puuid, mp.champion_id, mp.win, mp.team_id, mp.role, m.timestamp
+            FROM match_participants mp
+            JOIN temp.export_batch b ON b.match_id = mp.match_id
+            JOIN matches m ON m.match_id = mp.match_id
+        ''').fetchall()
+        stat_names = [name for name, _ in STAT_COLUMNS]
+        stats = conn.execute(f'''
+                SELECT {', '.join('ps.' + name for name in stat_names)}
+                FROM participant_stats ps JOIN temp.export_batch b ON b.match_id = ps.match_id
+            ''').fetchall()
+
+        datasets = (
+            ('matches', MATCH_COLUMNS, [row[:5] for row in matches]),
+            ('match_participants', PARTICIPANT_COLUMNS,
+             [row[:3] + (bool(row[3]) if row[3] is not None else None,) + row[4:] for row in participants]),
+            ('participant_stats', STAT_COLUMNS,
+             [tuple(bool(v) if name == 'win' and v is not None else v for name, v in zip(stat_names, row))
+              for row in stats]),
+        )
+
+        # 3. One part file per dataset and partition
+        counts = {}
+        parts = []
+        for dataset, columns, rows in datasets:
+            counts[dataset] = len(rows)
+            for (patch, queue_id), group in self._partitioned(rows, lambda r: partition[r[0]]).items():
+                rel = f"{dataset}/patch={patch}/queue_id={queue_id}/part-{run_id}-{chunk_no:04d}.parquet"
+                self._write(self.root / rel, columns, group)
+                parts.append((rel, len(group)))
+        return counts, parts
+
+    def export_matches(self):
+        """
+        Appends every match not exported yet.
+        Returns: {dataset: rows written}
+        """
+        totals = defaultdict(int)
+        run_id = time.time_ns() # Unique per run, even for two exports in the same second
+        with self.db.get_conn() as conn:
+            conn.commit() # ATTACH can't run inside a transaction
+            conn.execute('ATTACH DATABASE ? AS export', (str(self.manifest_path),))
+            try:
+                self._remove_orphans({row[0] for row in conn.execute('SELECT path FROM export.parts')})
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS export_batch (match_id TEXT PRIMARY KEY)')
+
+                # 1. Everything in scout.db the manifest doesn't list yet, oldest first
+                new_ids = [row[0] for row in conn.execute('''
+                    SELECT m.match_id FROM matches m
+                    WHERE NOT EXISTS (SELECT 1 FROM export.exported_matches e WHERE e.match_id = m.match_id)
+                    ORDER BY m.timestamp, m.match_id
+                ''')]
+                logger.info(f"Parquet export: {len(new_ids)} new matches")
+
+                # 2. Files first, then the manifest: a crash in between leaves orphans, never gaps
+                for chunk_no, start in enumerate(range(0, len(new_ids), self.chunk)):
+                    batch = new_ids[start:start + self.chunk]
+                    with self.metrics.timer('riot_export_seconds', dataset='matches'):
+                        counts, parts = self._export_chunk(conn, batch, run_id, chunk_no)
+                    conn.executemany('INSERT OR IGNORE INTO export.exported_matches (match_id) VALUES (?)',
+                                     [(m,) for m in batch])
+                    conn.executemany('INSERT OR REPLACE INTO export.parts (path, rows, exported_at) VALUES (?, ?, ?)',
+                                     [(rel, rows, time.time()) for rel, rows in parts])
+                    conn.commit()
+                    for dataset, rows in counts.items():
+                        totals[dataset] += rows
+                        self.metrics.inc('riot_export_rows_total', rows, dataset=dataset)
+            finally:
+                conn.rollback()
+                conn.execute('DETACH DATABASE export')
+        return dict(totals)
+
+    def export_snapshots(self):
+        """Rewrites the small, mutable tables (mastery, champions) in full. Returns: {dataset: rows}"""
+        counts = {}
+        with self.db.get_conn() as conn:
+            for dataset, table, columns in (('player_mastery', 'player_mastery', MASTERY_COLUMNS),
+                                            ('champions', 'champions', CHAMPION_COLUMNS)):
+                rows = conn.execute(f"SELECT {', '.join(name for name, _ in columns)} FROM {table}").fetchall()
+                with self.metrics.timer('riot_export_seconds', dataset=dataset):
+                    self._write(self.root / dataset / 'data.parquet', columns, rows)
+                counts[dataset] = len(rows)
+        return counts
+
+    def export(self):
+        """Incremental match export plus fresh snapshots. Returns: {dataset: rows written}"""
+        counts = self.export_matches()
+        counts.update(self.export_snapshots())
+        return counts
@@ -0,0 +1,128 @@
+import heapq
+import math
+import logging
+from collections import defaultdict
+from .config import SIMILARITY_WEIGHTS, SIMILARITY_NEIGHBORS
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def build_vectors(played, mastery, weights=None):
+    """
+    Sparse player x champion matrix as {puuid: {champion_id: weight}}, each row unit length.
+    A row mixes the player's share of recorded games and share of mastery points per champion,
+    so a one-trick and a player with the same main but a wide pool still come out different.
+    """
+    weights = weights or SIMILARITY_WEIGHTS
+    rows = defaultdict(dict)
+    for source, entries in (('played', played), ('mastery', mastery)):
+        totals = defaultdict(float)
+        for puuid, _, value in entries:
+            totals[puuid] += value
+        for puuid, c_id, value in entries:
+            row = rows[puuid]
+            row[c_id] = row.get(c_id, 0.0) + weights[source] * value / totals[puuid]
+
+    vectors = {}
+    for puuid, row in rows.items():
+        norm = math.sqrt(sum(w * w for w in row.values()))
+        if norm > 0:
+            vectors[puuid] = {c_id: w / norm for c_id, w in row.items()}
+    return vectors
+
+
+class PoolSimilarity:
+    """
+    Cosine similarity between the champion pools of all known players.
+
+    Rows are unit vectors, so cosine is a dot product. Scores for a player come from one
+    pass over the champion postings (the column index of the sparse matrix): only players
+    sharing at least one champion are touched, never the full N x N grid.
+
+    The top neighbours per player are cached in player_similarity. Triggers flag a player
+    in similarity_dirty whenever their aggregates or mastery change, and refresh() only
+    recomputes dirty players plus those whose cached list contains one.
+    """
+    def __init__(self, db, weights=None, neighbors=SIMILARITY_NEIGHBORS):
+        self.db = db
+        self.weights = weights or SIMILARITY_WEIGHTS
+        self.neighbors = neighbors
+        self.metrics = get_metrics()
+
+    def _load(self):
+        """Vectors plus the column index: {champion_id: [(row, weight)]}, rows numbered for list access."""
+        played, mastery = self.db.get_pool_entries()
+        vectors = build_vectors(played, mastery, self.weights)
+        self._puuids = list(vectors)
+        self._rows = {puuid: i for i, puuid in enumerate(self._puuids)}
+        postings = defaultdict(list)
+        for puuid, row in vectors.items():
+            i = self._rows[puuid]
+            for c_id, w in row.items():
+                postings[c_id].append((i, w))
+        return vectors, postings
+
+    def _scores(self, puuid, vectors, postings):
+        """Dot products of one row with every overlapping row: {other_puuid: cosine}."""
+        # A flat list accumulator indexed by row is much cheaper than a dict keyed by puuid
+        acc = [0.0] * len(self._puuids)
+        for c_id, w in vectors[puuid].items():
+            for j, other_w in postings[c_id]:
+                acc[j] += w * other_w
+        acc[self._rows[puuid]] = 0.0
+        return {self._puuids[j]: score for j, score in enumerate(acc) if score > 0}
+
+    def _top(self, scores):
+        return heapq.nlargest(self.neighbors, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def refresh(self, full=False):
+        """
+        Brings the neighbour cache up to date.
+        Returns: number of players whose neighbour list was recomputed.
+        """
+        with self.metrics.timer('riot_similarity_refresh_seconds', full=str(full).lower()):
+            # 1. What changed (read first, so the loaded pools are at least this new)
+            dirty = self.db.get_similarity_dirty()
+            if not dirty and not full:
+                return 0
+            vectors, postings = self._load()
+            cache = self.db.get_similarity_cache()
+
+            # 2. Rows to recompute: changed players, and players that list one as a neighbour
+            #    (their old score, or its place in the top list, may no longer hold)
+            if full:
+                affected = set(vectors) | dirty | set(cache)
+            else:
+                affected = set(dirty)
+                affected.update(p for p, cached in cache.items() if not dirty.isdisjoint(cached))
+
+            updated = {}
+            for puuid in affected:
+                updated[puuid] = self._top(self._scores(puuid, vectors, postings)) if puuid in vectors else []
+
+            # 3. Everyone else keeps their list; a changed player can only enter it
+            if not full and not affected.issuperset(vectors):
+                for d in dirty:
+                    if d not in vectors:
+                        continue
+                    for other, score in self._scores(d, vectors, postings).items():
+                        if other in affected:
+                            continue
+                        current = cache.setdefault(other, {})
+                        if len(current) < self.neighbors or score > min(current.values()):
+                            current[d] = score
+                            updated[other] = self._top(current)
+
+            self.db.save_similarity(updated, dirty)
+        logger.info(f"Similarity cache: {len(updated)} players recomputed ({len(dirty)} changed, {len(vectors)} total)")
+        return len(updated)
+
+    def similar(self, puuid, limit=None):
+        """
+        Nearest neighbours of one player from the cache (refreshed first if anything changed).
+        Returns: [{'puuid', 'name', 'score'}, ...] most similar first.
+        """
+        self.refresh()
+        return [{'puuid': other, 'name': f"{name}#{tag}", 'score': score}
+                for other, name, tag, score in self.db.get_similar_players(puuid, limit or self.neighbors)]
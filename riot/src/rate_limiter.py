@@ -0,0 +1,159 @@
+import time
+import logging
+import threading
+from collections import deque
+from .config import RATE_LIMITS
+
+logger = logging.getLogger(__name__)
+
+# Extra seconds added to every window. Riot starts its windows when the request
+# arrives, so a small pad absorbs network jitter and keeps us clear of 429s.
+WINDOW_MARGIN = 0.05
+
+
+def parse_limit_header(value):
+    """
+    Parses a Riot rate-limit header such as "20:1,100:120".
+    Returns: [(count, window_seconds), ...]
+    """
+    pairs = []
+    if not value:
+        return pairs
+    for part in value.split(','):
+        try:
+            count, window = part.strip().split(':')
+            pairs.append((int(count), int(window)))
+        except ValueError:
+            continue
+    return pairs
+
+
+class _Bucket:
+    """
+    One (limit, window) budget. Keeps a log of send times so we know exactly
+    when the next slot frees up instead of guessing with fixed sleeps.
+    """
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.sent = deque()
+
+    def _expire(self, now):
+        span = self.window + WINDOW_MARGIN
+        while self.sent and now - self.sent[0] >= span:
+            self.sent.popleft()
+
+    def wait_time(self, now):
+        """Seconds until one more request fits in this bucket."""
+        self._expire(now)
+        if len(self.sent) < self.limit:
+            return 0
+        return self.window + WINDOW_MARGIN - (now - self.sent[-self.limit])
+
+    def reserve(self, now):
+        self.sent.append(now)
+
+    def sync(self, server_count, now):
+        """
+        Reconciles with the server's count (e.g. other processes using the same key).
+        We only ever add entries; trusting a lower server count could cause a 429.
+        """
+        self._expire(now)
+        missing = server_count - len(self.sent)
+        for _ in range(missing):
+            self.sent.append(now)
+
+
+class RateLimiter:
+    """
+    Client-side limiter for the Riot API.
+
+    Application limits are tracked per routing host (e.g. americas, na1) and
+    method limits per (host, method). Limits start from config.RATE_LIMITS and
+    are replaced by the X-App-Rate-Limit / X-Method-Rate-Limit headers as soon
+    as the API reports them. Thread-safe.
+    """
+    def __init__(self, default_limits=None):
+        self.default_limits = default_limits or RATE_LIMITS
+        self._lock = threading.Lock()
+        self._app = {}            # host -> [_Bucket]
+        self._method = {}         # (host, method) -> [_Bucket]
+        self._blocked_until = {}  # host or (host, method) -> monotonic time
+
+    def _buckets(self, host, method):
+        if host not in self._app:
+            self._app[host] = [_Bucket(limit, window) for limit, window in self.default_limits]
+        return self._app[host] + self._method.get((host, method), [])
+
+    def try_acquire(self, host, method):
+        """
+        Reserves a slot if a request to `method` on `host` fits every known budget.
+        Returns 0 when reserved, otherwise the seconds to wait before trying again.
+        Non-blocking, so async callers can await the wait instead of sleeping a thread.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self._blocked_until.get(host, 0) - now,
+                self._blocked_until.get((host, method), 0) - now,
+                0
+            )
+            buckets = self._buckets(host, method)
+            for bucket in buckets:
+                wait = max(wait, bucket.wait_time(now))
+
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.reserve(now)
+                return 0
+            return wait
+
+    def acquire(self, host, method):
+        """
+        Blocks until a request to `method` on `host` fits every known budget,
+        then reserves the slot. Returns the total seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(host, method)
+            if wait <= 0:
+                return waited
+            logger.debug(f"Rate limiter: waiting {wait:.2f}s for {host} ({method})")
+            time.sleep(wait)
+            waited += wait
+
+    def update(self, host, method, headers):
+        """Applies the limit and count headers from a response."""
+        with self._lock:
+            now = time.monotonic()
+            app_limits = parse_limit_header(headers.get('X-App-Rate-Limit'))
+            if app_limits:
+                self._app[host] = self._apply(self._app.get(host, []), app_limits,
+                                              headers.get('X-App-Rate-Limit-Count'), now)
+
+            method_limits = parse_limit_header(headers.get('X-Method-Rate-Limit'))
+            if method_limits:
+                key = (host, method)
+                self._method[key] = self._apply(self._method.get(key, []), method_limits,
+                                                headers.get('X-Method-Rate-Limit-Count'), now)
+
+    def _apply(self, buckets, limits, count_header, now):
+        # Keep existing logs for unchanged windows, rebuild the rest
+        existing = {(b.limit, b.window): b for b in buckets}
+        updated = [existing.get((limit, window)) or _Bucket(limit, window) for limit, window in limits]
+
+        counts = dict((window, count) for count, window in parse_limit_header(count_header))
+        for bucket in updated:
+            if bucket.window in counts:
+                bucket.sync(counts[bucket.window], now)
+        return updated
+
+    def penalize(self, host, method, retry_after, limit_type=None):
+        """
+        Blocks the host (application/service limit) or just the method
+        after a 429, for `retry_after` seconds.
+        """
+        key = (host, method) if limit_type == 'method' else host
+        with self._lock:
+            until = time.monotonic() + retry_after
+            self._blocked_until[key] = max(self._blocked_until.get(key, 0), until)
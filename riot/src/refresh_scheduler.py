@@ -0,0 +1,128 @@
+import math
+import time
+import logging
+from .config import REFRESH_INTERVALS, REFRESH_BUDGET, DEFAULT_MATCH_COUNT, TRACKED_PRIORITY_BOOST
+
+logger = logging.getLogger(__name__)
+
+# Priority of players with no refresh history at all (data exactly one interval old is 1.0)
+NEVER_REFRESHED = 10.0
+
+
+class RefreshTask:
+    """One data type to refresh for one player, with its priority and estimated request cost."""
+    def __init__(self, puuid, name, platform, kind, priority, cost):
+        self.puuid = puuid
+        self.name = name
+        self.platform = platform
+        self.kind = kind
+        self.priority = priority
+        self.cost = cost
+
+    def __repr__(self):
+        return f"RefreshTask({self.name}, {self.kind}, priority={self.priority:.2f}, cost={self.cost})"
+
+
+class RefreshScheduler:
+    """
+    Keeps known players fresh without full-team refreshes.
+
+    Each player's mastery and matchlist have their own age (player_refresh) and refresh
+    interval (config.REFRESH_INTERVALS). Due items are ranked by staleness (age / interval)
+    weighted by how often the player is queried, and taken greedily until the per-cycle
+    request budget is spent. Matchlist cost is estimated from the player's recent game rate,
+    since every new match is one more detail request.
+
+    `tracked` (optional callable returning puuids) marks players to keep fresh first:
+    their priority is multiplied by `boost`, other players use the leftover budget.
+    """
+    def __init__(self, fetcher, db, intervals=None, budget=REFRESH_BUDGET, count=DEFAULT_MATCH_COUNT,
+                 tracked=None, boost=TRACKED_PRIORITY_BOOST):
+        self.fetcher = fetcher
+        self.db = db
+        self.intervals = intervals or REFRESH_INTERVALS
+        self.budget = budget
+        self.count = count
+        self.tracked = tracked
+        self.boost = boost
+
+    def _cost(self, kind, age, first_sync, recent_games, week):
+        if kind == 'mastery':
+            return 1
+        if first_sync or age is None:
+            return 1 + self.count # First sync lists and fetches a full window
+        expected_new = math.ceil(recent_games / week * age) if recent_games else 0
+        return 1 + min(self.count, expected_new)
+
+    def due_tasks(self, now=None):
+        """All tasks past their interval, highest priority first."""
+        now = now or time.time()
+        week = 7 * 24 * 3600
+        tracked = set(self.tracked()) if self.tracked else set()
+        tasks = []
+        for (puuid, name, tag, platform, last_updated, mastery_at, matchlist_at,
+             query_count, recent_games) in self.db.get_refresh_candidates(week):
+            popularity = 1 + math.log1p(query_count)
+            if puuid in tracked:
+                popularity *= self.boost
+            for kind, refreshed_at in (('mastery', mastery_at), ('matchlist', matchlist_at)):
+                # Unrecorded data is at least as old as the player's last account fetch
+                seen_at = refreshed_at or last_updated
+                age = now - seen_at if seen_at else None
+                interval = self.intervals[kind]
+                if age is not None and age < interval:
+                    continue
+                staleness = age / interval if age is not None else NEVER_REFRESHED
+                tasks.append(RefreshTask(puuid, f"{name}#{tag}", platform, kind, staleness * popularity,
+                                         self._cost(kind, age, refreshed_at is None, recent_games, week)))
+        tasks.sort(key=lambda t: t.priority, reverse=True)
+        return tasks
+
+    def plan(self, now=None):
+        """Greedy pick of due tasks within the budget. The top task always runs, even if over budget."""
+        chosen = []
+        remaining = self.budget
+        for task in self.due_tasks(now):
+            if task.cost <= remaining or not chosen:
+                chosen.append(task)
+                remaining -= task.cost
+        return chosen
+
+    def run_once(self, now=None):
+        """
+        Runs one cycle. Returns the tasks that were executed.
+        Mastery and matchlist refreshes are batched so match details still fetch concurrently.
+        """
+        # Long-running loops never reopen the response cache, so its daily purge happens here
+        cache = self.fetcher.client.cache if self.fetcher.client else None
+        if cache:
+            cache.purge_if_due()
+
+        tasks = self.plan(now)
+        if not tasks:
+            logger.info("Refresh scheduler: everything is fresh")
+            return []
+
+        estimated = sum(t.cost for t in tasks)
+        logger.info(f"Refresh scheduler: {len(tasks)} tasks, ~{estimated} requests (budget {self.budget})")
+
+        mastery = [(t.puuid, t.platform) for t in tasks if t.kind == 'mastery']
+        matchlist = [(t.puuid, t.platform) for t in tasks if t.kind == 'matchlist']
+        if mastery:
+            self.fetcher.refresh_players(mastery, count=self.count, mastery=True, matchlist=False)
+        if matchlist:
+            self.fetcher.refresh_players(matchlist, count=self.count, mastery=False, matchlist=True)
+        return tasks
+
+    def run_forever(self, pause, stop=None):
+        """Runs cycles every `pause` seconds until `stop` (a threading.Event) is set."""
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Refresh cycle failed: {e}")
+            if stop is not None:
+                if stop.wait(pause):
+                    return
+            else:
+                time.sleep(pause)
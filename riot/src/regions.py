@@ -0,0 +1,38 @@
+import logging
+from .config import PLATFORM_ROUTING
+
+logger = logging.getLogger(__name__)
+
+
+def parse_riot_id(text):
+    """
+    Parses 'Name#Tag' or 'Name#Tag@platform' (e.g. 'Faker#KR1@kr').
+    Returns: {'name', 'tag', 'platform'} (platform None when not given) or None if invalid.
+    """
+    text = text.strip()
+    platform = None
+    if '@' in text:
+        text, platform = text.rsplit('@', 1)
+        platform = platform.strip().lower()
+        if platform not in PLATFORM_ROUTING:
+            logger.warning(f"Unknown platform '{platform}' for {text}, using the default")
+            platform = None
+    if '#' not in text:
+        return None
+    name, tag = (part.strip() for part in text.split('#', 1))
+    if not name or not tag:
+        return None
+    return {'name': name, 'tag': tag, 'platform': platform}
+
+
+def region_for_platform(platform, default=None):
+    """Regional routing value (americas, europe, ...) for a platform like 'euw1'."""
+    if not platform:
+        return default
+    return PLATFORM_ROUTING.get(platform.lower(), default)
+
+
+def platform_of_match(match_id):
+    """Match IDs carry their platform as a prefix: 'EUW1_7123456' -> 'euw1'."""
+    prefix, sep, _ = match_id.partition('_')
+    return prefix.lower() if sep else None
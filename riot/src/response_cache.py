@@ -0,0 +1,110 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from .config import HTTP_CACHE_PATH, CACHE_TTLS, CACHE_PURGE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    On-disk cache for Riot API responses, keyed by URL.
+
+    Each endpoint class ('account', 'mastery', 'matchlist', 'match') has its own TTL
+    from config.CACHE_TTLS; None means the entry never expires (match-v5 details
+    are immutable) and is never purged. Expired entries keep their ETag / Last-Modified
+    so the client can revalidate with a conditional request instead of re-downloading,
+    until purge_if_due deletes them (at most once per CACHE_PURGE_INTERVAL).
+    """
+    def __init__(self, path=None, ttls=None):
+        self.path = path or HTTP_CACHE_PATH
+        self.ttls = ttls if ttls is not None else CACHE_TTLS
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    endpoint TEXT,
+                    body TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL
+                )
+            ''')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value REAL)')
+        self.purge_if_due()
+
+    def _conn(self):
+        # sqlite3 connections are per-thread; the fetcher calls us from a pool
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, url, endpoint):
+        """
+        Returns (data, fresh, validators) or None on a miss.
+        `validators` holds the conditional-request headers for a stale entry.
+        """
+        row = self._conn().execute(
+            'SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?', (url,)
+        ).fetchone()
+        if not row:
+            return None
+
+        body, etag, last_modified, fetched_at = row
+        ttl = self.ttls.get(endpoint)
+        fresh = ttl is None or (time.time() - fetched_at) < ttl
+
+        validators = {}
+        if etag:
+            validators['If-None-Match'] = etag
+        if last_modified:
+            validators['If-Modified-Since'] = last_modified
+        return json.loads(body), fresh, validators
+
+    def store(self, url, endpoint, data, headers):
+        """Saves a 200 response with its validators."""
+        with self._conn() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO responses (url, endpoint, body, etag, last_modified, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (url, endpoint, json.dumps(data), headers.get('ETag'),
+                  headers.get('Last-Modified'), time.time()))
+
+    def touch(self, url):
+        """Marks a revalidated (304) entry as fresh again."""
+        with self._conn() as conn:
+            conn.execute('UPDATE responses SET fetched_at = ? WHERE url = ?', (time.time(), url))
+
+    def purge_expired(self):
+        """Deletes entries past their TTL. Returns the number removed."""
+        now = time.time()
+        removed = 0
+        with self._conn() as conn:
+            for endpoint, ttl in self.ttls.items():
+                if ttl is None:
+                    continue
+                cur = conn.execute('DELETE FROM responses WHERE endpoint = ? AND fetched_at < ?',
+                                   (endpoint, now - ttl))
+                removed += cur.rowcount
+        return removed
+
+    def purge_if_due(self, interval=CACHE_PURGE_INTERVAL):
+        """Runs purge_expired if the last purge is older than `interval`. Returns the number removed."""
+        now = time.time()
+        with self._conn() as conn:
+            row = conn.execute("SELECT value FROM cache_meta WHERE key = 'purged_at'").fetchone()
+            if row and now - row[0] < interval:
+                return 0
+            conn.execute("INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('purged_at', ?)", (now,))
+        removed = self.purge_expired()
+        if removed:
+            logger.info(f"Response cache: purged {removed} expired entries")
+        return removed
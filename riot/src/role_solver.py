@@ -0,0 +1,80 @@
+import heapq
+from functools import lru_cache
+from itertools import permutations
+from .config import ROLE_ORDER
+
+# Exact role assignment over the player x role preference matrix.
+# A 5-stack has only 5! = 120 possible assignments, so scoring every one is exact,
+# cheaper in Python than a Hungarian solver, and gives the top-k alternatives for free.
+# Larger lobbies (10 players: P(10,5) = 30240 assignments) use a top-k DP over roles instead.
+
+
+@lru_cache(maxsize=None)
+def _permutations(n, r):
+    # Enumerated once per shape and reused for every roster
+    return tuple(permutations(range(n), r))
+
+
+def preference_matrix(role_counts, roles=ROLE_ORDER):
+    """
+    role_counts: one {role: games} dict per player.
+    Returns: rows of per-role play share (0.0-1.0), one row per player.
+    """
+    matrix = []
+    for counts in role_counts:
+        total = sum(counts.get(role, 0) for role in roles) or sum(counts.values())
+        matrix.append([counts.get(role, 0) / total if total else 0.0 for role in roles])
+    return matrix
+
+
+def solve_roles(weights, k=1):
+    """
+    Finds the k highest-scoring role assignments.
+    weights: players x roles matrix (e.g. from preference_matrix).
+    Returns: [(score, {role_index: player_index}), ...] best first.
+    Ties keep the lower player/role order, so results are deterministic.
+    """
+    n_players = len(weights)
+    if not n_players:
+        return []
+    n_roles = len(weights[0])
+
+    if n_players <= n_roles:
+        # Each player gets a distinct role
+        def candidates():
+            for roles in _permutations(n_roles, n_players):
+                score = 0.0
+                for player, role in enumerate(roles):
+                    score += weights[player][role]
+                yield score, roles
+        best = heapq.nlargest(k, candidates(), key=lambda c: c[0])
+        return [(score, {role: player for player, role in enumerate(roles)}) for score, roles in best]
+
+    # More players than roles: each role picks a distinct player
+    return [(score, dict(enumerate(players))) for score, players in _solve_dp(weights, n_players, n_roles, k)]
+
+
+def _solve_dp(weights, n_players, n_roles, k):
+    """
+    Top-k DP over roles in order. State = bitmask of players already placed; each state
+    keeps its k best partial assignments, since the rest of the score only depends on
+    which players are left. O(roles * C(players, roles) * players * k) instead of P(players, roles).
+    Same results and tie order as enumerating permutations (lowest player tuple first).
+    """
+    def order(entry):
+        return -entry[0], entry[1]
+
+    states = {0: [(0.0, ())]}
+    for role in range(n_roles):
+        following = {}
+        for used, partials in states.items():
+            for player in range(n_players):
+                bit = 1 << player
+                if used & bit:
+                    continue
+                bucket = following.setdefault(used | bit, [])
+                for score, players in partials:
+                    bucket.append((score + weights[player][role], players + (player,)))
+        states = {used: heapq.nsmallest(k, bucket, key=order) for used, bucket in following.items()}
+
+    return heapq.nsmallest(k, (entry for partials in states.values() for entry in partials), key=order)
@@ -0,0 +1,121 @@
+import heapq
+import logging
+from itertools import combinations
+from .config import ROSTER_WEIGHTS, ROLE_ORDER
+from .champion_catalog import get_catalog
+from .champion_pool import ChampionIndex, union_all
+from .role_solver import preference_matrix, solve_roles
+
+logger = logging.getLogger(__name__)
+
+
+class RosterOptimizer:
+    """
+    Picks the best N-player rosters out of a larger candidate list.
+
+    Every candidate is reduced once to a pool bitset and a role-share row, so a roster
+    is scored with bitwise ops plus one exact role solve. Score (0-1) is a weighted sum
+    (config.ROSTER_WEIGHTS) of:
+      - roles:   best role assignment / roster size
+      - overlap: mean pairwise shared pool, relative to the smaller pool
+      - balance: champion classes covered + physical/magic damage mix (from the catalog)
+    """
+    def __init__(self, db, catalog=None, weights=None):
+        self.db = db
+        self.catalog = catalog or get_catalog(db)
+        self.weights = weights or ROSTER_WEIGHTS
+        self.index = ChampionIndex(self.catalog.ids)
+
+    def _prepare(self, players_data):
+        """Precomputes per-player vectors and the class / damage-type masks."""
+        masks = [self.index.encode(p['pool']) for p in players_data]
+        role_counts = [self.db.get_role_counts(p['puuid']) for p in players_data]
+        role_weights = preference_matrix(role_counts)
+
+        # Class per champion, in one taxonomy (DataDragon classes; see ChampionCatalog.get_class)
+        class_masks = {}
+        dmg_masks = {'Physical': 0, 'Magic': 0}
+        for c_id in self.index.decode(union_all(masks)):
+            bit = 1 << self.index.positions[c_id]
+            champ_class = self.catalog.get_class(c_id)
+            if champ_class:
+                class_masks[champ_class] = class_masks.get(champ_class, 0) | bit
+            dmg_type = self.catalog.get_dmg_type(c_id)
+            if dmg_type in dmg_masks:
+                dmg_masks[dmg_type] |= bit
+            elif dmg_type == 'Mixed':
+                dmg_masks['Physical'] |= bit
+                dmg_masks['Magic'] |= bit
+
+        return masks, role_weights, class_masks, dmg_masks
+
+    def best_rosters(self, players_data, size=5, top_n=5):
+        """
+        Scores every `size`-player subset of `players_data` and returns the top_n.
+        Returns: [{'score', 'players': [names], 'structure': {Role: name}, 'breakdown': {...}}, ...]
+        """
+        if len(players_data) < size:
+            return []
+
+        masks, role_weights, class_masks, dmg_masks = self._prepare(players_data)
+        sizes = [mask.bit_count() for mask in masks]
+        best_share = [max(row) if row else 0.0 for row in role_weights]
+        w_roles = self.weights['roles']
+        w_overlap = self.weights['overlap']
+        w_balance = self.weights['balance']
+        n_classes = len(class_masks) or 1
+
+        # All-pairs overlap, computed once for every roster to reuse
+        n = len(players_data)
+        pair_overlap = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            for j in range(i + 1, n):
+                smaller = min(sizes[i], sizes[j])
+                value = (masks[i] & masks[j]).bit_count() / smaller if smaller else 0.0
+                pair_overlap[i][j] = pair_overlap[j][i] = value
+
+        heap = [] # min-heap of (score, roster, role_score, structure_assignment)
+        pruned = 0
+        for roster in combinations(range(n), size):
+            # Cheap terms first
+            pairs = [pair_overlap[i][j] for i, j in combinations(roster, 2)]
+            overlap = sum(pairs) / len(pairs) if pairs else 0.0
+
+            combined = union_all([masks[i] for i in roster])
+            classes = sum(1 for mask in class_masks.values() if combined & mask)
+            dmg_mix = 1.0 if (combined & dmg_masks['Physical']) and (combined & dmg_masks['Magic']) else 0.0
+            balance = 0.7 * (classes / n_classes) + 0.3 * dmg_mix
+
+            partial = w_overlap * overlap + w_balance * balance
+
+            # Prune: even a perfect role fit can't beat the current top_n
+            role_bound = sum(best_share[i] for i in roster) / size
+            if len(heap) >= top_n and partial + w_roles * role_bound <= heap[0][0]:
+                pruned += 1
+                continue
+
+            solved = solve_roles([role_weights[i] for i in roster], k=1)
+            role_score, assignment = solved[0] if solved else (0.0, {})
+            score = partial + w_roles * role_score / size
+
+            entry = (score, roster, {'roles': role_score / size, 'overlap': overlap, 'balance': balance}, assignment)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+
+        logger.debug(f"Roster search: {pruned} rosters pruned before role solve")
+
+        results = []
+        for score, roster, breakdown, assignment in sorted(heap, key=lambda e: e[0], reverse=True):
+            structure = {}
+            for r_idx, role in enumerate(ROLE_ORDER):
+                p_idx = assignment.get(r_idx)
+                structure[role] = players_data[roster[p_idx]]['gameName'] if p_idx is not None else "UNFILLED"
+            results.append({
+                'score': score,
+                'players': [players_data[i]['gameName'] for i in roster],
+                'structure': structure,
+                'breakdown': breakdown
+            })
+        return results
@@ -7,7 +7,13 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from src.data_fetcher import DataFetcher
 from src.database import RiotDatabase
 from src.api_client import RiotClient
-from src.config import TEAM_FILE_PATH, DEFAULT_MATCH_COUNT
+from src.async_client import AsyncRiotClient
+from src.match_archive import MatchArchive
+from src.regions import parse_riot_id
+from src.metrics import get_metrics
+from src.refresh_scheduler import RefreshScheduler
+from src.parquet_export import ParquetExporter
+from src.config import TEAM_FILE_PATH, DEFAULT_MATCH_COUNT, REFRESH_BUDGET, REFRESH_LOOP_SECONDS, PARQUET_EXPORT_PATH
 
 def setup_logging():
     logging.basicConfig(
@@ -16,34 +22,137 @@ def setup_logging():
         handlers=[logging.StreamHandler()]
     )
 
+def print_progress(phase, done, total):
+    print(f"  [{phase}] {done}/{total}", file=sys.stderr)
+
+def print_profile(metrics):
+    """Where the run spent its time, from the metrics registry."""
+    snapshot = metrics.snapshot()
+    histograms = snapshot['histograms']
+    counters = snapshot['counters']
+
+    print("\n--- Profile ---")
+    print(f"{'Timer':<45} {'Count':>6} {'Total (s)':>10} {'Mean (ms)':>10} {'p95 <=':>8}")
+    for name, series in histograms.items():
+        for entry in series:
+            labels = ','.join(f"{k}={v}" for k, v in entry['labels'].items())
+            label = name.replace('riot_', '', 1) + (f"{{{labels}}}" if labels else '')
+            mean = entry['sum'] / entry['count'] * 1000 if entry['count'] else 0
+            print(f"{label:<45} {entry['count']:>6} {entry['sum']:>10.2f} {mean:>10.1f} {entry['p95']:>8}")
+
+    print(f"\n{'Counter':<60} {'Value':>8}")
+    for name, series in counters.items():
+        for entry in series:
+            labels = ','.join(f"{k}={v}" for k, v in entry['labels'].items())
+            label = name.replace('riot_', '', 1) + (f"{{{labels}}}" if labels else '')
+            print(f"{label:<60} {entry['value']:>8g}")
+
+def write_metrics(metrics, path):
+    """.prom / .txt -> Prometheus text, anything else -> JSON."""
+    text = metrics.to_prometheus() if path.endswith(('.prom', '.txt')) else metrics.to_json()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"Metrics written to {path}")
+
 def main():
     parser = argparse.ArgumentParser(description="Update Riot Data")
     parser.add_argument("--file", type=str, default=TEAM_FILE_PATH, help="Path to team file")
     parser.add_argument("--count", type=int, default=DEFAULT_MATCH_COUNT, help="Number of recent matches to fetch per player")
+    parser.add_argument("--full", action="store_true", help="Re-list the full match window instead of syncing only new matches")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Overlap all player and match requests with the asyncio client")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the HTTP response cache and always hit the API")
+    parser.add_argument("--rebuild", action="store_true", help="Re-derive all match tables from the local raw-match archive (no API calls)")
+    parser.add_argument("--export-parquet", type=str, nargs='?', const=PARQUET_EXPORT_PATH, metavar="DIR",
+                        help="Export new matches, mastery and champions to partitioned Parquet (needs pyarrow, no API calls)")
+    parser.add_argument("--profile", action="store_true", help="Show progress per player/match and a timing breakdown at the end")
+    parser.add_argument("--metrics-out", type=str, help="Write metrics to this file (.prom for Prometheus text, otherwise JSON)")
+    parser.add_argument("--schedule", action="store_true", help="Refresh the stalest known players within --budget, then exit (for cron)")
+    parser.add_argument("--loop", type=int, nargs='?', const=REFRESH_LOOP_SECONDS, metavar="SECONDS",
+                        help="Run the refresh scheduler continuously, pausing SECONDS between cycles")
+    parser.add_argument("--budget", type=int, default=REFRESH_BUDGET, help="Estimated API requests per scheduler cycle")
+    parser.add_argument("--dry-run", action="store_true", help="With --schedule: print the refresh plan without fetching")
     args = parser.parse_args()
 
     setup_logging()
     
     # Initialize Core Components
     db = RiotDatabase()
-    client = RiotClient()
-    fetcher = DataFetcher(client, db)
-    
-    # Parse Team File
-    team = []
-    try:
-        with open(args.file, 'r') as f:
-            for line in f:
-                if '#' in line:
-                    parts = line.strip().split('#')
-                    team.append({'name': parts[0], 'tag': parts[1]})
-    except FileNotFoundError:
-        print(f"Error: Team file {args.file} not found.")
+    archive = MatchArchive()
+
+    if args.rebuild:
+        # Local only: no client, so no API key needed
+        stats = archive.stats()
+        print(f"Rebuilding from {stats['matches']} archived matches "
+              f"({stats['stored_bytes'] / 1e6:.1f} MB compressed, {stats['raw_bytes'] / 1e6:.1f} MB raw)...")
+        rebuilt, skipped = DataFetcher(None, db, archive=archive).rebuild_from_archive()
+        print(f"Rebuild complete! {rebuilt} matches re-derived, {skipped} skipped (queue not tracked).")
         return
 
-    print(f"Updating data for {len(team)} players (fetching last {args.count} matches)...")
-    fetcher.process_team(team, count=args.count)
-    print("Update complete! Run rankings.py or scout.py to view reports.")
+    if args.export_parquet:
+        try:
+            exporter = ParquetExporter(db, args.export_parquet)
+        except RuntimeError as e:
+            print(e)
+            return
+        counts = exporter.export()
+        print(f"Parquet export to {args.export_parquet} complete! " +
+              ", ".join(f"{rows} {dataset}" for dataset, rows in counts.items()))
+        if args.profile:
+            print_profile(get_metrics())
+        return
+
+    if args.dry_run and (args.schedule or args.loop):
+        # Planning only reads the DB, so no client (or API key) is needed
+        for task in RefreshScheduler(None, db, budget=args.budget, count=args.count).plan():
+            print(f" - {task.name:<25} {task.kind:<10} priority {task.priority:6.2f}  ~{task.cost} requests")
+        return
+
+    client = RiotClient(use_cache=not args.no_cache)
+    async_client = AsyncRiotClient(client) if args.use_async else None
+    try:
+        fetcher = DataFetcher(client, db, incremental=not args.full, async_client=async_client, archive=archive,
+                              progress=print_progress if args.profile else None)
+
+        if args.schedule or args.loop:
+            scheduler = RefreshScheduler(fetcher, db, budget=args.budget, count=args.count)
+            if args.loop:
+                print(f"Refreshing stale players every {args.loop}s (budget {args.budget} requests per cycle). Ctrl+C to stop.")
+                try:
+                    scheduler.run_forever(args.loop)
+                except KeyboardInterrupt:
+                    pass
+            else:
+                tasks = scheduler.run_once()
+                print(f"Scheduled refresh complete! {len(tasks)} refresh tasks run.")
+            if args.profile:
+                print_profile(get_metrics())
+            if args.metrics_out:
+                write_metrics(get_metrics(), args.metrics_out)
+            return
+    
+        # Parse Team File
+        team = []
+        try:
+            with open(args.file, 'r') as f:
+                for line in f:
+                    member = parse_riot_id(line)
+                    if member:
+                        team.append(member)
+        except FileNotFoundError:
+            print(f"Error: Team file {args.file} not found.")
+            return
+
+        print(f"Updating data for {len(team)} players (fetching last {args.count} matches)...")
+        fetcher.process_team(team, count=args.count)
+        print("Update complete! Run rankings.py or scout.py to view reports.")
+
+        if args.profile:
+            print_profile(get_metrics())
+        if args.metrics_out:
+            write_metrics(get_metrics(), args.metrics_out)
+    finally:
+        # Closes the async client's send pool and the HTTP sessions
+        (async_client or client).close()
 
 if __name__ == "__main__":
     main()